@@ -0,0 +1,86 @@
+"""
+Benchmark: extração de cards por ElementHandle (antes) vs `page.evaluate` em lote (depois).
+
+Carrega uma listagem sintética com N poly-cards no Chromium e mede o tempo
+de extração por página nos dois caminhos, conferindo que os Deals são iguais.
+
+Uso:
+    python benchmarks/bench_card_extraction.py [n_cards] [rodadas]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from core.browser_pool import get_browser_pool, shutdown_browser_pool
+from scrapers.mercadolivre_search import MercadoLivreSearchScraper, CATEGORY_CARD_SELECTORS
+
+CARD_TEMPLATE = """
+<div class="poly-card">
+  <div class="poly-card__portada">
+    <img class="poly-component__picture" data-src="https://http2.mlstatic.com/D_{i}.webp" alt="Imagem {i}">
+  </div>
+  <div class="poly-card__content">
+    <h3><a class="poly-component__title" href="https://produto.mercadolivre.com.br/MLB-{pid}-produto-{i}?tracking_id=abc">Produto de Teste {i} Frete Grátis</a></h3>
+    <div class="poly-component__price">
+      <s class="andes-money-amount andes-money-amount--previous"><span class="andes-money-amount__currency-symbol">R$</span><span class="andes-money-amount__fraction">1.{i:03d}</span></s>
+      <div class="poly-price__current">
+        <span class="andes-money-amount"><span class="andes-money-amount__currency-symbol">R$</span><span class="andes-money-amount__fraction">{i}</span><span class="andes-money-amount__cents">90</span></span>
+        <span class="andes-money-amount__discount">{d}% OFF</span>
+      </div>
+    </div>
+  </div>
+</div>
+"""
+
+
+def build_listing(n_cards: int) -> str:
+    cards = "".join(CARD_TEMPLATE.format(i=i, pid=3000000000 + i, d=i % 70 + 5) for i in range(1, n_cards + 1))
+    return f"<html><body><section class='ui-search-layout'>{cards}</section></body></html>"
+
+
+async def bench(n_cards: int = 100, rounds: int = 5):
+    scraper = MercadoLivreSearchScraper()
+    html = build_listing(n_cards)
+
+    async with get_browser_pool().acquire() as context:
+        page = await context.new_page()
+        await page.set_content(html)
+
+        legacy_times, bulk_times = [], []
+        legacy_deals = bulk_deals = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            cards = await page.query_selector_all(CATEGORY_CARD_SELECTORS[0])
+            legacy_deals = [await scraper._extract_deal_from_card(c, "bench") for c in cards]
+            legacy_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            data = await scraper._extract_cards_data(page, CATEGORY_CARD_SELECTORS)
+            bulk_deals = [scraper._build_deal(d, "bench") for d in data]
+            bulk_times.append(time.perf_counter() - start)
+
+        await page.close()
+
+    same = [d.model_dump() for d in legacy_deals] == [d.model_dump() for d in bulk_deals]
+    legacy_ms = min(legacy_times) * 1000
+    bulk_ms = min(bulk_times) * 1000
+    print(f"Cards por página: {n_cards} | rodadas: {rounds}")
+    print(f"  ElementHandle (antes): {legacy_ms:8.1f} ms/página")
+    print(f"  page.evaluate (depois): {bulk_ms:8.1f} ms/página")
+    print(f"  Speedup: {legacy_ms / bulk_ms:.1f}x | Deals idênticos: {same}")
+
+
+async def main():
+    n_cards = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    try:
+        await bench(n_cards, rounds)
+    finally:
+        await shutdown_browser_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Microbenchmark: 10k lookups `is_deal_sent` com conexão por chamada vs conexão persistente.
+
+Uso:
+    python benchmarks/bench_database.py [lookups]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+from core.database import Database
+from models.deal import Deal
+
+
+def seed(db: Database, n: int = 1000):
+    for i in range(n):
+        db.add_sent_deal(Deal(
+            title=f"Produto {i}",
+            price=100.0 + i,
+            url=f"https://produto.mercadolivre.com.br/MLB-{i}",
+            product_id=f"MLB-{i}",
+            store="Mercado Livre"
+        ))
+
+
+def run(db: Database, lookups: int) -> float:
+    rng = random.Random(42)
+    ids = [f"MLB-{rng.randrange(2000)}" for _ in range(lookups)]
+    start = time.perf_counter()
+    for pid in ids:
+        db.is_deal_sent(pid, 150.0)
+    return time.perf_counter() - start
+
+
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with Database(path) as db:
+            seed(db)
+
+        per_call = Database(path, persistent=False)
+        t_per_call = run(per_call, lookups)
+
+        with Database(path) as persistent:
+            t_persistent = run(persistent, lookups)
+
+    print(f"{lookups} lookups is_deal_sent")
+    print(f"  Conexão por chamada: {t_per_call * 1000:8.1f} ms ({t_per_call / lookups * 1e6:6.1f} µs/lookup)")
+    print(f"  Conexão persistente: {t_persistent * 1000:8.1f} ms ({t_persistent / lookups * 1e6:6.1f} µs/lookup)")
+    print(f"  Speedup: {t_per_call / t_persistent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
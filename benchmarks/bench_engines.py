@@ -0,0 +1,88 @@
+"""
+Benchmark: engine HTTP (aiohttp + parser offline) vs engine browser (Chromium).
+
+Serve a fixture de listagem (tests/fixtures/listing_lista.html, replicada
+`fator` vezes) num servidor aiohttp local e mede, por página, o tempo de
+download + extração nos dois engines, conferindo que os Deals são iguais.
+Se o Chromium não estiver disponível, mede só o engine HTTP.
+
+Uso:
+    python benchmarks/bench_engines.py [fator] [rodadas]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.append(os.getcwd())
+
+from benchmarks.fixture_corpus import load_fixture, inflate
+from core.browser_pool import get_browser_pool, shutdown_browser_pool
+from scrapers.listing_cards import CATEGORY_CARD_SELECTORS, build_deal
+from scrapers.mercadolivre_http import MercadoLivreHttpScraper, close_http_session
+from scrapers.mercadolivre_search import MercadoLivreSearchScraper
+
+
+async def bench(factor: int = 8, rounds: int = 5):
+    html = inflate(load_fixture("listing"), factor)
+    n_cards = 6 * factor
+
+    async def listing(request):
+        return web.Response(text=html, content_type="text/html")
+
+    app = web.Application()
+    app.add_routes([web.get("/lista", listing)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/lista"
+
+    # max_pages=1: mede uma página (a fixture não pagina)
+    http_engine = MercadoLivreHttpScraper(max_pages=1)
+    scraper = MercadoLivreSearchScraper()
+
+    http_times, browser_times = [], []
+    http_deals = browser_deals = []
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            cards = await http_engine.fetch_listing_cards(url, max_results=n_cards)
+            http_deals = [d for d in map(build_deal, cards) if d]
+            http_times.append(time.perf_counter() - start)
+
+        try:
+            async with get_browser_pool().acquire() as context:
+                page = await context.new_page()
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    await page.goto(url, wait_until="domcontentloaded")
+                    cards = await scraper._extract_cards_data(page, CATEGORY_CARD_SELECTORS)
+                    browser_deals = [d for d in map(build_deal, cards) if d]
+                    browser_times.append(time.perf_counter() - start)
+                await page.close()
+        except Exception as e:
+            print(f"⚠️ Engine browser indisponível ({type(e).__name__}): medindo só HTTP.")
+    finally:
+        await close_http_session()
+        await shutdown_browser_pool()
+        await runner.cleanup()
+
+    http_avg = sum(http_times) / len(http_times)
+    print(f"Cards: {n_cards} | Rodadas: {rounds} | Deals válidos: {len(http_deals)}")
+    print(f"HTTP:    {http_avg * 1000:8.1f} ms/página")
+    if browser_times:
+        browser_avg = sum(browser_times) / len(browser_times)
+        print(f"Browser: {browser_avg * 1000:8.1f} ms/página")
+        print(f"Speedup: {browser_avg / http_avg:.1f}x")
+        same = [d.model_dump(exclude={'timestamp', 'strategy'}) for d in http_deals] == \
+               [d.model_dump(exclude={'timestamp', 'strategy'}) for d in browser_deals]
+        print(f"Deals idênticos: {same}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    r = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(bench(n, r))
@@ -0,0 +1,151 @@
+"""
+Benchmark offline dos parsers de HTML de todos os scrapers (sem rede/browser).
+
+Roda cada parser sobre a fixture correspondente (tests/fixtures), replicada
+`fator` vezes para simular páginas reais, e reporta tempo, itens/s, MB/s e
+alocação (pico e retido, via tracemalloc) para cada backend de
+scrapers.html_parser ("bs4" = html.parser puro Python, "lxml").
+Obs.: tracemalloc só enxerga alocações do Python; a árvore C do lxml não
+entra no pico.
+
+Casos:
+    listing  - parse_listing_cards + build_deal (equivalente ao _extract_deal_from_card)
+    offers   - MercadoLivreScraper.parse_deals (fetch_deals)
+    search   - MercadoLivreScraper.parse_search_results (search_keyword)
+    product  - MercadoLivreScraper.parse_product_details (fetch_product_details)
+    hub      - MercadoLivreHubScraper.parse_hub_cards (fetch_my_deals)
+    pdp_hub  - MercadoLivreHubScraper.parse_product_page (_get_affiliate_link)
+    trends   - MercadoLivreTrendsScraper.parse_trending_terms (fetch_trending_terms)
+    state    - extract_deals: estado JSON embutido da listagem (mesma página do "listing")
+    state_offers - MercadoLivreScraper.parse_deals numa página /ofertas com estado JSON
+
+Uso:
+    python benchmarks/bench_parsers.py [fator] [rodadas] [caso ...]
+    HTML_PARSER=bs4 python benchmarks/bench_parsers.py   # só um backend
+"""
+import contextlib
+import gc
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.getcwd())
+
+import scrapers.html_parser as html_parser
+from benchmarks.fixture_corpus import load_fixture, inflate
+from scrapers.embedded_state import extract_deals
+from scrapers.listing_cards import parse_listing_cards, build_deal
+from scrapers.mercadolivre import MercadoLivreScraper
+from scrapers.mercadolivre_hub import MercadoLivreHubScraper
+from scrapers.mercadolivre_trends import MercadoLivreTrendsScraper
+
+PRODUCT_URL = "https://produto.mercadolivre.com.br/MLB-1234567890-produto-_JM"
+
+
+def build_cases():
+    """nome -> (fixture, função html -> lista de itens)."""
+    ml = MercadoLivreScraper()
+    hub = MercadoLivreHubScraper()
+    trends = MercadoLivreTrendsScraper(cache_file=os.path.join(tempfile.gettempdir(), "bench_trends_cache.json"))
+    return {
+        "listing": ("listing", lambda html: [d for d in map(build_deal, parse_listing_cards(html)) if d]),
+        "offers": ("offers", ml.parse_deals),
+        "search": ("search", ml.parse_search_results),
+        "product": ("product", lambda html: [ml.parse_product_details(html, PRODUCT_URL)]),
+        "hub": ("hub", lambda html: hub.parse_hub_cards(html, max_deals=sys.maxsize)),
+        "pdp_hub": ("product", lambda html: [hub.parse_product_page(html)]),
+        "trends": ("trends", trends.parse_trending_terms),
+        "state": ("listing_state", extract_deals),
+        "state_offers": ("offers_state", ml.parse_deals),
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silencia prints/logs dos parsers durante a medição."""
+    previous = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(previous)
+
+
+def measure(parse, html: str, rounds: int) -> dict:
+    with quiet():
+        items = parse(html)  # warm-up (imports/regex/caches)
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            parse(html)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        parse(html)
+        gc.collect()  # árvores do parser têm ciclos: retido = o que sobra de fato
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "items": len(items),
+        "ms": median * 1000,
+        "items_per_s": len(items) / median if median else 0.0,
+        "mb_per_s": len(html.encode("utf-8")) / 1e6 / median if median else 0.0,
+        "peak_kb": peak / 1024,
+        "retained_kb": retained / 1024,
+    }
+
+
+def run(factor: int = 50, rounds: int = 5, only=None, backend: str = None) -> dict:
+    previous = html_parser.HTML_PARSER
+    if backend:
+        html_parser.HTML_PARSER = backend
+    try:
+        results = {}
+        for name, (fixture, parse) in build_cases().items():
+            if only and name not in only:
+                continue
+            html = inflate(load_fixture(fixture), factor)
+            results[name] = {"kb": len(html.encode("utf-8")) / 1024, **measure(parse, html, rounds)}
+        return results
+    finally:
+        html_parser.HTML_PARSER = previous
+
+
+def main():
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    only = set(sys.argv[3:]) or None
+
+    if os.getenv("HTML_PARSER", "auto") != "auto":
+        backends = [html_parser.get_backend()]
+    else:
+        backends = ["bs4"] + (["lxml"] if html_parser.get_backend("lxml") == "lxml" else [])
+
+    print(f"Fator: {factor} | rodadas: {rounds} (mediana)")
+    all_results = {}
+    for backend in backends:
+        results = all_results[backend] = run(factor, rounds, only, backend)
+        print(f"\n[{backend}]")
+        print(f"{'caso':<12} {'KB':>8} {'itens':>6} {'ms':>9} {'itens/s':>10} {'MB/s':>7} {'pico KB':>9} {'retido KB':>10}")
+        for name, r in results.items():
+            print(
+                f"{name:<12} {r['kb']:>8.0f} {r['items']:>6} {r['ms']:>9.1f} {r['items_per_s']:>10.0f} "
+                f"{r['mb_per_s']:>7.2f} {r['peak_kb']:>9.0f} {r['retained_kb']:>10.0f}"
+            )
+
+    if len(all_results) > 1:
+        print("\nSpeedup lxml vs bs4: " + " | ".join(
+            f"{name} {all_results['bs4'][name]['ms'] / r['ms']:.1f}x" for name, r in all_results["lxml"].items()
+        ))
+
+
+if __name__ == "__main__":
+    main()
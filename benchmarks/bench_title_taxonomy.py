@@ -0,0 +1,150 @@
+"""
+Benchmark: limpeza + classificação de títulos (copywriter + dedup).
+
+Antes: `_clean_title` com um re.sub por ruído, `_classify_product` e
+`detect_category` com vários `any(word in title_lower)` cada (cópias abaixo,
+só para comparação). Depois: utils.title_taxonomy (um regex compilado, uma
+passada por título). Mede sem o lru_cache do analyze_title (títulos únicos)
+e com repetição (títulos que voltam a cada ciclo).
+
+Uso:
+    python benchmarks/bench_title_taxonomy.py [n_titulos] [rodadas]
+"""
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from utils.title_taxonomy import analyze_title
+
+VOCAB = (
+    "Tênis Nike Revolution Masculino", "Smartphone Samsung Galaxy A15 128GB", "Fone Bluetooth JBL Tune",
+    "Panela de Pressão Tramontina 4,5L", "Vestido Midi Floral", "Perfume Eau de Parfum 100ml",
+    "Camiseta Básica Algodão", "Notebook Lenovo Ideapad i5", "Kit 3 Cuecas Boxer", "Sofá Retrátil 3 Lugares",
+    "Placa de Vídeo RTX 4060", "Relógio Casio Vintage", "Furadeira de Impacto Bosch", "Whey Protein 900g",
+    "Cadeira Gamer Reclinável", "Monitor LG 24 IPS", "Smart TV 50 4K", "Chinelo Havaianas Slim",
+)
+EXTRAS = ("Frete Grátis", "Original", "Envio Imediato", "NF", "Lacrado", "Promoção", "Preto", "Azul", "Kit 2", "Oferta")
+
+
+def build_titles(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(VOCAB)} {' '.join(rng.sample(EXTRAS, rng.randint(0, 3)))} {i}"
+        for i in range(n)
+    ]
+
+
+# --- Implementação anterior (copywriter + category_dedup), só para comparação ---
+
+_NOISE_WORDS = [
+    "Frete Grátis", "Frete Gratis", "Promoção", "Oferta",
+    "Original", "Envio Imediato", "Full", "Melhor Preço",
+    "Pronta Entrega", "Novo", "Lacrado", "Nota Fiscal", "NF"
+]
+
+
+def legacy_clean_title(title: str) -> str:
+    clean_title = title
+    for word in _NOISE_WORDS:
+        clean_title = re.sub(re.escape(word), "", clean_title, flags=re.IGNORECASE)
+    clean_title = clean_title.strip(" -|[]()")
+    return " ".join(clean_title.split())
+
+
+def legacy_classify(title: str) -> str:
+    title_lower = title.lower()
+    if any(word in title_lower for word in ['tênis', 'tenis', 'chinelo', 'sandália', 'sandalia', 'crocs', 'sapato', 'bota']):
+        return 'calcado'
+    roupa_keywords = ['camiseta', 'camisa', 'blusa', 'vestido', 'saia', 'calça', 'calca', 'short', 'bermuda', 'cueca', 'calcinha', 'sutiã', 'sutia']
+    if any(word in title_lower for word in roupa_keywords):
+        if any(fem in title_lower for fem in ['feminina', 'feminino', 'mulher', 'ela']):
+            return 'roupa_feminina'
+        elif any(masc in title_lower for masc in ['masculina', 'masculino', 'homem', 'ele']):
+            return 'roupa_masculina'
+        elif any(word in title_lower for word in ['vestido', 'saia', 'calcinha', 'sutiã']):
+            return 'roupa_feminina'
+        return 'roupa_masculina'
+    if any(word in title_lower for word in ['perfume', 'colônia', 'colonia', 'desodorante', 'deo', 'fragrância', 'fragrancia', 'eau de']):
+        return 'perfumaria'
+    if any(word in title_lower for word in ['notebook', 'celular', 'smartphone', 'fone', 'headphone', 'tablet', 'tv', 'mouse', 'teclado', 'monitor']):
+        return 'eletronico'
+    if any(word in title_lower for word in ['mesa', 'cadeira', 'sofá', 'sofa', 'cama', 'colchão', 'colchao', 'travesseiro', 'panela', 'frigideira']):
+        return 'casa'
+    return 'geral'
+
+
+_DEDUP_KEYWORDS = {
+    "notebook": ["notebook", "laptop"],
+    "celular": ["celular", "smartphone", "iphone", "galaxy", "xiaomi", "redmi", "poco"],
+    "tablet": ["tablet", "ipad"],
+    "monitor": ["monitor"],
+    "relogio": ["relogio", "relógio", "smartwatch", "watch"],
+    "fone": ["fone", "headset", "earbuds", "airpods", "buds"],
+    "tenis": ["tenis", "tênis", "sneaker"],
+}
+
+
+def legacy_detect_category(title: str) -> str:
+    title_lower = title.lower()
+    for category, keywords in _DEDUP_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in title_lower:
+                return category
+    return "outros"
+
+
+def legacy(title: str):
+    clean = legacy_clean_title(title)
+    return clean, legacy_classify(clean), legacy_detect_category(title)
+
+
+def taxonomy(title: str):
+    info = analyze_title(title)
+    return info.clean_title, info.category, info.dedup_category
+
+
+def taxonomy_uncached(title: str):
+    info = analyze_title.__wrapped__(title)
+    return info.clean_title, info.category, info.dedup_category
+
+
+def measure(fn, titles: list, rounds: int) -> float:
+    times = []
+    for _ in range(rounds):
+        analyze_title.cache_clear()
+        start = time.perf_counter()
+        for title in titles:
+            fn(title)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    titles = build_titles(n)
+    repeated = [titles[i % 2000] for i in range(n)]  # Mesmos títulos voltando (ciclos seguidos)
+
+    cases = {
+        "antes (3 funções)": (legacy, titles),
+        "taxonomia (sem cache)": (taxonomy_uncached, titles),
+        "taxonomia (2k únicos, lru)": (taxonomy, repeated),
+    }
+    print(f"Títulos: {n} | rodadas: {rounds} (mediana)")
+    baseline = None
+    for name, (fn, data) in cases.items():
+        elapsed = measure(fn, data, rounds)
+        baseline = baseline or elapsed
+        print(f"{name:<28} {elapsed * 1000:>9.1f} ms {n / elapsed:>12.0f} títulos/s {baseline / elapsed:>6.1f}x")
+
+    changed = sum(legacy(t)[1:] != taxonomy(t)[1:] for t in titles)
+    print(f"\nClassificação diferente da anterior (palavra inteira / listas unificadas): {changed / n:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Corpus de HTML offline (tests/fixtures) para testes e benchmarks de parsing.
+
+Cada fixture marca o bloco de cards com `<!-- cards:start -->` e
+`<!-- cards:end -->`; `inflate` replica esse bloco (com ids MLB únicos por
+cópia) para simular páginas reais de vários MB. Nas fixtures `*_state` a
+lista de polycards do estado JSON embutido é replicada junto.
+"""
+import json
+import os
+import re
+
+from scrapers.embedded_state import locate_state, iter_polycards
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures")
+
+CORPUS = {
+    "listing": "listing_lista.html",
+    "offers": "offers_ofertas.html",
+    "search": "search_results.html",
+    "product": "product_detail.html",
+    "hub": "hub.html",
+    "trends": "trends.html",
+    "listing_state": "listing_state.html",
+    "offers_state": "offers_state.html",
+}
+
+CARDS_START = "<!-- cards:start -->"
+CARDS_END = "<!-- cards:end -->"
+MLB_ID_RE = re.compile(r'MLB(-?)(\d+)')
+
+
+def load_fixture(name: str) -> str:
+    """Carrega uma fixture pelo nome curto (CORPUS) ou pelo nome do arquivo."""
+    filename = CORPUS.get(name, name)
+    with open(os.path.join(FIXTURES_DIR, filename), encoding="utf-8") as f:
+        return f.read()
+
+
+def _shift_ids(text: str, copy: int) -> str:
+    return MLB_ID_RE.sub(lambda m: f"MLB{m.group(1)}{int(m.group(2)) + copy * 1_000_000}", text)
+
+
+def inflate(html: str, factor: int) -> str:
+    """Replica `factor` vezes o bloco de cards da fixture (ids MLB deslocados por cópia)."""
+    if factor <= 1:
+        return html
+    if CARDS_START in html:
+        head, rest = html.split(CARDS_START, 1)
+        block, tail = rest.split(CARDS_END, 1)
+        copies = [block] + [_shift_ids(block, i) for i in range(1, factor)]
+        html = head + CARDS_START + "".join(copies) + CARDS_END + tail
+    return _inflate_state(html, factor)
+
+
+def _find_card_list(node):
+    """Primeira lista (de cima para baixo) cujos itens contêm polycards."""
+    if isinstance(node, list):
+        if any(next(iter_polycards(item), None) is not None for item in node):
+            return node
+        children = node
+    elif isinstance(node, dict):
+        children = node.values()
+    else:
+        return None
+    for child in children:
+        found = _find_card_list(child)
+        if found is not None:
+            return found
+    return None
+
+
+def _inflate_state(html: str, factor: int) -> str:
+    located = locate_state(html)
+    if located is None:
+        return html
+    state, start, end = located
+    cards = _find_card_list(state)
+    if cards is None:
+        return html
+    block = json.dumps(cards, ensure_ascii=False)
+    cards.extend(item for i in range(1, factor) for item in json.loads(_shift_ids(block, i)))
+    return html[:start] + json.dumps(state, ensure_ascii=False) + html[end:]
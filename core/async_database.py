@@ -0,0 +1,229 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.database import Database
+from core.dedup_cache import DedupCache, MISS
+from models.deal import Deal
+
+
+class AsyncDatabase:
+    """
+    Fachada assíncrona do `Database` para uso dentro do event loop.
+
+    - Escritas: UMA thread dedicada. Chamadas concorrentes de `add_sent_deal`
+      são agrupadas e gravadas numa única transação (group commit).
+    - Leituras: pool de threads, cada uma com sua própria conexão (WAL
+      permite ler enquanto o writer grava).
+
+    - Dedup: `DedupCache` (Bloom + LRU) responde a maioria dos checks sem ir
+      ao SQLite; `warm_cache()` aquece no startup (ou no 1º check, se
+      ninguém chamou antes).
+
+    Nenhuma chamada bloqueia o loop (polling do Telegram continua respondendo).
+    """
+
+    def __init__(self, db_path="data/deals.db", read_workers: int = 2):
+        self.db_path = db_path
+        # Cria o schema de forma síncrona uma única vez (barato, só no startup)
+        self._writer_db = Database(db_path)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-reader")
+
+        self._local = threading.local()
+        self._reader_dbs: List[Database] = []
+        self._reader_dbs_lock = threading.Lock()
+
+        self.cache = DedupCache()
+        self._warm_lock: Optional[asyncio.Lock] = None
+
+        self._pending: List[tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    # --- Infra ---
+
+    def _reader_db(self) -> Database:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = Database(self.db_path)
+            self._local.db = db
+            with self._reader_dbs_lock:
+                self._reader_dbs.append(db)
+        return db
+
+    async def _read(self, method: str, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: getattr(self._reader_db(), method)(*args))
+
+    async def _write(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, fn, *args)
+
+    async def _flush_pending(self):
+        # Enquanto um lote grava, novas escritas acumulam para o próximo
+        while self._pending:
+            batch, self._pending = self._pending, []
+            deals = [deal for deal, _, _ in batch if deal is not None]
+            outbox_updates = [update for _, update, _ in batch if update is not None]
+            try:
+                if outbox_updates:
+                    await self._write(self._writer_db.add_sent_deals, deals, outbox_updates)
+                else:
+                    await self._write(self._writer_db.add_sent_deals, deals)
+            except Exception as e:
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+            else:
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_result(None)
+
+    async def _group_commit(self, deal: Optional[Deal], outbox_update: Optional[tuple]):
+        """Enfileira a escrita e aguarda o commit do lote que a contém."""
+        if self._closed:
+            raise RuntimeError("AsyncDatabase já foi encerrado.")
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((deal, outbox_update, fut))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+        await fut
+
+    # --- API (espelha Database) ---
+
+    async def warm_cache(self, recent_limit: int = None):
+        """Carrega ids enviados no Bloom e os mais recentes no LRU."""
+        sent_ids, references = await self._read("get_dedup_snapshot", recent_limit or self.cache.max_entries)
+        self.cache.warm(sent_ids, references)
+
+    async def _ensure_warm(self):
+        if self.cache.warmed:
+            return
+        if self._warm_lock is None:
+            self._warm_lock = asyncio.Lock()
+        async with self._warm_lock:
+            if not self.cache.warmed:  # Checks concorrentes aquecem uma vez só
+                await self.warm_cache()
+
+    async def _resolve_references(self, product_ids: List[str]) -> dict:
+        await self._ensure_warm()
+        references = {}
+        misses = []
+        for product_id in product_ids:
+            reference = self.cache.lookup(product_id)
+            if reference is MISS:
+                misses.append(product_id)
+            else:
+                references[product_id] = reference
+
+        if misses:
+            found = await self._read("lookup_price_references", misses)
+            for product_id in misses:
+                references[product_id] = found.get(product_id)
+                self.cache.store(product_id, references[product_id])
+        return references
+
+    async def is_deal_sent(self, product_id: str, current_price: float = None) -> dict:
+        references = await self._resolve_references([product_id])
+        return Database.status_from_reference(current_price, references[product_id])
+
+    async def check_deals_bulk(self, deals: List[Deal]) -> Dict[str, dict]:
+        current_prices = Database.first_prices(deals)
+        references = await self._resolve_references(list(current_prices))
+        return {
+            pid: Database.status_from_reference(price, references[pid])
+            for pid, price in current_prices.items()
+        }
+
+    async def get_last_price(self, product_id: str) -> float:
+        return await self._read("get_last_price", product_id)
+
+    async def get_total_count(self) -> int:
+        return await self._read("get_total_count")
+
+    async def add_sent_deal(self, deal: Deal, outbox_id: int = None, outbox_status: str = Database.OUTBOX_SENT):
+        """Grava o deal (group commit); com `outbox_id`, atualiza o item da outbox na mesma transação."""
+        await self._group_commit(deal, (outbox_id, outbox_status, None) if outbox_id is not None else None)
+        # Invalida só após o commit (uma leitura no meio não "re-cacheia" o estado antigo)
+        if deal.product_id:
+            self.cache.mark_sent(deal.product_id)
+
+    async def get_price_stats(self, product_id: str, days: int = None) -> dict:
+        return await self._read("get_price_stats", product_id, days)
+
+    async def record_observations(self, deals: List[Deal]):
+        for deal in deals:
+            if deal.product_id:
+                self.cache.observe_price(deal.product_id, Database._to_cents(deal.price))
+        await self._write(self._writer_db.record_observations, deals)
+
+    async def prune_price_history(self, days: int = None):
+        await self._write(self._writer_db.prune_price_history, days)
+
+    async def outbox_add(self, deal: Deal, kind: str, to_admin: bool) -> Tuple[int, str]:
+        return await self._write(self._writer_db.outbox_add, deal, kind, to_admin)
+
+    async def set_outbox_status(self, outbox_id: int, status: str, error: str = None):
+        """Mudança de status da outbox; agrupada com as demais escritas pendentes."""
+        await self._group_commit(None, (outbox_id, status, error))
+
+    async def outbox_entries(self, statuses: List[str]) -> List[dict]:
+        return await self._read("outbox_entries", statuses)
+
+    async def outbox_get(self, outbox_id: int) -> Optional[dict]:
+        return await self._read("outbox_get", outbox_id)
+
+    async def prune_outbox(self, days: int = 7):
+        await self._write(self._writer_db.prune_outbox, days)
+
+    async def get_affiliate_links(self, product_ids: List[str], tag: str, ttl: int, negative_ttl: int) -> Dict[str, str]:
+        return await self._read("get_affiliate_links", product_ids, tag, ttl, negative_ttl)
+
+    async def save_affiliate_links(self, links: Dict[str, str], tag: str):
+        await self._write(self._writer_db.save_affiliate_links, links, tag)
+
+    async def prune_affiliate_links(self, ttl: int, negative_ttl: int):
+        await self._write(self._writer_db.prune_affiliate_links, ttl, negative_ttl)
+
+    async def clean_old_deals(self, days=7):
+        await self._write(self._writer_db.clean_old_deals, days)
+
+    async def close(self):
+        """Drena escritas pendentes e fecha threads e conexões."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._flush_task is not None:
+            await self._flush_task
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self._writer_db.close()
+        with self._reader_dbs_lock:
+            for db in self._reader_dbs:
+                db.close()
+            self._reader_dbs.clear()
+
+
+_database: Optional[AsyncDatabase] = None
+
+
+def get_database() -> AsyncDatabase:
+    """Retorna a fachada assíncrona global do processo (criada na primeira chamada)."""
+    global _database
+    if _database is None or _database._closed:
+        _database = AsyncDatabase()
+    return _database
+
+
+async def shutdown_database():
+    """Fecha a fachada global, se existir."""
+    global _database
+    if _database is not None:
+        await _database.close()
+        _database = None
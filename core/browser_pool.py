@@ -0,0 +1,279 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+from config.logger import logger
+from core.metrics import timed
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class _PooledContext:
+    """Contexto do Chromium + contador de páginas servidas."""
+
+    def __init__(self, context: BrowserContext, generation: int):
+        self.context = context
+        self.generation = generation
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """
+    Pool de processo único: 1 Chromium, N contextos reutilizáveis.
+
+    - Health check: browser desconectado é relançado na próxima aquisição.
+    - Reciclagem: contexto após `max_pages_per_context` páginas; browser após
+      `max_pages_per_browser` páginas ou `max_rss_mb` de RSS (Linux). O RSS
+      (round trip CDP + /proc) é amostrado no máx. a cada
+      `rss_check_interval` s e fora do lock do pool.
+    - Shutdown: `close()` espera os contextos emprestados e fecha tudo.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = 2,
+        max_pages_per_context: int = 20,
+        max_pages_per_browser: int = 200,
+        max_rss_mb: int = 1024,
+        rss_check_interval: float = 30.0,
+        headless: bool = True,
+        clock=time.monotonic,
+    ):
+        self.max_contexts = max_contexts
+        self.max_pages_per_context = max_pages_per_context
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.rss_check_interval = rss_check_interval
+        self.headless = headless
+        self.clock = clock
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._generation = 0
+        self._browser_pages = 0
+        self._recycle_pending = False
+        self._last_rss_check: Optional[float] = None
+        self.rss_checks = 0
+
+        self._idle: list[_PooledContext] = []
+        self._in_use = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+    # --- Ciclo de vida do browser ---
+
+    def _ensure_primitives(self):
+        # Criados sob demanda para ficarem presos ao event loop em execução
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_contexts)
+            self._lock = asyncio.Lock()
+
+    def _is_healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    @timed("browser.launch")
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._generation += 1
+        self._browser_pages = 0
+        self._recycle_pending = False
+        logger.info(f"🌐 Browser pool: Chromium iniciado (geração #{self._generation})")
+
+    async def _close_browser(self):
+        for pooled in self._idle:
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+        self._idle.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    async def _browser_rss_mb(self) -> Optional[float]:
+        """Soma o RSS dos processos do Chromium (apenas Linux, via /proc)."""
+        if not os.path.exists("/proc") or not self._is_healthy():
+            return None
+        try:
+            cdp = await self._browser.new_browser_cdp_session()
+            info = await cdp.send("SystemInfo.getProcessInfo")
+            await cdp.detach()
+        except Exception:
+            return None
+
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        total = 0
+        for proc in info.get("processInfo", []):
+            try:
+                with open(f"/proc/{proc['id']}/statm", "r") as f:
+                    total += int(f.read().split()[1]) * page_size
+            except (OSError, ValueError, IndexError, KeyError):
+                continue
+        return total / (1024 * 1024)
+
+    # --- Empréstimo de contextos ---
+
+    async def _take_context(self) -> _PooledContext:
+        async with self._lock:
+            if self._closed:
+                raise RuntimeError("BrowserPool já foi encerrado.")
+
+            if not self._is_healthy():
+                if self._browser is not None:
+                    logger.warning("⚠️ Browser pool: Chromium desconectado. Relançando...")
+                await self._close_browser()
+                await self._launch()
+            elif self._recycle_pending and self._in_use == 0:
+                logger.info("♻️ Browser pool: reciclando Chromium...")
+                await self._close_browser()
+                await self._launch()
+
+            while self._idle:
+                pooled = self._idle.pop()
+                if pooled.generation == self._generation:
+                    self._in_use += 1
+                    return pooled
+                try:
+                    await pooled.context.close()
+                except Exception:
+                    pass
+
+            context = await self._browser.new_context(
+                user_agent=DEFAULT_USER_AGENT,
+                viewport={'width': 1366, 'height': 768}
+            )
+            self._in_use += 1
+            return _PooledContext(context, self._generation)
+
+    async def _return_context(self, pooled: _PooledContext, pages_opened: int):
+        check_rss = False
+        async with self._lock:
+            self._in_use -= 1
+            pooled.pages_served += pages_opened
+            self._browser_pages += pages_opened
+
+            recycle_context = (
+                self._closed
+                or pooled.generation != self._generation
+                or pooled.pages_served >= self.max_pages_per_context
+            )
+
+            if not recycle_context:
+                try:
+                    # Fecha abas remanescentes e limpa estado entre empréstimos
+                    for page in list(pooled.context.pages):
+                        await page.close()
+                    await pooled.context.clear_cookies()
+                    await pooled.context.unroute_all()
+                except Exception:
+                    recycle_context = True
+
+            if recycle_context:
+                try:
+                    await pooled.context.close()
+                except Exception:
+                    pass
+            else:
+                self._idle.append(pooled)
+
+            if not self._recycle_pending and self._is_healthy():
+                if self._browser_pages >= self.max_pages_per_browser:
+                    logger.info(f"♻️ Browser pool: {self._browser_pages} páginas servidas. Reciclagem agendada.")
+                    self._recycle_pending = True
+                else:
+                    now = self.clock()
+                    if self._last_rss_check is None or now - self._last_rss_check >= self.rss_check_interval:
+                        self._last_rss_check = now  # Reserva a amostra: devoluções concorrentes não repetem
+                        check_rss = True
+            generation = self._generation
+
+        if not check_rss:
+            return
+        # Round trip CDP fora do lock: quem está pegando contexto não espera
+        self.rss_checks += 1
+        rss = await self._browser_rss_mb()
+        if rss is None or rss < self.max_rss_mb:
+            return
+        async with self._lock:
+            if not self._recycle_pending and generation == self._generation:
+                logger.info(f"♻️ Browser pool: RSS {rss:.0f} MB >= {self.max_rss_mb} MB. Reciclagem agendada.")
+                self._recycle_pending = True
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Empresta um BrowserContext do pool.
+
+        Uso:
+            async with pool.acquire() as context:
+                page = await context.new_page()
+        """
+        self._ensure_primitives()
+        await self._slots.acquire()
+        pooled = None
+        pages_opened = 0
+
+        def _count_page(_page):
+            nonlocal pages_opened
+            pages_opened += 1
+
+        try:
+            pooled = await self._take_context()
+            pooled.context.on("page", _count_page)
+            yield pooled.context
+        finally:
+            if pooled is not None:
+                pooled.context.remove_listener("page", _count_page)
+                await self._return_context(pooled, pages_opened)
+            self._slots.release()
+
+    async def close(self):
+        """Encerra o pool aguardando os contextos emprestados serem devolvidos."""
+        if self._closed:
+            return
+        self._ensure_primitives()
+        for _ in range(self.max_contexts):
+            await self._slots.acquire()
+        async with self._lock:
+            self._closed = True
+            await self._close_browser()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        for _ in range(self.max_contexts):
+            self._slots.release()
+        logger.info("🛑 Browser pool encerrado.")
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Retorna o pool global do processo (criado na primeira chamada)."""
+    global _pool
+    if _pool is None or _pool._closed:
+        _pool = BrowserPool(
+            max_contexts=int(os.getenv("BROWSER_POOL_CONTEXTS", "2")),
+            max_pages_per_context=int(os.getenv("BROWSER_POOL_PAGES_PER_CONTEXT", "20")),
+            max_pages_per_browser=int(os.getenv("BROWSER_POOL_PAGES_PER_BROWSER", "200")),
+            max_rss_mb=int(os.getenv("BROWSER_POOL_MAX_RSS_MB", "1024")),
+            rss_check_interval=float(os.getenv("BROWSER_POOL_RSS_INTERVAL", "30")),
+        )
+    return _pool
+
+
+async def shutdown_browser_pool():
+    """Fecha o pool global, se existir."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
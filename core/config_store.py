@@ -0,0 +1,163 @@
+"""
+Arquivos de configuração/estado em memória (docs/links.txt, data/bot_state.json,
+data/bot_config.json, data/blacklist.txt).
+
+- Leitura: o conteúdo parseado fica em memória; cada acesso faz só um
+  `os.stat` e relê o arquivo quando mtime/tamanho mudam (edição manual).
+- Escrita (JSON): `update()` altera a memória na hora e agenda UM save
+  (debounce de CONFIG_SAVE_DEBOUNCE s); várias alterações seguidas viram
+  uma escrita. O arquivo é gravado em temp + os.replace (nunca fica pela
+  metade). `flush_config_files()` no shutdown grava o que estiver pendente.
+
+Instâncias compartilhadas por caminho: `json_file(path)` / `lines_file(path)`.
+"""
+import asyncio
+import json
+import os
+from typing import Callable, Dict, Optional
+
+from config.logger import logger
+
+CONFIG_SAVE_DEBOUNCE = float(os.getenv("CONFIG_SAVE_DEBOUNCE", "1.0"))  # Segundos
+
+
+def _signature(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_lines(path: str) -> list:
+    """Linhas não vazias e sem comentário ('#') do arquivo ([] se não existir)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+class LinesFile:
+    """Arquivo de linhas (links, blacklist) parseado só quando muda."""
+
+    def __init__(self, path: str, parse: Callable[[list], object] = list):
+        self.path = path
+        self.parse = parse
+        self._signature = None
+        self._value = parse([])
+        self.loads = 0
+
+    def get(self):
+        signature = _signature(self.path)
+        if signature != self._signature:
+            self._value = self.parse(read_lines(self.path))
+            self._signature = signature
+            self.loads += 1
+        return self._value
+
+
+class JsonFile:
+    """Dict JSON em memória com recarga por mtime e escrita atômica com debounce."""
+
+    def __init__(self, path: str, debounce: float = None):
+        self.path = path
+        self.debounce = CONFIG_SAVE_DEBOUNCE if debounce is None else debounce
+        self._data: dict = {}
+        self._signature = None
+        self._dirty = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.loads = 0
+        self.writes = 0
+
+    def get(self) -> dict:
+        """Cópia rasa do estado atual (alterações via `update`)."""
+        return dict(self._current())
+
+    def _current(self) -> dict:
+        if self._dirty:
+            return self._data  # Alterações pendentes valem mais que o disco
+        signature = _signature(self.path)
+        if signature != self._signature:
+            self._data = self._read()
+            self._signature = signature
+            self.loads += 1
+        return self._data
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            logger.error(f"⚠️ Erro ao ler {self.path}: {e}")
+            return {}
+
+    def update(self, **changes) -> dict:
+        """Aplica as alterações em memória e agenda o save. Retorna o novo estado."""
+        data = self._current()
+        data.update(changes)
+        self._dirty = True
+        self._schedule_save()
+        return dict(data)
+
+    def _schedule_save(self):
+        if self._timer is not None:
+            return  # Já tem um save agendado: esta alteração vai junto
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # Fora do event loop (scripts/testes): grava na hora
+            return
+        if self.debounce <= 0:
+            self.flush()
+            return
+        self._timer = loop.call_later(self.debounce, self.flush)
+
+    def flush(self):
+        """Grava o estado pendente (temp + rename)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._dirty:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._signature = _signature(self.path)  # A própria escrita não força releitura
+            self._dirty = False
+            self.writes += 1
+        except Exception as e:
+            logger.error(f"⚠️ Erro ao salvar {self.path}: {e}")
+
+
+_json_files: Dict[str, JsonFile] = {}
+_lines_files: Dict[tuple, LinesFile] = {}
+
+
+def json_file(path: str) -> JsonFile:
+    """JsonFile compartilhado do processo para `path`."""
+    key = os.path.abspath(path)
+    if key not in _json_files:
+        _json_files[key] = JsonFile(path)
+    return _json_files[key]
+
+
+def lines_file(path: str, parse: Callable[[list], object] = list) -> LinesFile:
+    """LinesFile compartilhado do processo para (`path`, `parse`)."""
+    key = (os.path.abspath(path), parse)
+    if key not in _lines_files:
+        _lines_files[key] = LinesFile(path, parse)
+    return _lines_files[key]
+
+
+def flush_config_files():
+    """Grava os saves pendentes (shutdown)."""
+    for store in _json_files.values():
+        store.flush()
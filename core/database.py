@@ -1,16 +1,114 @@
 import sqlite3
+import statistics
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Dict, List, Tuple
 from models.deal import Deal
 
 class Database:
-    def __init__(self, db_path="data/deals.db"):
+    """
+    Store de deals enviados (SQLite).
+
+    Por padrão mantém UMA conexão de longa duração (WAL + synchronous=NORMAL),
+    protegida por lock para uso entre threads. Com `persistent=False` volta ao
+    modo antigo: uma conexão nova por chamada.
+
+    Uso:
+        with Database() as db:
+            db.is_deal_sent("MLB-123", 99.9)
+    """
+
+    # Limite conservador de parâmetros por statement (SQLITE_MAX_VARIABLE_NUMBER antigo = 999)
+    MAX_IN_PARAMS = 900
+
+    # SQL fixo: o sqlite3 reaproveita o statement compilado do cache da conexão
+    SQL_SELECT_PRICE = "SELECT price FROM sent_deals WHERE product_id = ?"
+    SQL_UPSERT_DEAL = "INSERT OR REPLACE INTO sent_deals (product_id, url, title, price, store, timestamp) VALUES (?, ?, ?, ?, ?, ?)"
+    SQL_SELECT_PRICES_IN = "SELECT product_id, price FROM sent_deals WHERE product_id IN ({placeholders})"
+    SQL_COUNT = "SELECT COUNT(*) FROM sent_deals"
+    SQL_DELETE_OLD = "DELETE FROM sent_deals WHERE timestamp < datetime('now', ?)"
+
+    # Histórico de preços (append-only): preço em centavos, observed_at em epoch (s)
+    SQL_INSERT_PRICE = "INSERT OR REPLACE INTO price_history (product_id, observed_at, price_cents) VALUES (?, ?, ?)"
+    SQL_SELECT_HISTORY = "SELECT price_cents FROM price_history WHERE product_id = ? AND observed_at >= ? ORDER BY observed_at"
+    SQL_SELECT_HISTORY_MIN = "SELECT MIN(price_cents) FROM price_history WHERE product_id = ? AND observed_at >= ?"
+    SQL_SELECT_HISTORY_MIN_IN = "SELECT product_id, MIN(price_cents) FROM price_history WHERE observed_at >= ? AND product_id IN ({placeholders}) GROUP BY product_id"
+    SQL_PRUNE_HISTORY = "DELETE FROM price_history WHERE observed_at < ?"
+
+    # Outbox: publicações pendentes (sobrevive a restart entre o envio e o registro no DB)
+    OUTBOX_QUEUED = "queued"
+    OUTBOX_SENT = "sent"
+    OUTBOX_FAILED = "failed"
+    OUTBOX_AWAITING_APPROVAL = "awaiting_approval"
+    SQL_OUTBOX_INSERT = "INSERT OR IGNORE INTO outbox (product_id, kind, to_admin, deal_json, status, created_at, updated_at) VALUES (?, ?, ?, ?, 'queued', ?, ?)"
+    SQL_OUTBOX_SELECT_OPEN = "SELECT id, status FROM outbox WHERE product_id = ? AND kind = ? AND status IN ('queued', 'awaiting_approval')"
+    SQL_OUTBOX_REFRESH = "UPDATE outbox SET deal_json = ?, updated_at = ? WHERE id = ? AND status = 'awaiting_approval'"
+    SQL_OUTBOX_UPDATE = "UPDATE outbox SET status = ?, error = ?, updated_at = ? WHERE id = ?"
+    SQL_OUTBOX_SELECT = "SELECT id, kind, to_admin, deal_json, status, error FROM outbox"
+    SQL_OUTBOX_PRUNE = "DELETE FROM outbox WHERE status IN ('sent', 'failed') AND updated_at < ?"
+
+    # Links de afiliado já gerados: (product_id, tag) -> short_url (NULL = API recusou)
+    SQL_LINK_UPSERT = "INSERT OR REPLACE INTO affiliate_links (product_id, tag, short_url, created_at) VALUES (?, ?, ?, ?)"
+    SQL_LINK_SELECT_IN = "SELECT product_id, short_url, created_at FROM affiliate_links WHERE tag = ? AND product_id IN ({placeholders})"
+    SQL_LINK_PRUNE = "DELETE FROM affiliate_links WHERE created_at < ? OR (short_url IS NULL AND created_at < ?)"
+
+    # Janela usada no check de redução de preço e retenção do histórico
+    HISTORY_WINDOW_DAYS = 30
+    HISTORY_RETENTION_DAYS = 90
+
+    def __init__(self, db_path="data/deals.db", persistent: bool = True):
         self.db_path = db_path
+        self.persistent = persistent
+        self._conn = None
+        self._lock = threading.RLock()
         self._create_table()
 
+    # --- Ciclo de vida ---
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=128)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Entrega a conexão (persistente ou efêmera) dentro de uma transação."""
+        if not self.persistent:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+            return
+
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open()
+            with self._conn:
+                yield self._conn
+
+    def close(self):
+        """Fecha a conexão persistente (reabre sob demanda se usada de novo)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Schema ---
+
     def _create_table(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+        with self._connection() as conn:
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS sent_deals (
                     product_id TEXT PRIMARY KEY,
                     url TEXT,
@@ -20,67 +118,325 @@ class Database:
                     timestamp DATETIME
                 )
             """)
-            conn.commit()
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sent_deals_timestamp ON sent_deals (timestamp)")
+
+            # PK (product_id, observed_at) + WITHOUT ROWID: a própria PK é o índice
+            # coberto de "preços do produto X nos últimos N dias".
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_history (
+                    product_id TEXT NOT NULL,
+                    observed_at INTEGER NOT NULL,
+                    price_cents INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, observed_at)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_price_history_observed_at ON price_history (observed_at)")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_id TEXT,
+                    kind TEXT NOT NULL,
+                    to_admin INTEGER NOT NULL,
+                    deal_json TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created_at INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status)")
+            # Um item aberto por (produto, tipo): reenfileirar o mesmo deal é idempotente
+            conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_open ON outbox (product_id, kind)
+                WHERE status IN ('queued', 'awaiting_approval')
+            """)
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS affiliate_links (
+                    product_id TEXT NOT NULL,
+                    tag TEXT NOT NULL,
+                    short_url TEXT,
+                    created_at INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, tag)
+                ) WITHOUT ROWID
+            """)
+
+            # Migração: semeia o histórico com o último preço de cada deal já enviado
+            if conn.execute("SELECT 1 FROM price_history LIMIT 1").fetchone() is None:
+                conn.execute("""
+                    INSERT OR IGNORE INTO price_history (product_id, observed_at, price_cents)
+                    SELECT product_id,
+                           COALESCE(CAST(strftime('%s', timestamp, 'utc') AS INTEGER), 0),
+                           CAST(ROUND(price * 100) AS INTEGER)
+                    FROM sent_deals
+                    WHERE product_id IS NOT NULL AND price IS NOT NULL
+                """)
+
+    # --- Helpers ---
+
+    @staticmethod
+    def _to_cents(price: float) -> int:
+        return int(round(price * 100))
+
+    def _window_start(self, days: int = None) -> int:
+        return int(time.time()) - (days or self.HISTORY_WINDOW_DAYS) * 86400
+
+    @staticmethod
+    def _price_dropped(current_price: float, last_price: float, history_min_cents: int = None) -> bool:
+        """Queda real = abaixo do menor preço da janela (ou do último enviado, sem histórico)."""
+        if not current_price:
+            return False
+        if history_min_cents is not None:
+            return Database._to_cents(current_price) < history_min_cents
+        return current_price < last_price
+
+    # --- Consultas ---
 
     def get_last_price(self, product_id: str) -> float:
         """Retorna o último preço registrado para um produto."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT price FROM sent_deals WHERE product_id = ?", (product_id,))
-            result = cursor.fetchone()
+        with self._connection() as conn:
+            result = conn.execute(self.SQL_SELECT_PRICE, (product_id,)).fetchone()
             return result[0] if result else None
 
     def is_deal_sent(self, product_id: str, current_price: float = None) -> dict:
         """
         Verifica se o deal foi enviado e retorna informações sobre preço.
-        
+
         Returns:
             dict: {
                 'sent': bool,           # Se já foi enviado
                 'last_price': float,    # Último preço registrado (ou None)
-                'price_dropped': bool   # Se o preço atual é menor que o anterior
+                'price_dropped': bool   # Se o preço atual é menor que o mínimo do histórico
             }
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT price FROM sent_deals WHERE product_id = ?", (product_id,))
-            result = cursor.fetchone()
+        with self._connection() as conn:
+            result = conn.execute(self.SQL_SELECT_PRICE, (product_id,)).fetchone()
 
             if result is None:
-                return {
-                    'sent': False,
-                    'last_price': None,
-                    'price_dropped': False
-                }
-
-            last_price = result[0]
-            price_dropped = current_price < last_price if current_price else False
-
-            return {
-                'sent': True,
-                'last_price': last_price,
-                'price_dropped': price_dropped
-            }
+                return self.status_from_reference(current_price, None)
+
+            history_min = conn.execute(self.SQL_SELECT_HISTORY_MIN, (product_id, self._window_start())).fetchone()[0]
+            return self.status_from_reference(current_price, (result[0], history_min))
+
+    @staticmethod
+    def first_prices(deals: List[Deal]) -> Dict[str, float]:
+        """{product_id: preço} na ordem do scraping (vale a 1ª ocorrência; ignora sem id)."""
+        current_prices = {}
+        for deal in deals:
+            if deal.product_id and deal.product_id not in current_prices:
+                current_prices[deal.product_id] = deal.price
+        return current_prices
+
+    @classmethod
+    def status_from_reference(cls, current_price: float, reference) -> dict:
+        """Monta o dict de `is_deal_sent` a partir de (last_price, history_min_cents) ou None."""
+        if reference is None:
+            return {'sent': False, 'last_price': None, 'price_dropped': False}
+        last_price, history_min = reference
+        return {
+            'sent': True,
+            'last_price': last_price,
+            'price_dropped': cls._price_dropped(current_price, last_price, history_min)
+        }
+
+    def lookup_price_references(self, product_ids: List[str]) -> Dict[str, tuple]:
+        """
+        Para os ids já enviados: {product_id: (last_price, history_min_cents)}.
+        Ids ausentes do resultado nunca foram enviados.
+        """
+        ids = list(product_ids)
+        last_prices = {}
+        history_mins = {}
+        window_start = self._window_start()
+        with self._connection() as conn:
+            for start in range(0, len(ids), self.MAX_IN_PARAMS):
+                chunk = ids[start:start + self.MAX_IN_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                last_prices.update(conn.execute(self.SQL_SELECT_PRICES_IN.format(placeholders=placeholders), chunk).fetchall())
+                history_mins.update(conn.execute(self.SQL_SELECT_HISTORY_MIN_IN.format(placeholders=placeholders), [window_start, *chunk]).fetchall())
+        return {pid: (price, history_mins.get(pid)) for pid, price in last_prices.items()}
+
+    def check_deals_bulk(self, deals: List[Deal]) -> Dict[str, dict]:
+        """
+        Versão em lote de `is_deal_sent` para um resultado de scraping inteiro.
+
+        Resolve todos os product_ids com `WHERE product_id IN (...)` (1 query por
+        até MAX_IN_PARAMS ids). Deals sem product_id são ignorados; se o mesmo id
+        aparecer mais de uma vez, vale o preço da primeira ocorrência.
+
+        Returns:
+            dict: {product_id: {'sent', 'last_price', 'price_dropped'}}
+        """
+        current_prices = self.first_prices(deals)
+        references = self.lookup_price_references(list(current_prices))
+        return {
+            pid: self.status_from_reference(price, references.get(pid))
+            for pid, price in current_prices.items()
+        }
+
+    def get_dedup_snapshot(self, recent_limit: int = 5000):
+        """
+        Dados para aquecer o cache de dedup no startup.
+
+        Returns:
+            (todos os product_ids enviados, {product_id: (last_price, history_min_cents)} dos mais recentes)
+        """
+        with self._connection() as conn:
+            all_ids = [row[0] for row in conn.execute("SELECT product_id FROM sent_deals")]
+            recent = [row[0] for row in conn.execute(
+                "SELECT product_id FROM sent_deals ORDER BY timestamp DESC LIMIT ?", (recent_limit,)
+            )]
+        return all_ids, self.lookup_price_references(recent)
 
     def add_sent_deal(self, deal: Deal):
-        """Adiciona ou atualiza um deal no banco."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT OR REPLACE INTO sent_deals (product_id, url, title, price, store, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-                (deal.product_id, deal.url, deal.title, deal.price, deal.store, datetime.now())
+        """Adiciona ou atualiza um deal no banco (e registra o preço no histórico)."""
+        self.add_sent_deals([deal])
+
+    def add_sent_deals(self, deals: List[Deal], outbox_updates: List[tuple] = ()):
+        """
+        Grava vários deals em UMA transação (group commit).
+
+        `outbox_updates` [(id, status, error)] entram na mesma transação: o
+        item da outbox só vira 'sent' junto com o registro em sent_deals.
+        """
+        now = datetime.now()
+        observed_at = int(time.time())
+        with self._connection() as conn:
+            conn.executemany(
+                self.SQL_UPSERT_DEAL,
+                [(d.product_id, d.url, d.title, d.price, d.store, now) for d in deals]
+            )
+            conn.executemany(
+                self.SQL_INSERT_PRICE,
+                [(d.product_id, observed_at, self._to_cents(d.price)) for d in deals if d.product_id]
+            )
+            conn.executemany(
+                self.SQL_OUTBOX_UPDATE,
+                [(status, error, observed_at, entry_id) for entry_id, status, error in outbox_updates]
+            )
+
+    def record_observations(self, deals: List[Deal]):
+        """Registra no histórico os preços vistos no scraping (enviados ou não)."""
+        observed_at = int(time.time())
+        with self._connection() as conn:
+            conn.executemany(
+                self.SQL_INSERT_PRICE,
+                [(d.product_id, observed_at, self._to_cents(d.price)) for d in deals if d.product_id]
             )
-            conn.commit()
+
+    def get_price_stats(self, product_id: str, days: int = None) -> dict:
+        """
+        Estatísticas de preço do produto nos últimos `days` dias.
+
+        Returns:
+            dict: {'min', 'last', 'median', 'count'} em reais (None se sem histórico)
+        """
+        with self._connection() as conn:
+            rows = conn.execute(self.SQL_SELECT_HISTORY, (product_id, self._window_start(days))).fetchall()
+
+        if not rows:
+            return {'min': None, 'last': None, 'median': None, 'count': 0}
+
+        cents = [r[0] for r in rows]
+        return {
+            'min': min(cents) / 100,
+            'last': cents[-1] / 100,
+            'median': statistics.median(cents) / 100,
+            'count': len(cents)
+        }
+
+    def prune_price_history(self, days: int = None):
+        """Remove observações mais antigas que a retenção (usa o índice em observed_at)."""
+        with self._connection() as conn:
+            conn.execute(self.SQL_PRUNE_HISTORY, (self._window_start(days or self.HISTORY_RETENTION_DAYS),))
+
+    # --- Outbox ---
+
+    def outbox_add(self, deal: Deal, kind: str, to_admin: bool) -> Tuple[int, str]:
+        """
+        Enfileira (status 'queued') e retorna (id, status).
+
+        Se o produto já tem item aberto do mesmo tipo, retorna o existente
+        (status 'queued' ou 'awaiting_approval'). Item aguardando o admin
+        recebe o Deal novo (preço do último scrape): é ele que a aprovação
+        publica. Item 'queued' já está em envio e fica como foi enviado.
+        """
+        now = int(time.time())
+        deal_json = deal.model_dump_json()
+        with self._connection() as conn:
+            cursor = conn.execute(self.SQL_OUTBOX_INSERT, (deal.product_id, kind, int(to_admin), deal_json, now, now))
+            if cursor.rowcount:
+                return cursor.lastrowid, self.OUTBOX_QUEUED
+            entry_id, status = conn.execute(self.SQL_OUTBOX_SELECT_OPEN, (deal.product_id, kind)).fetchone()
+            conn.execute(self.SQL_OUTBOX_REFRESH, (deal_json, now, entry_id))
+            return entry_id, status
+
+    def outbox_update(self, updates: List[tuple]):
+        """Atualiza status em lote: [(id, status, error)]."""
+        self.add_sent_deals([], updates)
+
+    @staticmethod
+    def _outbox_entry(row) -> dict:
+        entry_id, kind, to_admin, deal_json, status, error = row
+        return {
+            'id': entry_id, 'kind': kind, 'to_admin': bool(to_admin),
+            'deal': Deal.model_validate_json(deal_json), 'status': status, 'error': error,
+        }
+
+    def outbox_entries(self, statuses: List[str]) -> List[dict]:
+        """Itens da outbox nos `statuses` dados, em ordem de chegada."""
+        placeholders = ",".join("?" * len(statuses))
+        with self._connection() as conn:
+            rows = conn.execute(f"{self.SQL_OUTBOX_SELECT} WHERE status IN ({placeholders}) ORDER BY id", list(statuses)).fetchall()
+        return [self._outbox_entry(row) for row in rows]
+
+    def outbox_get(self, entry_id: int) -> dict:
+        with self._connection() as conn:
+            row = conn.execute(f"{self.SQL_OUTBOX_SELECT} WHERE id = ?", (entry_id,)).fetchone()
+        return self._outbox_entry(row) if row else None
+
+    def prune_outbox(self, days: int = 7):
+        """Remove itens finalizados (sent/failed) mais antigos que `days`."""
+        with self._connection() as conn:
+            conn.execute(self.SQL_OUTBOX_PRUNE, (int(time.time()) - days * 86400,))
+
+    # --- Links de afiliado ---
+
+    def get_affiliate_links(self, product_ids: List[str], tag: str, ttl: int, negative_ttl: int) -> Dict[str, str]:
+        """
+        Links ainda válidos: {product_id: short_url}, com None para recusas da
+        API dentro de `negative_ttl`. Ids ausentes = gerar de novo.
+        """
+        ids = list(dict.fromkeys(product_ids))
+        now = int(time.time())
+        found = {}
+        with self._connection() as conn:
+            for start in range(0, len(ids), self.MAX_IN_PARAMS):
+                chunk = ids[start:start + self.MAX_IN_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                for pid, short_url, created_at in conn.execute(self.SQL_LINK_SELECT_IN.format(placeholders=placeholders), [tag, *chunk]):
+                    if now - created_at < (ttl if short_url else negative_ttl):
+                        found[pid] = short_url
+        return found
+
+    def save_affiliate_links(self, links: Dict[str, str], tag: str):
+        """Grava {product_id: short_url ou None (recusado)}."""
+        now = int(time.time())
+        with self._connection() as conn:
+            conn.executemany(self.SQL_LINK_UPSERT, [(pid, tag, url, now) for pid, url in links.items()])
+
+    def prune_affiliate_links(self, ttl: int, negative_ttl: int):
+        """Remove links expirados (e recusas além do TTL negativo)."""
+        now = int(time.time())
+        with self._connection() as conn:
+            conn.execute(self.SQL_LINK_PRUNE, (now - ttl, now - negative_ttl))
 
     def get_total_count(self) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM sent_deals")
-            return cursor.fetchone()[0]
+        with self._connection() as conn:
+            return conn.execute(self.SQL_COUNT).fetchone()[0]
 
     def clean_old_deals(self, days=7):
         """Optional: remove deals older than X days to keep DB small"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM sent_deals WHERE timestamp < datetime('now', ?)", (f'-{days} days',))
-            conn.commit()
+        with self._connection() as conn:
+            conn.execute(self.SQL_DELETE_OLD, (f'-{days} days',))
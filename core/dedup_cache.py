@@ -0,0 +1,118 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+# Sentinela: "não está no cache" (None é um valor válido = nunca enviado)
+MISS = object()
+
+
+class BloomFilter:
+    """Bloom filter simples sobre bytearray (double hashing com blake2b)."""
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class DedupCache:
+    """
+    Cache de processo na frente do check de "já enviado".
+
+    - Bloom filter com todos os ids enviados: negativo = nunca enviado (sem SQLite).
+    - LRU limitado de product_id -> (last_price, history_min_cents) ou None, com TTL
+      para a janela do histórico não ficar congelada.
+
+    Antes do `warm()` o Bloom está vazio e um negativo não prova nada: o que
+    não estiver no LRU vai ao banco (MISS).
+
+    Só é usado a partir do event loop (sem locks).
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: int = 6 * 3600, bloom_capacity: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bloom = BloomFilter(bloom_capacity)
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self.warmed = False
+
+        self.hits = 0
+        self.bloom_negatives = 0
+        self.misses = 0
+
+    # --- Consulta ---
+
+    def lookup(self, product_id: str):
+        """Retorna a referência (ou None = nunca enviado) ou MISS se precisa ir ao banco."""
+        if self.warmed and product_id not in self.bloom:
+            self.bloom_negatives += 1
+            return None
+
+        entry = self._lru.get(product_id)
+        if entry is not None:
+            reference, stored_at = entry
+            if time.monotonic() - stored_at < self.ttl_seconds:
+                self._lru.move_to_end(product_id)
+                self.hits += 1
+                return reference
+            del self._lru[product_id]
+
+        self.misses += 1
+        return MISS
+
+    # --- Atualização ---
+
+    def store(self, product_id: str, reference: Optional[tuple]):
+        self._lru[product_id] = (reference, time.monotonic())
+        self._lru.move_to_end(product_id)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def mark_sent(self, product_id: str):
+        """Chamado por add_sent_deal: entra no Bloom e invalida a entrada do LRU."""
+        self.bloom.add(product_id)
+        self._lru.pop(product_id, None)
+
+    def observe_price(self, product_id: str, price_cents: int):
+        """Nova observação no histórico: só pode baixar o mínimo da janela."""
+        entry = self._lru.get(product_id)
+        if entry is None or entry[0] is None:
+            return
+        (last_price, history_min), stored_at = entry
+        if history_min is None or price_cents < history_min:
+            self._lru[product_id] = ((last_price, price_cents), stored_at)
+
+    def warm(self, sent_ids: Iterable[str], references: dict):
+        for product_id in sent_ids:
+            self.bloom.add(product_id)
+        for product_id, reference in references.items():
+            self.store(product_id, reference)
+        self.warmed = True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.bloom_negatives + self.misses
+        return {
+            'hits': self.hits,
+            'bloom_negatives': self.bloom_negatives,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.bloom_negatives) / lookups if lookups else 0.0,
+            'entries': len(self._lru),
+        }
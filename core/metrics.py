@@ -0,0 +1,198 @@
+"""
+Tempo por estágio de cada ciclo do bot (spans).
+
+- `span("nome")`: context manager (com `with` ou `async with`) que mede o
+  trecho e soma no ciclo em andamento.
+- `timed("nome")`: o mesmo como decorator (funções sync ou async).
+- `start_cycle()` / `end_cycle(**contagens)`: abre/fecha o ciclo; no fim, uma
+  linha JSON vai para METRICS_FILE com duração, contagens e, por estágio,
+  chamadas, tempo total e a chamada mais lenta.
+- `summary()`: p50/p95 do tempo total de cada estágio por ciclo nos últimos
+  METRICS_WINDOW ciclos (histórico relido do JSONL após restart) — é o que
+  o /status mostra.
+
+Os estágios rodam em paralelo no pipeline, então a soma deles passa da
+duração do ciclo. Spans fora de um ciclo (ex.: aprovações do admin entre
+ciclos) são ignorados.
+"""
+import functools
+import inspect
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from config.logger import logger
+
+METRICS_FILE = os.getenv("METRICS_FILE", "data/metrics.jsonl")
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "24"))  # Ciclos no resumo do /status
+
+CYCLE = "cycle"  # Duração do ciclo inteiro no resumo
+
+
+def _percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+def _decorator(make_span: Callable[[], "Span"]):
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                async with make_span():
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with make_span():
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Span:
+    """Cronômetro de um trecho; soma em `metrics` ao sair (mesmo com exceção)."""
+
+    __slots__ = ("metrics", "name", "seconds", "_start")
+
+    def __init__(self, metrics: "CycleMetrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.seconds = 0.0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = self.metrics.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = self.metrics.clock() - self._start
+        self.metrics.record(self.name, self.seconds)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class CycleMetrics:
+    """Coletor dos spans do ciclo atual + histórico dos últimos ciclos."""
+
+    def __init__(self, path: str = None, window: int = None, clock: Callable[[], float] = time.perf_counter):
+        self.path = path or METRICS_FILE
+        self.window = window or METRICS_WINDOW
+        self.clock = clock
+        self._stages: Optional[Dict[str, list]] = None  # nome -> [chamadas, total, máx]
+        self._cycle_start = 0.0
+        self._history: Optional[deque] = None  # Carregado do JSONL sob demanda
+
+    def span(self, name: str) -> Span:
+        return Span(self, name)
+
+    def timed(self, name: str):
+        """Decorator: mede cada chamada da função como um span `name`."""
+        return _decorator(lambda: self.span(name))
+
+    def record(self, name: str, seconds: float):
+        if self._stages is None:
+            return
+        stage = self._stages.setdefault(name, [0, 0.0, 0.0])
+        stage[0] += 1
+        stage[1] += seconds
+        stage[2] = max(stage[2], seconds)
+
+    def start_cycle(self):
+        self._stages = {}
+        self._cycle_start = self.clock()
+
+    def end_cycle(self, **counts) -> Optional[dict]:
+        """Fecha o ciclo, grava a linha no JSONL e devolve o registro."""
+        if self._stages is None:
+            return None
+        record = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": round(self.clock() - self._cycle_start, 4),
+            "counts": counts,
+            "stages": {
+                name: {"calls": calls, "total_s": round(total, 4), "max_s": round(slowest, 4)}
+                for name, (calls, total, slowest) in self._stages.items()
+            },
+        }
+        self._stages = None
+        self.history().append(record)
+        self._append(record)
+        return record
+
+    def _append(self, record: dict):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"⚠️ Erro ao gravar métricas em {self.path}: {e}")
+
+    def history(self) -> deque:
+        """Últimos `window` ciclos (lidos do JSONL na primeira chamada)."""
+        if self._history is None:
+            self._history = deque(maxlen=self.window)
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                self._history.append(json.loads(line))
+                except Exception as e:
+                    logger.error(f"⚠️ Erro ao ler métricas de {self.path}: {e}")
+        return self._history
+
+    def summary(self, last_n: int = None) -> dict:
+        """
+        p50/p95 por estágio nos últimos `last_n` ciclos.
+
+        Returns:
+            {"cycles": n, "stages": {nome: {"p50_s", "p95_s", "calls"}}}, com
+            o ciclo inteiro em CYCLE; estágios do mais lento (p50) ao mais rápido.
+        """
+        cycles = list(self.history())[-(last_n or self.window):]
+        totals: Dict[str, list] = {CYCLE: [c.get("duration_s", 0.0) for c in cycles]}
+        calls: Dict[str, int] = {CYCLE: len(cycles)}
+        for cycle in cycles:
+            for name, stage in cycle.get("stages", {}).items():
+                totals.setdefault(name, []).append(stage["total_s"])
+                calls[name] = calls.get(name, 0) + stage["calls"]
+
+        stages = {
+            name: {"p50_s": _percentile(values, 0.50), "p95_s": _percentile(values, 0.95), "calls": calls[name]}
+            for name, values in totals.items()
+        }
+        ordered = dict(sorted(stages.items(), key=lambda item: (item[0] != CYCLE, -item[1]["p50_s"])))
+        return {"cycles": len(cycles), "stages": ordered if cycles else {}}
+
+
+_metrics = None
+
+
+def get_metrics() -> CycleMetrics:
+    """Coletor global do processo (scrapers, pipeline, copywriter e notifier)."""
+    global _metrics
+    if _metrics is None:
+        _metrics = CycleMetrics()
+    return _metrics
+
+
+def span(name: str) -> Span:
+    """`with span("scrape.scroll"): ...` (ou `async with`) no coletor global."""
+    return get_metrics().span(name)
+
+
+def timed(name: str):
+    """Decorator de span no coletor global (resolvido a cada chamada)."""
+    return _decorator(lambda: span(name))
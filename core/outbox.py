@@ -0,0 +1,187 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from config.logger import logger
+from core.database import Database
+from models.deal import Deal
+
+QUEUED = Database.OUTBOX_QUEUED
+SENT = Database.OUTBOX_SENT
+FAILED = Database.OUTBOX_FAILED
+AWAITING_APPROVAL = Database.OUTBOX_AWAITING_APPROVAL
+
+APPROVAL_CACHE_SIZE = int(os.getenv("APPROVAL_CACHE_SIZE", "500"))  # Aprovações pendentes em memória
+
+_B36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def encode_approval_id(entry_id: int) -> str:
+    """Id da outbox em base36 (callback_data do Telegram tem limite de 64 bytes)."""
+    digits = ""
+    while True:
+        entry_id, rem = divmod(entry_id, 36)
+        digits = _B36[rem] + digits
+        if not entry_id:
+            return digits
+
+
+def decode_approval_id(token: str) -> Optional[int]:
+    try:
+        return int(token, 36)
+    except (TypeError, ValueError):
+        return None
+
+
+class Outbox:
+    """
+    Outbox durável (tabela `outbox` do deals.db) entre a seleção do ciclo e o Telegram.
+
+    Cada publicação é gravada como 'queued' ANTES de ir para o
+    TelegramPublisher. Depois do envio:
+    - post no canal: 'sent' (na mesma transação do registro em sent_deals);
+    - para o admin (aprovação/modo manual): 'awaiting_approval' até o clique;
+    - erro definitivo ou rejeição: 'failed'.
+
+    Se o processo morrer no meio, `replay()` no startup reenfileira o que
+    ficou 'queued' (entrega pelo menos uma vez). Reenfileirar o mesmo item
+    (replay duplo ou o mesmo deal raspado de novo) não duplica o envio.
+
+    Aprovações: os botões do admin levam o id do item (base36). Os itens
+    'awaiting_approval' ficam num LRU em memória (APPROVAL_CACHE_SIZE) e a
+    tabela é o spill: depois de um restart ou de sair do LRU, `claim` busca
+    no SQLite. O Deal volta inteiro (product_id, imagem, link de afiliado).
+    A mesma queda vista de novo antes do clique não reenvia a mensagem, só
+    atualiza o Deal guardado (SQLite e LRU juntos).
+    """
+
+    def __init__(self, db, publisher, cache_size: int = None):
+        self.db = db
+        self.publisher = publisher
+        self.cache_size = cache_size or APPROVAL_CACHE_SIZE
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._awaiting: "OrderedDict[int, dict]" = OrderedDict()
+        self._claimed: Set[int] = set()
+
+    async def submit(self, deal: Deal, kind: str = "post", to_admin: bool = False) -> asyncio.Task:
+        """
+        Grava e enfileira a publicação.
+
+        Returns:
+            Task que resolve com o status final do envio (SENT, AWAITING_APPROVAL ou FAILED).
+            Item já aguardando o admin (mesma queda de preço vista de novo no
+            ciclo seguinte) não é reenviado: a task já sai resolvida.
+        """
+        entry_id, status = await self.db.outbox_add(deal, kind, to_admin)
+        if status == AWAITING_APPROVAL:
+            # O SQLite já guardou o Deal novo; o LRU acompanha (mesmo dado antes e depois de restart)
+            entry = self._awaiting.get(entry_id)
+            if entry is not None:
+                entry['deal'] = deal
+            return self._settled_task(status)
+        return self._dispatch(entry_id, deal, kind, to_admin)
+
+    @staticmethod
+    def _settled_task(status: str) -> asyncio.Task:
+        async def settled():
+            return status
+        return asyncio.create_task(settled())
+
+    async def replay(self) -> List[asyncio.Task]:
+        """Reenfileira os itens 'queued' (restart no meio do envio). Idempotente."""
+        entries = await self.db.outbox_entries([QUEUED])
+        tasks = [self._dispatch(e['id'], e['deal'], e['kind'], e['to_admin']) for e in entries]
+        if entries:
+            logger.info(f"📮 Outbox: reenfileirando {len(entries)} publicações pendentes")
+        return tasks
+
+    async def claim(self, entry_id: int) -> Optional[dict]:
+        """
+        Reserva um item 'awaiting_approval' para o clique do admin.
+
+        Returns:
+            O item (com o Deal original) ou None se não existir, já foi
+            resolvido ou outro clique está processando (duplo clique).
+        """
+        if entry_id in self._claimed:
+            return None
+        entry = self._awaiting.pop(entry_id, None)
+        if entry is None:
+            entry = await self.db.outbox_get(entry_id)
+            if entry is None or entry['status'] != AWAITING_APPROVAL or entry_id in self._claimed:
+                return None
+        self._claimed.add(entry_id)
+        return entry
+
+    def release(self, entry: dict):
+        """Devolve um item reservado (a publicação falhou; o admin pode clicar de novo)."""
+        self._claimed.discard(entry['id'])
+        self._remember(entry)
+
+    async def resolve(self, entry_id: int, approved: bool, entry: dict = None) -> Optional[dict]:
+        """
+        Fecha um item 'awaiting_approval' (reservado via `claim` ou reservando agora).
+
+        Returns:
+            O item ou None se não havia nada pendente.
+        """
+        entry = entry or await self.claim(entry_id)
+        if entry is None:
+            return None
+        try:
+            if approved and entry['kind'] == "approval":
+                # Queda de preço só entra no DB depois da aprovação
+                await self.db.add_sent_deal(entry['deal'], outbox_id=entry_id)
+            elif approved:
+                await self.db.set_outbox_status(entry_id, SENT)
+            else:
+                await self.db.set_outbox_status(entry_id, FAILED, "rejected")
+        except Exception:
+            self.release(entry)
+            raise
+        self._claimed.discard(entry_id)
+        return entry
+
+    def _remember(self, entry: dict):
+        self._awaiting[entry['id']] = entry
+        self._awaiting.move_to_end(entry['id'])
+        while len(self._awaiting) > self.cache_size:
+            self._awaiting.popitem(last=False)  # Continua no SQLite
+
+    def _dispatch(self, entry_id: int, deal: Deal, kind: str, to_admin: bool) -> asyncio.Task:
+        task = self._inflight.get(entry_id)
+        if task is None:
+            approval_id = encode_approval_id(entry_id) if to_admin else None
+            sent = self.publisher.enqueue(deal, to_admin=to_admin, approval_id=approval_id)
+            task = asyncio.create_task(self._confirm(entry_id, deal, kind, to_admin, sent))
+            self._inflight[entry_id] = task
+            task.add_done_callback(lambda done: self._settled(entry_id, done))
+        return task
+
+    def _settled(self, entry_id: int, task: asyncio.Task):
+        # Tasks do replay ninguém aguarda: erro (ex.: DB) vira log em vez de sumir
+        self._inflight.pop(entry_id, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(f"❌ Outbox: falha ao confirmar o item #{entry_id} (segue 'queued' para o próximo replay): {error!r}")
+
+    async def _confirm(self, entry_id: int, deal: Deal, kind: str, to_admin: bool, sent: asyncio.Future) -> str:
+        try:
+            await sent
+        except Exception as e:
+            await self.db.set_outbox_status(entry_id, FAILED, str(e)[:500])
+            return FAILED
+
+        if kind == "approval":
+            status = AWAITING_APPROVAL
+            await self.db.set_outbox_status(entry_id, status)
+        else:
+            status = AWAITING_APPROVAL if to_admin else SENT
+            # Modo manual: já conta como enviado (não volta no próximo ciclo), mas aguarda o clique
+            await self.db.add_sent_deal(deal, outbox_id=entry_id, outbox_status=status)
+        if status == AWAITING_APPROVAL:
+            self._remember({'id': entry_id, 'kind': kind, 'to_admin': to_admin, 'deal': deal, 'status': status, 'error': None})
+        return status
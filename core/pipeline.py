@@ -0,0 +1,269 @@
+import asyncio
+import os
+import random
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from config.logger import logger
+from core.metrics import span
+from core.outbox import FAILED
+from utils.blacklist import Blacklist
+
+# Ciclo em streaming: scraper -> filtro (blacklist/DB) -> links de afiliado -> publicação
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))       # Back-pressure entre estágios
+PIPELINE_SHUFFLE_WINDOW = int(os.getenv("PIPELINE_SHUFFLE_WINDOW", "24"))  # Deals embaralhados por lote
+PIPELINE_FILTER_BATCH = 32      # Máx. de deals por consulta ao DB
+
+_DONE = object()  # Fim de uma fonte / de um estágio
+
+
+@dataclass
+class PipelineSource:
+    """Uma URL do ciclo e quantos deals novos ela deve render."""
+    name: str
+    url: str
+    max_results: int
+    quota: int
+    engine: Optional[str] = None
+    price_drop_fills_quota: bool = False  # Marca Fixa: uma queda de preço já basta
+
+
+class DealPipeline:
+    """
+    Ciclo do bot em estágios concorrentes ligados por filas limitadas.
+
+    - Produtores (1 por fonte): consomem `scraper.iter_category_url` e
+      embaralham em janelas de PIPELINE_SHUFFLE_WINDOW deals.
+    - Filtro: blacklist, product_id, duplicados no ciclo e status no DB
+      (em lotes do que já estiver na fila). Cota da fonte cheia = produtor
+      cancelado, sem raspar o resto da listagem.
+    - Links: gera os links de afiliado em lote com o que estiver pronto e
+      dispara a pré-geração das legendas do canal (copywriter.prefetch).
+    - Publicação: grava na Outbox (core/outbox) e enfileira no
+      TelegramPublisher a partir do primeiro deal qualificado; o ciclo termina
+      quando os envios confirmam.
+
+    Filas cheias seguram o estágio anterior (back-pressure).
+    """
+
+    def __init__(
+        self,
+        scraper,
+        db,
+        ml_api,
+        outbox,
+        blacklist=None,
+        is_autonomous: Callable[[], bool] = lambda: True,
+        queue_size: int = None,
+        shuffle_window: int = None,
+        source_timeout: float = None,
+        concurrency: int = None,
+        copywriter=None,
+    ):
+        self.scraper = scraper
+        self.db = db
+        self.ml_api = ml_api
+        self.outbox = outbox
+        # Lista de termos ou utils.blacklist.Blacklist já compilada (compartilhada)
+        self.blacklist = blacklist if isinstance(blacklist, Blacklist) else Blacklist(blacklist or ())
+        self.is_autonomous = is_autonomous
+        self.queue_size = queue_size or PIPELINE_QUEUE_SIZE
+        self.shuffle_window = shuffle_window or PIPELINE_SHUFFLE_WINDOW
+        self.source_timeout = source_timeout
+        self.concurrency = concurrency
+        self.copywriter = copywriter
+
+    async def run(self, sources: List[PipelineSource]) -> dict:
+        """
+        Executa um ciclo completo.
+
+        Returns:
+            Estatísticas: posted, price_drops, seen, filled (nome -> cota
+            atingida) e first_post_s (segundos até o 1º envio, ou None).
+        """
+        self._start = time.perf_counter()
+        self._stats = {
+            "posted": 0, "price_drops": 0, "seen": 0,
+            "filled": {s.name: False for s in sources}, "first_post_s": None,
+        }
+        raw = asyncio.Queue(self.queue_size)
+        selected = asyncio.Queue(self.queue_size)
+        ready = asyncio.Queue(self.queue_size)
+
+        semaphore = asyncio.Semaphore(self.concurrency or len(sources) or 1)
+        producers = {
+            source.name: asyncio.create_task(self._produce(source, raw, semaphore))
+            for source in sources
+        }
+        stages = [
+            asyncio.create_task(self._filter(sources, producers, raw, selected)),
+            asyncio.create_task(self._link(selected, ready)),
+            asyncio.create_task(self._publish(ready)),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            pending = [t for t in (*producers.values(), *stages) if not t.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return self._stats
+
+    # --- Estágios ---
+
+    async def _produce(self, source: PipelineSource, raw: asyncio.Queue, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                await asyncio.wait_for(self._feed(source, raw), timeout=self.source_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ Timeout ({self.source_timeout}s) raspando {source.url}. Seguindo com o que chegou.")
+            except Exception as e:
+                logger.error(f"❌ Erro raspando {source.url}: {e}")
+        await raw.put((source.name, _DONE))
+
+    async def _feed(self, source: PipelineSource, raw: asyncio.Queue):
+        kwargs = {"engine": source.engine} if source.engine else {}
+        window = []
+        async with aclosing(self.scraper.iter_category_url(source.url, max_results=source.max_results, **kwargs)) as deals:
+            async for deal in deals:
+                window.append(deal)
+                if len(window) >= self.shuffle_window:
+                    await self._flush_window(source, window, raw)
+        await self._flush_window(source, window, raw)
+
+    @staticmethod
+    async def _flush_window(source: PipelineSource, window: list, raw: asyncio.Queue):
+        # Variedade: sem a lista inteira em mãos, embaralha por janela
+        random.shuffle(window)
+        for deal in window:
+            await raw.put((source.name, deal))
+        window.clear()
+
+    async def _filter(self, sources, producers: Dict[str, asyncio.Task], raw: asyncio.Queue, selected: asyncio.Queue):
+        by_name = {s.name: s for s in sources}
+        found = {s.name: 0 for s in sources}
+        active = set(by_name)  # Fontes que ainda podem mandar deals
+        closed = set()         # Fontes com a cota cheia
+        seen_ids = set()
+
+        def close_source(name):
+            closed.add(name)
+            active.discard(name)
+            producers[name].cancel()  # Para de raspar (página/scroll seguinte nem acontece)
+
+        try:
+            while active:
+                batch = [await raw.get()]
+                while len(batch) < PIPELINE_FILTER_BATCH and not raw.empty():
+                    batch.append(raw.get_nowait())
+
+                candidates = []
+                for name, deal in batch:
+                    if deal is _DONE:
+                        active.discard(name)  # Sentinela vem depois dos deals da fonte
+                        continue
+                    if name in closed:
+                        continue  # Cota já cheia: sobras na fila são descartadas
+                    self._stats["seen"] += 1
+                    if self.blacklist.blocks(deal.title):
+                        continue
+                    if not deal.product_id:
+                        logger.warning(f"⚠️ Deal sem product_id: {deal.title[:30]}")
+                        continue
+                    if deal.product_id in seen_ids:
+                        continue
+                    seen_ids.add(deal.product_id)
+                    candidates.append((name, deal))
+
+                if not candidates:
+                    continue
+
+                deals = [deal for _, deal in candidates]
+                async with span("dedup"):
+                    status = await self.db.check_deals_bulk(deals)
+                # Histórico de preços: registra após o check, para não mascarar quedas
+                await self.db.record_observations(deals)
+
+                for name, deal in candidates:
+                    if name in closed:
+                        continue
+                    source = by_name[name]
+                    deal_status = status[deal.product_id]
+                    if not deal_status['sent']:
+                        await selected.put(("post", deal))
+                    elif deal_status['price_dropped']:
+                        logger.info(f"💰 Redução de preço ({source.name}): {deal.title[:40]} - R$ {deal_status['last_price']:.2f} → R$ {deal.price:.2f}")
+                        await selected.put(("approval", deal))
+                        if not source.price_drop_fills_quota:
+                            continue
+                    else:
+                        continue
+
+                    found[name] += 1
+                    if found[name] >= source.quota:
+                        self._stats["filled"][name] = True
+                        logger.info(f"✅ Cota de '{name}' atingida ({source.quota}). Parando a raspagem desta fonte.")
+                        close_source(name)
+        finally:
+            await selected.put(_DONE)
+
+    async def _link(self, selected: asyncio.Queue, ready: asyncio.Queue):
+        try:
+            while True:
+                batch = [await selected.get()]
+                while not selected.empty():
+                    batch.append(selected.get_nowait())
+                done = _DONE in batch
+                batch = [item for item in batch if item is not _DONE]
+
+                if batch:
+                    async with span("affiliate.links"):
+                        links = await self.ml_api.create_links([deal.url for _, deal in batch])
+                    for i, (kind, deal) in enumerate(batch):
+                        if i < len(links) and links[i]:
+                            deal.affiliate_url = links[i]  # NÃO sobrescreve deal.url (check do DB no futuro)
+                    if self.copywriter and self.is_autonomous():
+                        # Legendas do canal geradas em paralelo com os envios anteriores
+                        self.copywriter.prefetch([deal for kind, deal in batch if kind == "post"])
+                    for kind, deal in batch:
+                        await ready.put((kind, deal))
+                if done:
+                    break
+        finally:
+            await ready.put(_DONE)
+
+    async def _publish(self, ready: asyncio.Queue):
+        # Grava na outbox e enfileira no publisher (pacing por token bucket lá); confirma em paralelo
+        confirmations = []
+        try:
+            while True:
+                item = await ready.get()
+                if item is _DONE:
+                    break
+                kind, deal = item
+                if kind == "approval":
+                    # SEMPRE para o admin; só entra no DB após a aprovação
+                    logger.info(f"💰 Enviando para aprovação: {deal.title[:40]} - R$ {deal.price:.2f}")
+                    to_admin = True
+                else:
+                    to_admin = not self.is_autonomous()
+                    if not to_admin:
+                        logger.info(f"📤 Posting: {deal.title[:40]}")
+                sent = await self.outbox.submit(deal, kind, to_admin=to_admin)
+                confirmations.append(asyncio.create_task(self._confirm(kind, sent)))
+            await asyncio.gather(*confirmations)
+        finally:
+            for task in confirmations:
+                task.cancel()
+
+    async def _confirm(self, kind: str, sent: asyncio.Task):
+        if await sent == FAILED:
+            return
+        if kind == "approval":
+            self._stats["price_drops"] += 1
+        else:
+            self._stats["posted"] += 1
+        if self._stats["first_post_s"] is None:
+            self._stats["first_post_s"] = time.perf_counter() - self._start
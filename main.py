@@ -1,7 +1,6 @@
 import asyncio
 import os
 import random
-import json
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
@@ -11,13 +10,21 @@ from telegram.ext import ContextTypes, Application
 from telegram.constants import ParseMode
 
 from scrapers.mercadolivre_search import MercadoLivreSearchScraper
-from scrapers.mercadolivre_api import MercadoLivreAPI 
+from scrapers.mercadolivre_api import get_affiliate_api, close_affiliate_api
 
 from services.notifier import TelegramNotifier
-from core.database import Database
+from services.copywriter import get_copywriter
+from core.async_database import get_database, shutdown_database
 from config.logger import logger
 from core.autonomous_mode import AutonomousMode
+from core.browser_pool import shutdown_browser_pool
+from core.config_store import json_file, lines_file, read_lines, flush_config_files
+from core.metrics import get_metrics
+from core.outbox import Outbox
+from core.pipeline import DealPipeline, PipelineSource
+from scrapers.mercadolivre_http import close_http_session
 from utils.category_dedup import deduplicate_by_category
+from utils.blacklist import get_blacklist
 
 load_dotenv()
 
@@ -25,9 +32,14 @@ load_dotenv()
 ADMIN_USER_ID = os.getenv("ADMIN_USER_ID")
 REPORT_FREQUENCY = 24   # 1 relatório por dia (ciclos de 1h)
 MANUAL_LINKS_FILE = "data/manual_links.txt"
-BLACKLIST_FILE = "data/blacklist.txt"
 STATE_FILE = "data/bot_state.json"
 
+# Scraping concorrente (Fase 1 + Fase 2 em paralelo)
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "2"))       # Fontes simultâneas
+SCRAPE_SOURCE_TIMEOUT = int(os.getenv("SCRAPE_SOURCE_TIMEOUT", "180"))  # Segundos por fonte
+SCRAPE_ENGINE = os.getenv("SCRAPE_ENGINE", "browser")  # Engine padrão: "browser" ou "http"
+SCRAPE_ENGINES = ("browser", "http")
+
 # Filters (Simplificado: apenas evitar spam massivo de 1 coisa só)
 CATEGORY_LIMITS = {
     "outros": 10 # Limite alto, deixamos o fluxo controlar
@@ -53,31 +65,49 @@ VOLUME_CATEGORY_URLS = [
 
 # --- Funções Utilitárias ---
 
-def load_file_lines(filepath):
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
-    return []
+def parse_link_line(line, default_engine=None):
+    """
+    Interpreta uma linha do docs/links.txt: "URL [@http|@browser] [- descrição]".
+
+    Returns:
+        (url, engine) ou (None, None) se a linha não tiver URL.
+    """
+    tokens = line.split()
+    if not tokens or not tokens[0].startswith("http"):
+        return None, None
+    engine = default_engine or SCRAPE_ENGINE
+    for token in tokens[1:]:
+        if token.startswith("@") and token[1:].lower() in SCRAPE_ENGINES:
+            engine = token[1:].lower()
+    return tokens[0], engine
 
 def clear_manual_links():
     with open(MANUAL_LINKS_FILE, "w", encoding="utf-8") as f:
         f.write("# Adicione links aqui (serão limpos após o processamento)\n")
 
-def load_state():
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"⚠️ Erro ao ler estado: {e}")
-    return {}
-
-def save_state(data):
-    try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f)
-    except Exception as e:
-        logger.error(f"⚠️ Erro ao salvar estado: {e}")
+def parse_links(lines):
+    """
+    Separa as linhas do docs/links.txt em "Geral" vs "Marca Fixa".
+
+    Returns:
+        (general_urls, fixed_brand_url, url_engines)
+    """
+    general_urls = []
+    fixed_brand_url = None
+    url_engines = {}  # url -> "browser" | "http" (token @http/@browser na linha)
+
+    for line in lines:
+        # Limpa a linha (remove comentários tipo "- Crocs")
+        clean_url, engine = parse_link_line(line)
+        if not clean_url: continue
+        url_engines[clean_url] = engine
+
+        # Identifica Marca Fixa (Crocs)
+        if "crocs" in line.lower() or "MLB1433521" in clean_url:
+            fixed_brand_url = clean_url
+        else:
+            general_urls.append(clean_url)
+    return general_urls, fixed_brand_url, url_engines
 
 SCAN_EVENT = asyncio.Event()
 
@@ -94,14 +124,33 @@ async def handle_scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def handle_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_admin(update): return
-    db = Database()
+    db = get_database()
+    total_deals = await db.get_total_count()
+    cache = db.cache.stats()
     auto_mode = AutonomousMode().get_status()
     report = (
         "🤖 <b>Bot Online (Hourly Edition)</b>\n\n"
         f"📊 <b>Modo:</b> {auto_mode['mode']}\n"
         f"⏱️ <b>Ciclo:</b> 1 Hora\n"
-        f"📉 <b>Total Deals:</b> {db.get_total_count()}\n"
+        f"📉 <b>Total Deals:</b> {total_deals}\n"
+        f"🧠 <b>Cache Dedup:</b> {cache['hit_rate']:.0%} "
+        f"({cache['hits']} hits | {cache['bloom_negatives']} bloom | {cache['misses']} misses)\n"
+    )
+    links = get_affiliate_api().stats()
+    copy = get_copywriter().stats()
+    report += (
+        f"🔗 <b>Cache Links:</b> {links['hit_rate']:.0%} "
+        f"({links['hits']} hits | {links['negative_hits']} recusas | {links['misses']} misses | {links['api_calls']} chamadas)\n"
+        f"✍️ <b>Copywriter:</b> {copy['calls']} chamadas ({copy['batch_calls']} em lote, {copy['errors']} erros, "
+        f"{copy['deadline_misses']} fora do prazo) | "
+        f"p50 {copy['p50_s']:.1f}s p95 {copy['p95_s']:.1f}s | cache {copy['cache']['hit_rate']:.0%}\n"
     )
+    timings = get_metrics().summary()
+    if timings["cycles"]:
+        # Tempo total de cada estágio por ciclo (estágios rodam em paralelo)
+        report += f"\n⏱️ <b>Estágios</b> (últimos {timings['cycles']} ciclos, p50 / p95):\n"
+        for name, stage in timings["stages"].items():
+            report += f"• {name}: {stage['p50_s']:.1f}s / {stage['p95_s']:.1f}s ({stage['calls']}x)\n"
     await update.message.reply_text(report, parse_mode=ParseMode.HTML)
 
 async def handle_direct_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -133,10 +182,9 @@ async def handle_daily_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("⚠️ O link deve começar com http.")
             return
 
-        state = load_state()
-        state["daily_link"] = url
-        state["daily_link_date"] = datetime.now().strftime('%Y-%m-%d')
-        save_state(state)
+        state = json_file(STATE_FILE).update(
+            daily_link=url, daily_link_date=datetime.now().strftime('%Y-%m-%d')
+        )
 
         await update.message.reply_text(f"🌟 <b>Daily Deal Definido!</b>\n\nLink: {url}\nValidade: Hoje ({state['daily_link_date']})", parse_mode=ParseMode.HTML)
         
@@ -151,13 +199,21 @@ async def run_bot():
 
     # Inicialização
     notifier = TelegramNotifier()
-    db = Database()
+    db = get_database()
+    await db.warm_cache()
     
     # Scrapers & API
     ml_search = MercadoLivreSearchScraper()
-    ml_api = MercadoLivreAPI()
+    ml_api = get_affiliate_api()  # Links de afiliado com cache no deals.db
     
-    auto_mode = AutonomousMode()
+    auto_mode = AutonomousMode()  # Mesmo estado do /auto (core.config_store)
+    metrics = get_metrics()  # Tempo por estágio de cada ciclo (data/metrics.jsonl)
+    bot_state = json_file(STATE_FILE)
+
+    # Outbox: publicações pendentes sobrevivem a restart (replay no startup)
+    outbox = Outbox(db, notifier.publisher)
+    notifier.outbox = outbox
+    await outbox.replay()
 
     # Telegram Handlers
     telegram_handlers = {
@@ -183,27 +239,16 @@ async def run_bot():
         try:
             cycle_count += 1
             logger.info(f"--- Ciclo #{cycle_count} [Hora: {datetime.now().strftime('%H:%M')}] ---")
+            metrics.start_cycle()
+            await outbox.replay()  # Drena o que ficou 'queued' (itens em voo são ignorados)
 
-            # 1. Carrega Links Frescos e Separa "Geral" vs "Marca Fixa"
-            raw_lines = load_file_lines(LINKS_FILE)
-            general_urls = []
-            fixed_brand_url = None
-            
-            for line in raw_lines:
-                # Limpa a linha (remove comentários tipo "- Crocs")
-                clean_url = line.split(" ")[0].strip()
-                if not clean_url.startswith("http"): continue
-                
-                # Identifica Marca Fixa (Crocs)
-                if "crocs" in line.lower() or "MLB1433521" in clean_url:
-                    fixed_brand_url = clean_url
-                else:
-                    general_urls.append(clean_url)
+            # 1. Links (reparseados só se docs/links.txt mudou) e Separa "Geral" vs "Marca Fixa"
+            general_urls, fixed_brand_url, url_engines = lines_file(LINKS_FILE, parse_links).get()
 
             # --- SETUP DAILY LINK (Prioridade Máxima) ---
-            state_daily = load_state() # Recarrega estado para pegar updates recentes
-            daily_link = state_daily.get("daily_link")
-            daily_date = state_daily.get("daily_link_date")
+            state = bot_state.get()  # Em memória; relê só se o arquivo mudou
+            daily_link = state.get("daily_link")
+            daily_date = state.get("daily_link_date")
             today_str = datetime.now().strftime('%Y-%m-%d')
 
             if daily_link and daily_date == today_str:
@@ -220,7 +265,6 @@ async def run_bot():
 
             # 2. Estratégia Híbrida (7 + 1)
             # Evitar repetição da última categoria
-            state = load_state()
             last_url = state.get("last_general_url")
             
             available_urls = general_urls.copy()
@@ -230,9 +274,8 @@ async def run_bot():
 
             target_general = random.choice(available_urls)
             
-            # Salvar novo estado
-            state["last_general_url"] = target_general
-            save_state(state)
+            # Salvar novo estado (escrita atômica com debounce)
+            bot_state.update(last_general_url=target_general)
 
             logger.info(f"🎲 Link Geral Sorteado: {target_general}")
             
@@ -240,134 +283,57 @@ async def run_bot():
                 logger.info(f"🐊 Link Marca Fixa: {fixed_brand_url}")
             
             # Carrega Blacklist
-            blacklist = [w.lower() for w in load_file_lines(BLACKLIST_FILE)]
-            scraped_deals = []
+            blacklist = get_blacklist()  # Recompila só se data/blacklist.txt mudou
             
-            # --- FASE 1: BUSCA GERAL (7 Itens) ---
-            # Busca 100 itens para garantir variedade
-            raw_general = await ml_search.scrape_category_url(target_general, max_results=100)
-            random.shuffle(raw_general)
-            
-            count_general = 0
-            price_drop_deals = []  # Produtos com redução de preço
-            
-            for d in raw_general:
-                # Blacklist Check
-                if any(b in d.title.lower() for b in blacklist): continue
-                
-                # Verificar se produto tem ID válido
-                if not d.product_id:
-                    logger.warning(f"⚠️ Deal sem product_id: {d.title[:30]}")
-                    continue
-                
-                # DB Check com comparação de preço
-                deal_status = db.is_deal_sent(d.product_id, d.price)
-                
-                if not deal_status['sent']:
-                    # Produto novo - adiciona normalmente
-                    scraped_deals.append(d)
-                    count_general += 1
-                    if count_general >= 7: break
-                elif deal_status['price_dropped']:
-                    # Produto já enviado mas com preço menor - separa para aprovação
-                    logger.info(f"💰 Redução de preço detectada: {d.title[:40]} - R$ {deal_status['last_price']:.2f} → R$ {d.price:.2f}")
-                    price_drop_deals.append(d)
-            
-            # --- FASE 2: BUSCA MARCA FIXA (1 Item) ---
+            # --- FASES 1, 2, 4 e 5 EM PIPELINE (Scraping -> Filtro -> Links -> Publicação) ---
+            # Geral: até 100 itens para garantir variedade, 7 novos | Marca Fixa: deep, mas precisamos de apenas 1
+            # A publicação começa no 1º deal qualificado e cada fonte para de raspar quando a cota enche.
+            sources = [PipelineSource("geral", target_general, 100, quota=7, engine=url_engines.get(target_general, SCRAPE_ENGINE))]
             if fixed_brand_url:
-                # Busca deep também, mas precisamos de apenas 1
-                raw_brand = await ml_search.scrape_category_url(fixed_brand_url, max_results=50)
-                random.shuffle(raw_brand)
-                
-                found_brand = False
-                for d in raw_brand:
-                    # Blacklist Check
-                    if any(b in d.title.lower() for b in blacklist): continue
-                    
-                    # Verificar se produto tem ID válido
-                    if not d.product_id:
-                        continue
-                    
-                    # DB Check com comparação de preço
-                    deal_status = db.is_deal_sent(d.product_id, d.price)
-                    
-                    if not deal_status['sent']:
-                        scraped_deals.append(d)
-                        found_brand = True
-                        break
-                    elif deal_status['price_dropped']:
-                        logger.info(f"💰 Redução de preço (Marca Fixa): {d.title[:40]} - R$ {deal_status['last_price']:.2f} → R$ {d.price:.2f}")
-                        price_drop_deals.append(d)
-                        found_brand = True
-                        break
-                
-                if not found_brand:
-                    logger.warning("⚠️ Nenhum item novo da Marca Fixa encontrado neste ciclo.")
-            
-            final_selection = scraped_deals
+                sources.append(PipelineSource(
+                    "marca_fixa", fixed_brand_url, 50, quota=1,
+                    engine=url_engines.get(fixed_brand_url, SCRAPE_ENGINE), price_drop_fills_quota=True
+                ))
+            pipeline = DealPipeline(
+                ml_search, db, ml_api, outbox, blacklist=blacklist,
+                is_autonomous=lambda: auto_mode.is_autonomous,
+                source_timeout=SCRAPE_SOURCE_TIMEOUT, concurrency=SCRAPE_CONCURRENCY,
+                copywriter=notifier.copywriter,
+            )
+            stats = await pipeline.run(sources)
+
+            if fixed_brand_url and not stats["filled"]["marca_fixa"]:
+                logger.warning("⚠️ Nenhum item novo da Marca Fixa encontrado neste ciclo.")
             
             # Links Manuais (Extra bonus)
-            manual_links = load_file_lines(MANUAL_LINKS_FILE)
+            manual_links = read_lines(MANUAL_LINKS_FILE)
             if manual_links:
                 logger.info(f"🔗 Processando {len(manual_links)} links manuais...")
                 clear_manual_links()
                 # (Lógica manual simplificada - apenas limpa arquivo por enquanto)
 
-            logger.info(f"🚀 Total para Envio: {len(final_selection)}")
-            if price_drop_deals:
-                logger.info(f"💰 Total com Redução de Preço (para aprovação): {len(price_drop_deals)}")
+            first_post = f"{stats['first_post_s']:.1f}s" if stats["first_post_s"] is not None else "-"
+            logger.info(f"🚀 Total Enviado: {stats['posted']} (de {stats['seen']} vistos) | 1º envio em {first_post}")
+            if stats["price_drops"]:
+                logger.info(f"💰 Total com Redução de Preço (para aprovação): {stats['price_drops']}")
+
+            cycle = metrics.end_cycle(
+                cycle=cycle_count, posted=stats["posted"], price_drops=stats["price_drops"],
+                seen=stats["seen"], first_post_s=stats["first_post_s"],
+            )
+            logger.info(f"⏱️ Ciclo em {cycle['duration_s']:.1f}s | " + " | ".join(
+                f"{name} {stage['total_s']:.1f}s ({stage['calls']}x)" for name, stage in cycle["stages"].items()
+            ))
 
-            # --- FASE 4: API & PUBLICAÇÃO (Sem Score) ---
-            
-            if final_selection:
-                urls = [d.url for d in final_selection]
-                affiliate_links = await ml_api.create_links(urls)
-                
-                for i, deal in enumerate(final_selection):
-                    # Atualizar Link
-                    if i < len(affiliate_links) and affiliate_links[i]:
-                        deal.affiliate_url = affiliate_links[i] # Guarda no campo correto
-                        # NÃO subscreve deal.url, para garantir o check do DB no futuro!
-                    
-                    # Postar (Modo Autônomo Default)
-                    mode = auto_mode.is_autonomous
-                    
-                    if mode:
-                        logger.info(f"📤 Posting: {deal.title[:40]}")
-                        await notifier.send_deal(deal, to_admin=False)
-                        db.add_sent_deal(deal)
-                    else:
-                        await notifier.send_deal(deal, to_admin=True)
-                        db.add_sent_deal(deal)
-                    
-                    await asyncio.sleep(10) # Delay para não flooding Telegram
-
-            # --- FASE 5: PROCESSAR REDUÇÕES DE PREÇO (Enviar para Admin) ---
-            
-            if price_drop_deals:
-                logger.info(f"💰 Processando {len(price_drop_deals)} deals com redução de preço...")
-                
-                # Criar links de afiliado para os price drops
-                price_drop_urls = [d.url for d in price_drop_deals]
-                price_drop_affiliate_links = await ml_api.create_links(price_drop_urls)
-                
-                for i, deal in enumerate(price_drop_deals):
-                    # Atualizar Link de Afiliado
-                    if i < len(price_drop_affiliate_links) and price_drop_affiliate_links[i]:
-                        deal.affiliate_url = price_drop_affiliate_links[i]
-                    
-                    # SEMPRE enviar para admin (aprovação necessária)
-                    logger.info(f"💰 Enviando para aprovação: {deal.title[:40]} - R$ {deal.price:.2f}")
-                    await notifier.send_deal(deal, to_admin=True)
-                    # NÃO adiciona ao DB ainda - só após aprovação do admin
-                    
-                    await asyncio.sleep(10)
             # --- FASE 6: DORMIR 1 HORA ---
 
             
             # Relatório Periódico
             if cycle_count % REPORT_FREQUENCY == 0:
-                await notifier.send_status_report({"cycles": cycle_count, "db_size": db.get_total_count()})
+                await db.prune_price_history() # Retenção diária do histórico de preços
+                await db.prune_outbox()
+                await ml_api.prune_cache()
+                await notifier.send_status_report({"cycles": cycle_count, "db_size": await db.get_total_count()})
 
             wait_time = 3600 # 1 Hora
             logger.info(f"💤 Dormindo por {wait_time/60} minutos... (Próximo ciclo: {(datetime.now().timestamp() + wait_time)})")
@@ -384,8 +350,19 @@ async def run_bot():
             logger.error(f"❌ Erro no loop: {e}", exc_info=True)
             await asyncio.sleep(60)
 
+async def main():
+    try:
+        await run_bot()
+    finally:
+        # Shutdown gracioso do Chromium compartilhado e do banco
+        flush_config_files()  # Saves pendentes (debounce) de estado/config
+        await shutdown_browser_pool()
+        await close_http_session()
+        await close_affiliate_api()
+        await shutdown_database()
+
 if __name__ == "__main__":
     try:
-        asyncio.run(run_bot())
+        asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot parado pelo usuário.")
@@ -12,6 +12,8 @@ class Deal(BaseModel):
     affiliate_url: Optional[str] = None
     store: str
     image_url: Optional[str] = None
+    seller: Optional[str] = None        # Vendedor/loja exibido no card (quando disponível)
+    installments: Optional[str] = None  # Ex: "10x R$ 89,99 sem juros"
     timestamp: datetime = datetime.now() # Reminder: This sets time at module load, acceptable for now or fix if critical
     score: float = 0.0
     strategy: Optional[str] = None
@@ -0,0 +1,194 @@
+"""
+Extração de ofertas a partir do estado JSON embutido nas páginas do ML.
+
+Listagens e /ofertas trazem o resultado já renderizado no servidor como JSON
+(`__PRELOADED_STATE__` / `_n.ctx.r=` do Nordic). Decodificar esse JSON uma
+vez por página é mais rápido e mais estável que reconstruir título/preço/URL
+a partir de classes CSS; o DOM fica como fallback quando o estado não existe.
+
+Cada item é um "polycard": {"metadata": {...}, "pictures": {...},
+"components": [{"type": "title" | "price" | "seller" | "installments", ...}]}.
+"""
+import json
+import re
+from typing import Iterator, List, Optional, Tuple
+
+from models.deal import Deal
+from scrapers.listing_cards import DISCOUNT_RE, product_id_from_url
+
+# Onde o estado começa: o JSON vem logo após o marcador
+STATE_MARKERS = (
+    re.compile(r'<script[^>]+id=["\']__PRELOADED_STATE__["\'][^>]*>'),
+    re.compile(r'window\.__PRELOADED_STATE__\s*=\s*'),
+    re.compile(r'_n\.ctx\.r\s*=\s*'),
+)
+PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+IMAGE_URL = "https://http2.mlstatic.com/D_NQ_NP_{id}-O.webp"
+
+_decoder = json.JSONDecoder()
+
+
+def locate_state(html: str) -> Optional[Tuple[dict, int, int]]:
+    """Localiza e decodifica o primeiro estado JSON embutido: (estado, início, fim) ou None."""
+    for marker in STATE_MARKERS:
+        for match in marker.finditer(html):
+            start = html.find("{", match.end())
+            if start == -1 or html[match.end():start].strip():
+                continue
+            try:
+                state, end = _decoder.raw_decode(html, start)
+            except ValueError:
+                continue
+            if isinstance(state, dict):
+                return state, start, end
+    return None
+
+
+def find_state(html: str) -> Optional[dict]:
+    """Estado JSON embutido da página (None se não houver)."""
+    located = locate_state(html)
+    return located[0] if located else None
+
+
+def iter_polycards(state) -> Iterator[dict]:
+    """Percorre o estado (em ordem) e devolve cada polycard encontrado."""
+    stack = [state]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            card = node.get("polycard")
+            if isinstance(card, dict):
+                yield card
+                continue
+            if "metadata" in node and isinstance(node.get("components"), list):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _render(template: Optional[str], values) -> Optional[str]:
+    """Preenche placeholders '{chave}' dos textos do ML com `values` (label/preço)."""
+    if not template:
+        return None
+    by_key = {}
+    for value in values or []:
+        if not isinstance(value, dict) or "key" not in value:
+            continue
+        if "price" in value:
+            amount = value["price"].get("value")
+            by_key[value["key"]] = format_brl(amount) if amount is not None else ""
+        elif "label" in value:
+            by_key[value["key"]] = value["label"].get("text", "")
+        else:
+            by_key[value["key"]] = ""  # ícones etc.
+    text = PLACEHOLDER_RE.sub(lambda m: by_key.get(m.group(1), ""), template)
+    return " ".join(text.split()) or None
+
+
+def format_brl(value: float) -> str:
+    """89.99 -> 'R$ 89,99'."""
+    formatted = f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R$ {formatted}"
+
+
+def deal_from_polycard(card: dict) -> Optional[Deal]:
+    """Mapeia um polycard para Deal (None se faltar título, URL com ID ou preço)."""
+    metadata = card.get("metadata") or {}
+    components = {c.get("type"): c for c in card.get("components") or [] if isinstance(c, dict)}
+
+    title = ((components.get("title") or {}).get("title") or {}).get("text")
+    if not title:
+        return None
+
+    url = metadata.get("url")
+    if not url:
+        return None
+    if not url.startswith("http"):
+        url = "https://" + url.lstrip("/")
+    url = url.split("?")[0].split("#")[0]
+
+    product_id = product_id_from_url(url)
+    if not product_id:
+        return None  # Mesmo critério do DOM (links patrocinados/click1 ficam de fora)
+
+    price_info = (components.get("price") or {}).get("price") or {}
+    price = (price_info.get("current_price") or {}).get("value")
+    if price is None:
+        return None
+    price = round(float(price), 2)
+
+    original_price = (price_info.get("previous_price") or {}).get("value")
+    original_price = round(float(original_price), 2) if original_price else None
+    if original_price is not None and original_price <= price:
+        original_price = None
+
+    discount = 0
+    discount_label = price_info.get("discount_label") or {}
+    if discount_label.get("value") is not None:
+        discount = int(discount_label["value"])
+    elif discount_label.get("text"):
+        discount_match = DISCOUNT_RE.search(discount_label["text"])
+        if discount_match:
+            discount = int(discount_match.group(1))
+
+    seller_info = (components.get("seller") or {}).get("seller") or {}
+    seller = _render(seller_info.get("text"), seller_info.get("values"))
+    if seller:
+        seller = re.sub(r'(?i)^por\s+', '', seller)
+
+    installments_info = (components.get("installments") or {}).get("installments") \
+        or price_info.get("installments") or {}
+    installments = _render(installments_info.get("text"), installments_info.get("values"))
+    if installments:
+        installments = re.sub(r'(?i)^em\s+', '', installments)
+
+    pictures = (card.get("pictures") or {}).get("pictures") or []
+    image_url = IMAGE_URL.format(id=pictures[0]["id"]) if pictures and pictures[0].get("id") else None
+
+    return Deal(
+        title=title,
+        price=price,
+        original_price=original_price,
+        discount_percentage=discount,
+        url=url,
+        product_id=product_id,
+        store="Mercado Livre",
+        image_url=image_url,
+        seller=seller,
+        installments=installments,
+    )
+
+
+def extract_polycards(html: str) -> Optional[List[dict]]:
+    """Polycards do estado embutido, ou None se a página não tiver estado com itens."""
+    state = find_state(html)
+    if state is None:
+        return None
+    return list(iter_polycards(state)) or None
+
+
+def deals_from_polycards(cards: List[dict]) -> List[Deal]:
+    deals = []
+    for card in cards:
+        try:
+            deal = deal_from_polycard(card)
+        except (TypeError, ValueError, KeyError, AttributeError):
+            deal = None
+        if deal:
+            deals.append(deal)
+    return deals
+
+
+def extract_deals(html: str) -> Optional[List[Deal]]:
+    """
+    Deals do estado embutido, em lote.
+
+    Returns:
+        Lista de Deals, ou None se a página não tiver estado com polycards ou
+        se nenhum polycard virou Deal (schema mudou): caller deve cair nos
+        seletores do DOM.
+    """
+    cards = extract_polycards(html)
+    return (deals_from_polycards(cards) or None) if cards is not None else None
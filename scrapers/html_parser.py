@@ -0,0 +1,238 @@
+"""
+Parser de HTML plugável para os scrapers.
+
+`parse_html(content)` devolve um nó com a API que os scrapers já usam do
+BeautifulSoup (`select`, `select_one`, `get_text`, `get`, `[]`, `attrs`,
+`parent`), com dois backends:
+
+- "lxml": árvore C do lxml + seletores CSS compilados UMA vez para XPath
+  (cache por string). Bem mais rápido em páginas de vários MB.
+- "bs4": BeautifulSoup com 'html.parser' (puro Python). Fallback quando o
+  lxml não está instalado ou com HTML_PARSER=bs4.
+
+Os dois backends produzem os mesmos textos/atributos (verificado contra as
+fixtures em tests/fixtures).
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")  # auto | lxml | bs4
+
+# Conteúdo que o get_text do BeautifulSoup ignora
+_SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+def get_backend(name: str = None) -> str:
+    """Resolve o backend efetivo ("auto" = lxml se disponível)."""
+    name = (name or HTML_PARSER or "auto").lower()
+    if name == "bs4" or lxml is None:
+        return "bs4"
+    return "lxml"
+
+
+def parse_html(content: str, backend: str = None):
+    """Faz o parse do HTML com o backend configurado."""
+    if get_backend(backend) == "bs4":
+        return BeautifulSoup(content, 'html.parser')
+    return LxmlNode(_lxml_document(content))
+
+
+# --- Compilação de seletores CSS -> XPath ---
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?P<comb>[>+~])\s*
+  | (?P<ws>\s+)
+  | (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \.(?P<cls>-?[_a-zA-Z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*
+      (?:(?P<op>[*^$~]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[\w-]+))\s*)?
+    \]
+""", re.X)
+
+_compiled: Dict[str, "etree.XPath"] = {}
+
+
+def _literal(value: str) -> str:
+    return f'"{value}"' if "'" in value else f"'{value}'"
+
+
+def _class_predicate(cls: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+def _parse_group(selector: str) -> List[tuple]:
+    """'div.a > a.b' -> [(None, compound), ('>', compound)]; compound = (tag, [predicados])."""
+    steps = []
+    combinator = None
+    tag, preds = None, []
+    pos = 0
+    selector = selector.strip()
+
+    def flush():
+        nonlocal tag, preds
+        if tag is None and not preds:
+            raise ValueError(f"Seletor CSS inválido: {selector!r}")
+        steps.append((combinator, (tag or "*", preds)))
+        tag, preds = None, []
+
+    while pos < len(selector):
+        m = _TOKEN_RE.match(selector, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"Seletor CSS não suportado: {selector!r} (posição {pos})")
+        pos = m.end()
+        if m.group("comb") or m.group("ws"):
+            flush()
+            combinator = m.group("comb") or " "
+            if combinator in "+~":
+                raise ValueError(f"Combinador '{combinator}' não suportado: {selector!r}")
+        elif m.group("tag"):
+            tag = m.group("tag").lower()
+        elif m.group("cls"):
+            preds.append(_class_predicate(m.group("cls")))
+        elif m.group("id"):
+            preds.append(f"@id={_literal(m.group('id'))}")
+        else:
+            attr, op = m.group("attr"), m.group("op")
+            value = next((v for v in (m.group("dq"), m.group("sq"), m.group("bare")) if v is not None), None)
+            if not op:
+                preds.append(f"@{attr}")
+            elif op == "=":
+                preds.append(f"@{attr}={_literal(value)}")
+            elif op == "*=":
+                preds.append(f"contains(@{attr}, {_literal(value)})")
+            elif op == "^=":
+                preds.append(f"starts-with(@{attr}, {_literal(value)})")
+            elif op == "$=":
+                preds.append(f"substring(@{attr}, string-length(@{attr}) - {len(value) - 1}) = {_literal(value)}")
+            else:  # ~=
+                preds.append(f"contains(concat(' ', normalize-space(@{attr}), ' '), ' {value} ')")
+    flush()
+    return steps
+
+
+def css_to_xpath(selector: str) -> str:
+    """
+    Traduz o subconjunto de CSS usado pelos scrapers (tag, .classe, #id,
+    [attr], [attr=v|*=|^=|$=|~=], descendente, '>' e listas com vírgula).
+
+    Mesma semântica do soupsieve: casa descendentes do nó de contexto, mas
+    os ancestrais do seletor podem estar fora dele ("div.x a" a partir do <p>).
+    """
+    parts = []
+    for group in selector.split(","):
+        steps = _parse_group(group)
+        parts.append(f"descendant::{_step_xpath(steps, len(steps) - 1)}")
+    return " | ".join(parts)
+
+
+def _step_xpath(steps: List[tuple], i: int) -> str:
+    """Passo i com os passos à esquerda como predicado: a[ancestor::div[...]]."""
+    combinator, (tag, preds) = steps[i]
+    expr = tag + "".join(f"[{p}]" for p in preds)
+    if i > 0:
+        axis = "parent" if combinator == ">" else "ancestor"
+        expr += f"[{axis}::{_step_xpath(steps, i - 1)}]"
+    return expr
+
+
+def compile_selector(selector: str) -> "etree.XPath":
+    """Compila (e guarda em cache) o XPath equivalente ao seletor CSS."""
+    compiled = _compiled.get(selector)
+    if compiled is None:
+        compiled = etree.XPath(css_to_xpath(selector))
+        _compiled[selector] = compiled
+    return compiled
+
+
+def precompile(*selectors: str):
+    """Compila seletores no import do módulo (erros de seletor aparecem cedo)."""
+    if lxml is None:
+        return
+    for selector in selectors:
+        compile_selector(selector)
+
+
+# --- Backend lxml ---
+
+def _lxml_document(content: str):
+    if not content or not content.strip():
+        content = "<html></html>"
+    try:
+        return lxml.html.document_fromstring(content)
+    except ValueError:
+        # str com declaração de encoding (<?xml ... encoding=...?>)
+        return lxml.html.document_fromstring(content.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8"))
+
+
+def _iter_strings(el):
+    if el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            yield from _iter_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+class LxmlNode:
+    """Elemento lxml com a API de Tag do BeautifulSoup usada nos scrapers."""
+
+    __slots__ = ("_el",)
+
+    def __init__(self, el):
+        self._el = el
+
+    def __bool__(self):
+        # Tag do bs4 é sempre truthy (elemento lxml sem filhos seria False)
+        return True
+
+    def __repr__(self):
+        return f"<LxmlNode {self._el.tag}>"
+
+    @property
+    def name(self) -> str:
+        return self._el.tag
+
+    def select(self, selector: str) -> List["LxmlNode"]:
+        return [LxmlNode(el) for el in compile_selector(selector)(self._el)]
+
+    def select_one(self, selector: str) -> Optional["LxmlNode"]:
+        found = compile_selector(selector)(self._el)
+        return LxmlNode(found[0]) if found else None
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        strings = _iter_strings(self._el)
+        if strip:
+            strings = (s for s in (s.strip() for s in strings) if s)
+        return separator.join(strings)
+
+    @property
+    def attrs(self) -> dict:
+        return dict(self._el.attrib)
+
+    def get(self, key: str, default=None):
+        return self._el.get(key, default)
+
+    def __getitem__(self, key: str):
+        value = self._el.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._el.attrib
+
+    @property
+    def parent(self) -> Optional["LxmlNode"]:
+        parent = self._el.getparent()
+        return LxmlNode(parent) if parent is not None else None
@@ -0,0 +1,230 @@
+"""
+Extração de cards de listagem do ML (busca, categoria e ofertas).
+
+Seletores, JS de extração em lote (`page.evaluate`) e o parser offline de
+HTML produzem o MESMO dict bruto por card; `build_deal` converte em Deal.
+Compartilhado pelo engine de browser e pelo engine HTTP.
+"""
+import json
+import re
+from typing import Optional
+
+from scrapers.html_parser import parse_html, precompile
+from config.logger import logger
+from models.deal import Deal
+
+PRODUCT_ID_RE = re.compile(r'(MLB-?\d+)')
+DISCOUNT_RE = re.compile(r'(\d+)%')
+
+
+def product_id_from_url(url: str) -> Optional[str]:
+    """Id do produto como aparece na URL (MLB-123 ou MLB123): o mesmo do Deal.product_id."""
+    match = PRODUCT_ID_RE.search(url or "")
+    return match.group(1) if match else None
+
+# Seletores dos cards (compartilhados pelo JS em lote, pelo ElementHandle e pelo parser offline)
+CARD_IMAGE_SELECTOR = "img.ui-search-result-image__element, img.poly-component__picture, img.promotion-item__img"
+CARD_TITLE_SELECTOR = "h2.ui-search-item__title, .poly-component__title, .promotion-item__title"
+CARD_LINK_SELECTORS = (
+    "a.ui-search-link, a.poly-component__title, a.promotion-item__link-container",
+    "h2.ui-search-item__title a",
+    "div.poly-card__content a",
+    "a",  # Last resort: first 'a' tag in card
+)
+CARD_PRICE_SELECTORS = (
+    ".poly-price__current .andes-money-amount__fraction",
+    "span.andes-money-amount__fraction",
+)
+CARD_ORIGINAL_PRICE_SELECTOR = ".andes-money-amount--previous, .promotion-item__oldprice"
+CARD_DISCOUNT_SELECTOR = ".poly-price__discount, .andes-money-amount__discount, .promotion-item__discount-text"
+
+CATEGORY_CARD_SELECTORS = (".poly-card", ".promotion-item", "li.ui-search-layout__item", "div.ui-search-result__wrapper")
+SEARCH_CARD_SELECTORS = ("li.ui-search-layout__item", "div.ui-search-result__wrapper", ".poly-card")
+
+precompile(
+    CARD_IMAGE_SELECTOR, CARD_TITLE_SELECTOR, CARD_ORIGINAL_PRICE_SELECTOR, CARD_DISCOUNT_SELECTOR,
+    ".andes-money-amount__fraction", ".andes-money-amount__cents", "a",
+    *CARD_LINK_SELECTORS, *CARD_PRICE_SELECTORS, *CATEGORY_CARD_SELECTORS, *SEARCH_CARD_SELECTORS,
+)
+
+# Extração em lote: 1 round trip CDP por página em vez de ~10-15 por card
+EXTRACT_CARDS_JS = """
+(selectors) => {
+    let cards = [];
+    for (const sel of selectors) {
+        cards = Array.from(document.querySelectorAll(sel));
+        if (cards.length) break;
+    }
+    const first = (card, sels) => {
+        for (const s of sels) {
+            const el = card.querySelector(s);
+            if (el) return el;
+        }
+        return null;
+    };
+    const text = (el) => el ? el.innerText : null;
+    return cards.map((card) => {
+        const img = card.querySelector(%(image)s);
+        const firstLink = card.querySelector("a");
+        const link = first(card, %(links)s);
+        const price = first(card, %(prices)s);
+        const cents = price && price.parentElement ? price.parentElement.querySelector(".andes-money-amount__cents") : null;
+        const original = card.querySelector(%(original)s);
+        return {
+            image_url: img ? (img.getAttribute("data-src") || img.getAttribute("src")) : null,
+            image_alt: img ? img.getAttribute("alt") : null,
+            title: text(card.querySelector(%(title)s)),
+            link_text: text(firstLink),
+            has_link: !!link,
+            href: link ? link.getAttribute("href") : null,
+            price: text(price),
+            cents: text(cents),
+            original_price: original ? text(original.querySelector(".andes-money-amount__fraction") || original) : null,
+            original_cents: original ? text(original.querySelector(".andes-money-amount__cents")) : null,
+            discount: text(card.querySelector(%(discount)s)),
+        };
+    });
+}
+""" % {
+    "image": json.dumps(CARD_IMAGE_SELECTOR),
+    "title": json.dumps(CARD_TITLE_SELECTOR),
+    "links": json.dumps(list(CARD_LINK_SELECTORS)),
+    "prices": json.dumps(list(CARD_PRICE_SELECTORS)),
+    "original": json.dumps(CARD_ORIGINAL_PRICE_SELECTOR),
+    "discount": json.dumps(CARD_DISCOUNT_SELECTOR),
+}
+
+
+def _text(el) -> Optional[str]:
+    """Aproxima `innerText`: texto visível com espaços colapsados."""
+    if el is None:
+        return None
+    return " ".join(el.get_text(" ").split())
+
+
+def _first(card, selectors):
+    for selector in selectors:
+        el = card.select_one(selector)
+        if el is not None:
+            return el
+    return None
+
+
+def parse_listing_cards(html: str, selectors=CATEGORY_CARD_SELECTORS) -> list[dict]:
+    """Equivalente offline de EXTRACT_CARDS_JS sobre um snapshot de HTML."""
+    soup = parse_html(html)
+    cards = []
+    for selector in selectors:
+        cards = soup.select(selector)
+        if cards:
+            break
+
+    results = []
+    for card in cards:
+        img = card.select_one(CARD_IMAGE_SELECTOR)
+        link = _first(card, CARD_LINK_SELECTORS)
+        price = _first(card, CARD_PRICE_SELECTORS)
+        cents = price.parent.select_one(".andes-money-amount__cents") if price is not None and price.parent is not None else None
+        original = card.select_one(CARD_ORIGINAL_PRICE_SELECTOR)
+        results.append({
+            "image_url": (img.get("data-src") or img.get("src")) if img is not None else None,
+            "image_alt": img.get("alt") if img is not None else None,
+            "title": _text(card.select_one(CARD_TITLE_SELECTOR)),
+            "link_text": _text(card.select_one("a")),
+            "has_link": link is not None,
+            "href": link.get("href") if link is not None else None,
+            "price": _text(price),
+            "cents": _text(cents),
+            "original_price": _text(original.select_one(".andes-money-amount__fraction") or original) if original is not None else None,
+            "original_cents": _text(original.select_one(".andes-money-amount__cents")) if original is not None else None,
+            "discount": _text(card.select_one(CARD_DISCOUNT_SELECTOR)),
+        })
+    return results
+
+
+def build_deal(data: dict) -> Optional[Deal]:
+    """Monta o Deal a partir dos dados brutos de um card (sem I/O)."""
+    image_url = data.get("image_url")
+
+    # 1. Title
+    title = data.get("title")
+
+    # Fallback: Try 'a' tag plain text if specialized class missing
+    if not title:
+        text = data.get("link_text")
+        if text and len(text) > 10: title = text
+
+    # Fallback 2: Use Image Alt
+    if not title and data.get("image_alt"):
+        title = data["image_alt"]
+
+    if not title: 
+        logger.warning("   ⚠️ Item skipped: No Title found (Text or Alt)")
+        return None
+
+    # 2. URL
+    if not data.get("has_link"): 
+        logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): No Link Element found")
+        return None
+        
+    url = data.get("href")
+    
+    # EXTRACT PRODUCT ID (MLB-XXXXXXX)
+    product_id = product_id_from_url(url)
+    if not product_id:
+        logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): No ML Product ID found in URL")
+        return None
+    
+    # CLEAN URL (Critical for DB Dedup)
+    # Remove tracking params like ?tracking_id=...
+    if url and "?" in url:
+        url = url.split("?")[0]
+    
+    # 3. Price
+    price_str = data.get("price")
+    if not price_str: 
+        logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): No Price Element found")
+        return None
+        
+    price = parse_money(price_str, data.get("cents"))
+    if price is None:
+        logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): Price parse error '{price_str}'")
+        return None
+
+    # 4. Preço original e desconto (opcionais)
+    original_price = parse_money(data.get("original_price"), data.get("original_cents"))
+    if original_price is not None and original_price <= price:
+        original_price = None
+
+    discount = 0
+    if data.get("discount"):
+        discount_match = DISCOUNT_RE.search(data["discount"])
+        if discount_match:
+            discount = int(discount_match.group(1))
+        
+    # Create Deal
+    deal = Deal(
+        title=title,
+        price=price,
+        original_price=original_price,
+        discount_percentage=discount,
+        url=url,
+        product_id=product_id,
+        store="Mercado Livre",
+        image_url=image_url
+    )
+    
+    return deal
+
+
+def parse_money(fraction: str, cents: str = None):
+    """'1.234' + '56' -> 1234.56 (formato BRL). Retorna None se inválido."""
+    if not fraction:
+        return None
+    try:
+        value = float(re.sub(r'[^\d.,]', '', fraction).replace('.', '').replace(',', '.'))
+    except ValueError:
+        return None
+    if cents and cents.strip().isdigit():
+        value += int(cents.strip()) / 100
+    return round(value, 2)
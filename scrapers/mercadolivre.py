@@ -1,9 +1,10 @@
 import asyncio
-from playwright.async_api import async_playwright
 from playwright_stealth import Stealth
-from bs4 import BeautifulSoup
+from scrapers.html_parser import parse_html
+from scrapers.embedded_state import extract_deals
 from models.deal import Deal
-from typing import List
+from core.browser_pool import get_browser_pool
+from typing import List, Optional
 import re
 
 class MercadoLivreScraper:
@@ -12,9 +13,8 @@ class MercadoLivreScraper:
 
     async def fetch_deals(self) -> List[Deal]:
         deals = []
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        async with get_browser_pool().acquire() as context:
+            page = await context.new_page()
             stealth = Stealth()
             await stealth.apply_stealth_async(page)
 
@@ -42,151 +42,166 @@ class MercadoLivreScraper:
                         continue
 
             content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
-
-            # Try different selectors for items based on ML's frequent changes
-            items = soup.select(".promotion-item") or soup.select(".poly-card") or soup.select(".poly-component")
-            print(f"Found {len(items)} items.")
-
-            for item in items:
-                try:
-                    # Title
-                    title_el = item.select_one(".promotion-item__title") or item.select_one(".poly-component__title") or item.select_one("a")
-                    title = title_el.get_text(strip=True) if title_el else "No title"
-
-                    # Price
-                    price_container = item.select_one(".andes-money-amount--current") or item.select_one(".poly-price__current")
-                    if price_container:
-                        fraction = price_container.select_one(".andes-money-amount__fraction")
-                        cents = price_container.select_one(".andes-money-amount__cents")
-
-                        if fraction:
-                            price_str = fraction.get_text(strip=True).replace(".", "")
-                            if cents:
-                                price_str += "." + cents.get_text(strip=True)
-                            price = float(price_str)
-                        else:
-                            # Fallback to old method
-                            price_text = price_container.get_text(strip=True)
-                            clean_text = re.sub(r'[^\d,]', '', price_text)
-                            if ',' in clean_text:
-                                price = float(clean_text.replace('.', '').replace(',', '.'))
-                            else:
-                                price = float(clean_text)
-                    else:
-                        continue
-
-                    # Old Price
-                    old_price = None
-                    old_price_el = item.select_one(".promotion-item__oldprice") or item.select_one(".poly-price__comparison")
-                    if old_price_el:
-                        old_price_text = old_price_el.get_text(strip=True)
-                        old_price_numbers = re.sub(r'[^\d,]', '', old_price_text).replace(',', '.')
-                        if old_price_numbers:
-                            old_price = float(old_price_numbers)
-
-                    # Discount
-                    discount_el = item.select_one(".promotion-item__discount-text") or item.select_one(".poly-price__discount") or item.select_one(".andes-money-amount__discount")
-                    discount = None
-                    if discount_el:
-                        discount_text = discount_el.get_text(strip=True)
-                        discount_match = re.search(r'(\d+)%', discount_text)
-                        if discount_match:
-                            discount = int(discount_match.group(1))
-
-                    # URL
-                    link_el = item.select_one("a.promotion-item__link-container") or item.select_one("a")
-                    if not link_el or 'href' not in link_el.attrs:
-                        continue
-                    url = link_el['href']
-                    if not url.startswith("http"):
-                        url = "https://www.mercadolivre.com.br" + url
-
-                    # Image
-                    img_el = item.select_one("img")
-                    image_url = None
-                    if img_el:
-                        image_url = img_el.get('src') or img_el.get('data-src') or img_el.get('data-lazy')
-
-                    deals.append(Deal(
-                        title=title,
-                        price=price,
-                        original_price=old_price,
-                        discount_percentage=discount,
-                        url=url,
-                        store="Mercado Livre",
-                        image_url=image_url
-                    ))
-                except Exception as e:
-                    print(f"Error parsing item: {e}")
-                    continue
+            deals = self.parse_deals(content)
 
-            await browser.close()
+            await page.close()
         return deals
 
-    async def fetch_product_details(self, url: str) -> Optional[Deal]:
-        """Fetch details for a single product URL"""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            stealth = Stealth()
-            await stealth.apply_stealth_async(page)
-            await page.set_extra_http_headers({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
-            })
+    def parse_deals(self, content: str) -> List[Deal]:
+        """Extrai os Deals do HTML da página de ofertas (sem I/O)."""
+        # Estado JSON embutido primeiro; seletores do DOM só se não houver
+        state_deals = extract_deals(content)
+        if state_deals is not None:
+            print(f"Found {len(state_deals)} items (embedded state).")
+            return state_deals
 
-            try:
-                await page.goto(url, wait_until="networkidle")
-                content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
+        deals = []
+        soup = parse_html(content)
+
+        # Try different selectors for items based on ML's frequent changes
+        items = soup.select(".promotion-item") or soup.select(".poly-card") or soup.select(".poly-component")
+        print(f"Found {len(items)} items.")
 
-                title_el = soup.select_one(".ui-pdp-title")
+        for item in items:
+            try:
+                # Title
+                title_el = item.select_one(".promotion-item__title") or item.select_one(".poly-component__title") or item.select_one("a")
                 title = title_el.get_text(strip=True) if title_el else "No title"
 
-                price_container = soup.select_one(".andes-money-amount--current")
+                # Price
+                price_container = item.select_one(".andes-money-amount--current") or item.select_one(".poly-price__current")
                 if price_container:
                     fraction = price_container.select_one(".andes-money-amount__fraction")
                     cents = price_container.select_one(".andes-money-amount__cents")
-                    price_str = fraction.get_text(strip=True).replace(".", "") if fraction else "0"
-                    if cents:
-                        price_str += "." + cents.get_text(strip=True)
-                    price = float(price_str)
+
+                    if fraction:
+                        price_str = fraction.get_text(strip=True).replace(".", "")
+                        if cents:
+                            price_str += "." + cents.get_text(strip=True)
+                        price = float(price_str)
+                    else:
+                        # Fallback to old method
+                        price_text = price_container.get_text(strip=True)
+                        clean_text = re.sub(r'[^\d,]', '', price_text)
+                        if ',' in clean_text:
+                            price = float(clean_text.replace('.', '').replace(',', '.'))
+                        else:
+                            price = float(clean_text)
                 else:
-                    await browser.close()
-                    return None
+                    continue
 
-                discount_el = soup.select_one(".andes-money-amount__discount")
+                # Old Price
+                old_price = None
+                old_price_el = item.select_one(".promotion-item__oldprice") or item.select_one(".poly-price__comparison")
+                if old_price_el:
+                    old_price_text = old_price_el.get_text(strip=True)
+                    old_price_numbers = re.sub(r'[^\d,]', '', old_price_text).replace(',', '.')
+                    if old_price_numbers:
+                        old_price = float(old_price_numbers)
+
+                # Discount
+                discount_el = item.select_one(".promotion-item__discount-text") or item.select_one(".poly-price__discount") or item.select_one(".andes-money-amount__discount")
                 discount = None
                 if discount_el:
                     discount_text = discount_el.get_text(strip=True)
                     discount_match = re.search(r'(\d+)%', discount_text)
-                    discount = int(discount_match.group(1)) if discount_match else None
+                    if discount_match:
+                        discount = int(discount_match.group(1))
+
+                # URL
+                link_el = item.select_one("a.promotion-item__link-container") or item.select_one("a")
+                if not link_el or 'href' not in link_el.attrs:
+                    continue
+                url = link_el['href']
+                if not url.startswith("http"):
+                    url = "https://www.mercadolivre.com.br" + url
 
-                img_el = soup.select_one(".ui-pdp-gallery__figure img")
-                image_url = img_el.get('src') or img_el.get('data-src') if img_el else None
+                # Image
+                img_el = item.select_one("img")
+                image_url = None
+                if img_el:
+                    image_url = img_el.get('src') or img_el.get('data-src') or img_el.get('data-lazy')
 
-                await browser.close()
-                return Deal(
+                deals.append(Deal(
                     title=title,
                     price=price,
+                    original_price=old_price,
                     discount_percentage=discount,
                     url=url,
                     store="Mercado Livre",
                     image_url=image_url
-                )
+                ))
+            except Exception as e:
+                print(f"Error parsing item: {e}")
+                continue
+
+        return deals
+
+    async def fetch_product_details(self, url: str) -> Optional[Deal]:
+        """Fetch details for a single product URL"""
+        async with get_browser_pool().acquire() as context:
+            page = await context.new_page()
+            stealth = Stealth()
+            await stealth.apply_stealth_async(page)
+            await page.set_extra_http_headers({
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+            })
+
+            try:
+                await page.goto(url, wait_until="networkidle")
+                content = await page.content()
+                deal = self.parse_product_details(content, url)
+                await page.close()
+                return deal
             except Exception as e:
                 print(f"Error fetching ML product details: {e}")
-                await browser.close()
+                await page.close()
                 return None
 
+    def parse_product_details(self, content: str, url: str) -> Optional[Deal]:
+        """Extrai o Deal do HTML de uma página de produto (sem I/O)."""
+        soup = parse_html(content)
+
+        title_el = soup.select_one(".ui-pdp-title")
+        title = title_el.get_text(strip=True) if title_el else "No title"
+
+        price_container = soup.select_one(".andes-money-amount--current")
+        if price_container:
+            fraction = price_container.select_one(".andes-money-amount__fraction")
+            cents = price_container.select_one(".andes-money-amount__cents")
+            price_str = fraction.get_text(strip=True).replace(".", "") if fraction else "0"
+            if cents:
+                price_str += "." + cents.get_text(strip=True)
+            price = float(price_str)
+        else:
+            return None
+
+        discount_el = soup.select_one(".andes-money-amount__discount")
+        discount = None
+        if discount_el:
+            discount_text = discount_el.get_text(strip=True)
+            discount_match = re.search(r'(\d+)%', discount_text)
+            discount = int(discount_match.group(1)) if discount_match else None
+
+        img_el = soup.select_one(".ui-pdp-gallery__figure img")
+        image_url = img_el.get('src') or img_el.get('data-src') if img_el else None
+
+        return Deal(
+            title=title,
+            price=price,
+            discount_percentage=discount,
+            url=url,
+            store="Mercado Livre",
+            image_url=image_url
+        )
+
     async def search_keyword(self, keyword: str) -> List[Deal]:
         """Search for a specific keyword and return deals (items with discounts)"""
         search_url = f"https://lista.mercadolivre.com.br/{keyword.replace(' ', '-')}_OrderId_PRICE_ASC"
         deals = []
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        async with get_browser_pool().acquire() as context:
+            page = await context.new_page()
             stealth = Stealth()
             await stealth.apply_stealth_async(page)
             await page.set_extra_http_headers({
@@ -200,57 +215,68 @@ class MercadoLivreScraper:
                 # Wait for items
                 await page.wait_for_selector(".ui-search-result", timeout=10000)
             except:
-                await browser.close()
+                await page.close()
                 return []
 
             content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
-            items = soup.select(".ui-search-result")
-
-            for item in items:
-                try:
-                    # Check if it has a discount - look for the discount badge
-                    discount_el = item.select_one(".ui-search-price__discount") or item.select_one(".andes-money-amount__discount")
-                    if not discount_el:
-                        continue # Only take products on sale
-
-                    title_el = item.select_one(".ui-search-item__title")
-                    title = title_el.get_text(strip=True) if title_el else "No title"
-
-                    # Price
-                    price_container = item.select_one(".andes-money-amount--current")
-                    if price_container:
-                        fraction = price_container.select_one(".andes-money-amount__fraction")
-                        cents = price_container.select_one(".andes-money-amount__cents")
-                        price_str = fraction.get_text(strip=True).replace(".", "") if fraction else "0"
-                        if cents:
-                            price_str += "." + cents.get_text(strip=True)
-                        price = float(price_str)
-                    else:
-                        continue
+            deals = self.parse_search_results(content)
 
-                    url_el = item.select_one("a.ui-search-link")
-                    url = url_el['href'] if url_el else ""
-                    if not url.startswith("http"):
-                        url = "https://www.mercadolivre.com.br" + url
+            await page.close()
+        return deals
 
-                    discount_text = discount_el.get_text(strip=True)
-                    discount_match = re.search(r'(\d+)%', discount_text)
-                    discount = int(discount_match.group(1)) if discount_match else None
-
-                    img_el = item.select_one("img.ui-search-result-image__element")
-                    image_url = img_el.get('src') or img_el.get('data-src')
-
-                    deals.append(Deal(
-                        title=title,
-                        price=price,
-                        discount_percentage=discount,
-                        url=url,
-                        store="Mercado Livre",
-                        image_url=image_url
-                    ))
-                except:
+    def parse_search_results(self, content: str) -> List[Deal]:
+        """Extrai os Deals com desconto do HTML de uma busca (sem I/O)."""
+        state_deals = extract_deals(content)
+        if state_deals is not None:
+            return [d for d in state_deals if d.discount_percentage] # Only take products on sale
+
+        deals = []
+        soup = parse_html(content)
+        items = soup.select(".ui-search-result")
+
+        for item in items:
+            try:
+                # Check if it has a discount - look for the discount badge
+                discount_el = item.select_one(".ui-search-price__discount") or item.select_one(".andes-money-amount__discount")
+                if not discount_el:
+                    continue # Only take products on sale
+
+                title_el = item.select_one(".ui-search-item__title")
+                title = title_el.get_text(strip=True) if title_el else "No title"
+
+                # Price
+                price_container = item.select_one(".andes-money-amount--current")
+                if price_container:
+                    fraction = price_container.select_one(".andes-money-amount__fraction")
+                    cents = price_container.select_one(".andes-money-amount__cents")
+                    price_str = fraction.get_text(strip=True).replace(".", "") if fraction else "0"
+                    if cents:
+                        price_str += "." + cents.get_text(strip=True)
+                    price = float(price_str)
+                else:
                     continue
 
-            await browser.close()
+                url_el = item.select_one("a.ui-search-link")
+                url = url_el['href'] if url_el else ""
+                if not url.startswith("http"):
+                    url = "https://www.mercadolivre.com.br" + url
+
+                discount_text = discount_el.get_text(strip=True)
+                discount_match = re.search(r'(\d+)%', discount_text)
+                discount = int(discount_match.group(1)) if discount_match else None
+
+                img_el = item.select_one("img.ui-search-result-image__element")
+                image_url = img_el.get('src') or img_el.get('data-src')
+
+                deals.append(Deal(
+                    title=title,
+                    price=price,
+                    discount_percentage=discount,
+                    url=url,
+                    store="Mercado Livre",
+                    image_url=image_url
+                ))
+            except:
+                continue
+
         return deals
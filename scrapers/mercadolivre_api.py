@@ -1,23 +1,96 @@
+import asyncio
 import aiohttp
 import os
-from typing import List
+import random
+import re
+from typing import List, Optional, Tuple
 from config.logger import logger
+from scrapers.listing_cards import product_id_from_url
+
+AFFILIATE_LINK_TTL_DAYS = int(os.getenv("AFFILIATE_LINK_TTL_DAYS", "30"))
+AFFILIATE_NEGATIVE_TTL_HOURS = int(os.getenv("AFFILIATE_NEGATIVE_TTL_HOURS", "24"))  # Recusas da API
+AFFILIATE_API_BATCH_SIZE = int(os.getenv("AFFILIATE_API_BATCH_SIZE", "20"))    # URLs por POST
+AFFILIATE_API_CONCURRENCY = int(os.getenv("AFFILIATE_API_CONCURRENCY", "3"))   # POSTs simultâneos
+AFFILIATE_API_RETRIES = int(os.getenv("AFFILIATE_API_RETRIES", "3"))           # Para 429/5xx/rede
+API_RETRY_BASE_DELAY = 1.0   # Segundos (dobra a cada tentativa, com jitter)
+API_RETRY_MAX_DELAY = 30.0
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# Resultado por URL da chamada à API
+LINK_OK = "ok"            # short_url gerado (cacheável)
+LINK_REFUSED = "refused"  # API recusou a URL (cache negativo)
+LINK_ERROR = "error"      # Falha de rede/HTTP (fallback, sem cache)
 
 class MercadoLivreAPI:
-    """Cliente para API oficial de afiliados do ML"""
+    """
+    Cliente para API oficial de afiliados do ML.
+
+    Com `db` (AsyncDatabase), os links gerados ficam na tabela affiliate_links
+    por (product_id, tag): só os misses vão para a API. Recusas também são
+    cacheadas (TTL menor) e respondidas com o fallback de tag, sem nova chamada.
+    """
     
     API_URL = "https://www.mercadolivre.com.br/affiliate-program/api/v2/affiliates/createLink"
     
-    def __init__(self):
+    def __init__(
+        self,
+        db=None,
+        link_ttl: int = None,
+        negative_ttl: int = None,
+        api_url: str = None,
+        batch_size: int = None,
+        concurrency: int = None,
+        max_retries: int = None,
+        retry_base: float = API_RETRY_BASE_DELAY,
+        sleep=asyncio.sleep,
+    ):
         self.tag = os.getenv("ML_AFFILIATE_TAG")
         self.cookies = os.getenv("ML_COOKIES")
+        self.db = db
+        self.api_url = api_url or self.API_URL
+        self.batch_size = batch_size or AFFILIATE_API_BATCH_SIZE
+        self.concurrency = concurrency or AFFILIATE_API_CONCURRENCY
+        self.max_retries = AFFILIATE_API_RETRIES if max_retries is None else max_retries
+        self.retry_base = retry_base
+        self._sleep = sleep
+        self._headers = self._build_headers()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.link_ttl = link_ttl if link_ttl is not None else AFFILIATE_LINK_TTL_DAYS * 86400
+        self.negative_ttl = negative_ttl if negative_ttl is not None else AFFILIATE_NEGATIVE_TTL_HOURS * 3600
+
+        # Métricas do cache de links
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.api_calls = 0
         
         if not self.tag or not self.cookies:
             logger.warning("⚠️ ML_AFFILIATE_TAG ou ML_COOKIES não configurados! API oficial não funcionará.")
+
+    @staticmethod
+    def _product_id(url: str) -> Optional[str]:
+        # Mesma chave do sent_deals (Deal.product_id)
+        return product_id_from_url(url)
+
+    def stats(self) -> dict:
+        total = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "api_calls": self.api_calls,
+            "hit_rate": (self.hits + self.negative_hits) / total if total else 0.0,
+        }
+
+    async def prune_cache(self):
+        if self.db is not None:
+            await self.db.prune_affiliate_links(self.link_ttl, self.negative_ttl)
     
     async def create_links(self, urls: List[str]) -> List[str]:
         """
-        Gera links de afiliado em lote usando API oficial.
+        Gera links de afiliado em lote usando API oficial (só para o que não
+        está no cache).
         
         Args:
             urls: Lista de URLs de produtos
@@ -27,11 +100,54 @@ class MercadoLivreAPI:
         """
         if not self.tag or not self.cookies:
             return urls # Retorna URLs originais se não configurado
-            
+
+        ids = [self._product_id(url) for url in urls]
+        cached = {}
+        known = [pid for pid in ids if pid]
+        if self.db is not None and known:
+            try:
+                cached = await self.db.get_affiliate_links(known, self.tag, self.link_ttl, self.negative_ttl)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache de links indisponível: {e}")
+
+        results = [None] * len(urls)
+        pending = {}  # product_id (ou URL sem id) -> índices; repetidos no lote = 1 URL na API
+        for i, (url, pid) in enumerate(zip(urls, ids)):
+            if pid in cached:
+                if cached[pid]:
+                    self.hits += 1
+                    results[i] = cached[pid]
+                else:
+                    self.negative_hits += 1
+                    results[i] = self._inject_tag_fallback(url)
+            else:
+                self.misses += 1
+                pending.setdefault(pid or url, []).append(i)
+
+        if pending:
+            miss_urls = [urls[indices[0]] for indices in pending.values()]
+            outcomes = await self._request_links(miss_urls)
+            to_save = {}
+            for indices, (link, outcome) in zip(pending.values(), outcomes):
+                for i in indices:
+                    results[i] = link
+                pid = ids[indices[0]]
+                if pid and outcome != LINK_ERROR:
+                    to_save[pid] = link if outcome == LINK_OK else None
+            if to_save and self.db is not None:
+                try:
+                    await self.db.save_affiliate_links(to_save, self.tag)
+                except Exception as e:
+                    logger.warning(f"⚠️ Falha ao gravar cache de links: {e}")
+        return results
+
+    # --- HTTP (createLink) ---
+
+    def _build_headers(self) -> dict:
+        """Headers fixos do createLink (montados uma vez; cookies vêm do .env)."""
         # Tentar extrair CSRF token dos cookies
         csrf_token = ""
-        if "csrf" in self.cookies:
-            import re
+        if self.cookies and "csrf" in self.cookies:
             match = re.search(r'_csrf=([^;]+)', self.cookies)
             if match:
                 csrf_token = match.group(1)
@@ -40,7 +156,7 @@ class MercadoLivreAPI:
             "accept": "application/json, text/plain, */*",
             "accept-language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
             "content-type": "application/json",
-            "cookie": self.cookies,
+            "cookie": self.cookies or "",
             "origin": "https://www.mercadolivre.com.br",
             "priority": "u=1, i",
             "referer": "https://www.mercadolivre.com.br/afiliados/linkbuilder",
@@ -52,53 +168,93 @@ class MercadoLivreAPI:
             "sec-fetch-site": "same-origin",
             "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
         }
-        
+
         # O workflow n8n não usa x-csrf-token explícito, apenas os headers acima.
         # Vamos tentar sem o token primeiro se ele não existir, mas manter a lógica de extração se falhar.
         if csrf_token:
             headers["x-csrf-token"] = csrf_token
             headers["x-xsrf-token"] = csrf_token
+        return headers
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Sessão de longa duração (keep-alive) reaproveitada entre ciclos."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60, ttl_dns_cache=300),
+                headers=self._headers,
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request_links(self, urls: List[str]) -> List[Tuple[str, str]]:
+        """
+        Chama o createLink em lotes de `batch_size` (concorrentes até
+        `concurrency`): [(link, LINK_OK | LINK_REFUSED | LINK_ERROR)] na ordem de `urls`.
+        Um lote que falha não afeta os outros: só as URLs dele caem no fallback.
+        """
+        if not self._semaphore:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        chunks = [urls[i:i + self.batch_size] for i in range(0, len(urls), self.batch_size)]
+        results = await asyncio.gather(*(self._request_chunk(chunk) for chunk in chunks))
+        return [outcome for chunk_result in results for outcome in chunk_result]
+
+    async def _request_chunk(self, urls: List[str]) -> List[Tuple[str, str]]:
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    self.api_calls += 1
+                    async with self._get_session().post(self.api_url, json={"urls": urls, "tag": self.tag}) as response:
+                        if response.status == 200:
+                            data = await response.json(content_type=None)
+                            return self._parse_links(data, urls)
+                        body = (await response.text())[:200]
+                        if response.status not in RETRY_STATUSES:
+                            logger.error(f"❌ API Error: {response.status} - {body}")
+                            break
+                        logger.warning(f"⚠️ API {response.status} (tentativa {attempt + 1}/{self.max_retries + 1})")
+                        retry_after = response.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logger.warning(f"⚠️ API Exception (tentativa {attempt + 1}/{self.max_retries + 1}): {e!r}")
+
+                if attempt < self.max_retries:
+                    await self._sleep(self._backoff(attempt, retry_after))
+
+        logger.info(f"⚠️ Usando fallback manual para {len(urls)} link(s) de afiliado")
+        return [(self._inject_tag_fallback(url), LINK_ERROR) for url in urls]
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Exponencial com jitter (0.5x-1.5x); respeita Retry-After em segundos."""
+        delay = self.retry_base * (2 ** attempt) * (0.5 + random.random())
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return min(delay, API_RETRY_MAX_DELAY)
+
+    def _parse_links(self, data, urls: List[str]) -> List[Tuple[str, str]]:
+        """Resposta do createLink -> resultado por URL (itens ausentes caem no fallback sem cache)."""
+        items = data.get("urls") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return [(self._inject_tag_fallback(url), LINK_ERROR) for url in urls]
+
+        results = []
+        for url_data, original_url in zip(items, urls):
+            short = url_data.get("short_url") if isinstance(url_data, dict) else None
+            if short:
+                results.append((short, LINK_OK))
+            else:
+                # API recusou encurtar (ex: erro 111 - URL not allowed)? Injeta tag manualmente!
+                if isinstance(url_data, dict) and url_data.get("error_code"):
+                    logger.warning(f"⚠️ API Recusou ({url_data.get('error_code')}): {url_data.get('message')} -> Usando Fallback")
+                results.append((self._inject_tag_fallback(original_url), LINK_REFUSED))
+        # Resposta mais curta que o lote: o resto fica com o fallback (sem cache)
+        results.extend((self._inject_tag_fallback(url), LINK_ERROR) for url in urls[len(results):])
+        return results
 
-        
-        payload = {
-            "urls": urls,
-            "tag": self.tag
-        }
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.API_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        # logger.info(f"🔍 API RESPONSE: {data}")
-                        
-                        if "urls" in data:
-                             results = []
-                             for url_data, original_url in zip(data["urls"], urls):
-                                 short = url_data.get("short_url")
-                                 if short:
-                                     results.append(short)
-                                 else:
-                                     # API recusou encurtar (ex: erro 111 - URL not allowed)? Injeta tag manualmente!
-                                     if url_data.get("error_code"):
-                                         logger.warning(f"⚠️ API Recusou ({url_data.get('error_code')}): {url_data.get('message')} -> Usando Fallback")
-                                     results.append(self._inject_tag_fallback(original_url))
-                             return results
-                        return urls
-                    else:
-                        logger.error(f"❌ API Error: {response.status} - {await response.text()}")
-                        logger.info("⚠️ Usando fallback manual para link de afiliado")
-                        return [self._inject_tag_fallback(url) for url in urls]
-        except Exception as e:
-            logger.error(f"❌ API Exception: {e}")
-            return [self._inject_tag_fallback(url) for url in urls]
-            
     def _inject_tag_fallback(self, url: str) -> str:
         """Adiciona tag manualmente se a API falhar"""
         if not self.tag: return url
@@ -112,3 +268,23 @@ class MercadoLivreAPI:
         if "mercadolivre.com.br" in url:
              return f"{url}{separator}tag={self.tag}"
         return url
+
+
+_affiliate_api = None
+
+
+def get_affiliate_api() -> MercadoLivreAPI:
+    """Cliente global do processo (cache de links no deals.db e métricas compartilhadas)."""
+    global _affiliate_api
+    if _affiliate_api is None:
+        from core.async_database import get_database
+        _affiliate_api = MercadoLivreAPI(get_database())
+    return _affiliate_api
+
+
+async def close_affiliate_api():
+    """Fecha a sessão HTTP do cliente global (shutdown)."""
+    global _affiliate_api
+    if _affiliate_api is not None:
+        await _affiliate_api.close()
+    _affiliate_api = None
@@ -0,0 +1,180 @@
+import asyncio
+import os
+import re
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import aiohttp
+from config.logger import logger
+from core.metrics import span
+from models.deal import Deal
+from scrapers.embedded_state import extract_polycards, deals_from_polycards
+from scrapers.listing_cards import CATEGORY_CARD_SELECTORS, parse_listing_cards, build_deal
+
+# Marcadores de bloqueio/anti-bot na URL final ou no HTML
+BLOCK_URL_MARKERS = ("account-verification", "/login", "captcha", "/jms/")
+BLOCK_HTML_MARKERS = ("g-recaptcha", "captcha-container", "suspicious-traffic")
+
+DESDE_RE = re.compile(r'_Desde_\d+')
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+class ListingBlocked(Exception):
+    """O ML respondeu com bloqueio/captcha (use o engine de browser)."""
+
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Sessão aiohttp do processo (keep-alive + cache de DNS), criada sob demanda."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=8, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30),
+            headers=HEADERS,
+        )
+    return _session
+
+
+async def close_http_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def page_url(url: str, offset: int, page: int) -> str:
+    """
+    URL da página seguinte da listagem.
+
+    - lista.mercadolivre.com.br: segmento `_Desde_{offset+1}` no path
+      (antes de `_NoIndex_True`, se existir).
+    - /ofertas e demais: parâmetro `page={page}` na query.
+    """
+    parts = urlsplit(url)
+    if page <= 1:
+        return url
+
+    if parts.netloc.startswith("lista."):
+        path = DESDE_RE.sub("", parts.path)
+        desde = f"_Desde_{offset + 1}"
+        if "_NoIndex_True" in path:
+            path = path.replace("_NoIndex_True", f"{desde}_NoIndex_True", 1)
+        else:
+            path = path + desde
+        return urlunsplit((parts.scheme, parts.netloc, path, parts.query, ""))
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+class MercadoLivreHttpScraper:
+    """
+    Engine HTTP para listagens server-rendered (sem Chromium).
+
+    Baixa o HTML direto com a sessão aiohttp compartilhada, pagina via
+    `_Desde_N`/`page=N` e extrai os cards com `parse_listing_cards`.
+    """
+
+    def __init__(self, max_pages: int = 5):
+        self.max_pages = max_pages
+
+    def _cookie_header(self) -> dict:
+        cookies = os.getenv("ML_COOKIES")
+        return {"Cookie": cookies} if cookies else {}
+
+    async def fetch_html(self, url: str) -> str:
+        session = get_http_session()
+        async with session.get(url, headers=self._cookie_header(), allow_redirects=True) as response:
+            final_url = str(response.url)
+            if response.status in (403, 429) or any(m in final_url for m in BLOCK_URL_MARKERS):
+                raise ListingBlocked(f"HTTP {response.status} em {final_url}")
+            response.raise_for_status()
+            html = await response.text()
+        if any(m in html for m in BLOCK_HTML_MARKERS):
+            raise ListingBlocked(f"Captcha/anti-bot em {final_url}")
+        return html
+
+    async def fetch_listing_cards(self, url: str, max_results: int = 15, selectors=CATEGORY_CARD_SELECTORS) -> List[dict]:
+        """
+        Retorna os dicts brutos dos cards (mesmo formato do EXTRACT_CARDS_JS).
+
+        Raises:
+            ListingBlocked: bloqueio detectado (caller deve cair no browser).
+        """
+        def parse_page(html):
+            cards = parse_listing_cards(html, selectors)
+            return cards, len(cards)
+
+        return await self._paginate(url, max_results, parse_page, key=lambda card: card.get("href"))
+
+    async def fetch_listing_deals(self, url: str, max_results: int = 15, selectors=CATEGORY_CARD_SELECTORS) -> List[Deal]:
+        """
+        Deals da listagem: estado JSON embutido de cada página, com os
+        seletores do DOM como fallback quando o estado não existe.
+
+        Raises:
+            ListingBlocked: bloqueio detectado (caller deve cair no browser).
+        """
+        return [deal async for deal in self.iter_listing_deals(url, max_results, selectors)]
+
+    async def iter_listing_deals(self, url: str, max_results: int = 15, selectors=CATEGORY_CARD_SELECTORS) -> AsyncIterator[Deal]:
+        """Igual ao `fetch_listing_deals`, mas entrega os Deals de cada página assim que ela é parseada."""
+        pages = self._iter_pages(
+            url, max_results, lambda html: parse_listing_deals(html, selectors),
+            key=lambda deal: deal.product_id or deal.url
+        )
+        async for page_items in pages:
+            for deal in page_items:
+                yield deal
+
+    async def _paginate(self, url: str, max_results: int, parse_page, key) -> list:
+        """Baixa páginas até `max_results` itens novos; `parse_page(html)` -> (itens, total de cards)."""
+        items: list = []
+        async for page_items in self._iter_pages(url, max_results, parse_page, key):
+            items.extend(page_items)
+        return items
+
+    async def _iter_pages(self, url: str, max_results: int, parse_page, key) -> AsyncIterator[list]:
+        """Gera os itens novos de cada página até somar `max_results` (ou a listagem acabar)."""
+        seen = set()
+        total = 0
+        offset = 0
+        page = 1
+        while total < max_results and page <= self.max_pages:
+            target = page_url(url, offset, page)
+            async with span("scrape.fetch"):
+                html = await self.fetch_html(target)
+            # Parsing é CPU-bound: roda fora do event loop
+            async with span("scrape.extract"):
+                page_items, page_cards = await asyncio.to_thread(parse_page, html)
+            offset += page_cards
+
+            new_items = [item for item in page_items if key(item) not in seen]
+            seen.update(key(item) for item in new_items)
+            logger.info(f"   ⚡ HTTP página {page}: {len(new_items)} itens ({target})")
+            if not new_items:
+                break
+            total += len(new_items)
+            yield new_items
+            page += 1
+
+
+def parse_listing_deals(html: str, selectors=CATEGORY_CARD_SELECTORS) -> Tuple[List[Deal], int]:
+    """(Deals, total de cards) de uma página: estado JSON primeiro, DOM se não houver (ou não render nada)."""
+    polycards = extract_polycards(html)
+    if polycards is not None:
+        deals = deals_from_polycards(polycards)
+        if deals:
+            return deals, len(polycards)
+    cards = parse_listing_cards(html, selectors)
+    return [deal for deal in map(build_deal, cards) if deal], len(cards)
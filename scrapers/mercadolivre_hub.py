@@ -8,10 +8,10 @@ from datetime import datetime
 from typing import List, Optional
 import re
 
-from playwright.async_api import async_playwright
 from playwright_stealth import Stealth
-from bs4 import BeautifulSoup
+from scrapers.html_parser import parse_html
 from models.deal import Deal
+from core.browser_pool import get_browser_pool, shutdown_browser_pool
 
 class MercadoLivreHubScraper:
     def __init__(self, cookies_path="data/cookies.json"):
@@ -38,13 +38,8 @@ class MercadoLivreHubScraper:
             print("No cookies available to access Affiliate Hub.")
             return []
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                viewport={'width': 1366, 'height': 768}
-            )
-            
+        # Pooled contexts already carry the default user agent and viewport
+        async with get_browser_pool().acquire() as context:
             # Add cookies to context
             # Playwright expects 'sameSite' to be valid, sometimes extensions export incompatible values
             clean_cookies = []
@@ -79,7 +74,7 @@ class MercadoLivreHubScraper:
                 # Check if logged in (url shouldn't redirect to login)
                 if "login" in page.url or "sso" in page.url:
                     print("⚠️ Login failed. Cookies might be expired.")
-                    await browser.close()
+                    await page.close()
                     return []
 
                 # Wait for cards
@@ -90,99 +85,105 @@ class MercadoLivreHubScraper:
                 await asyncio.sleep(2)
 
                 content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
+                deals = self.parse_hub_cards(content)
 
-                # Identify sections (e.g., "Ganhos extras", "Mais vendidos")
-                # The structure in the hub is usually a grid of cards
-                # We will look for generic card structures
-                
-                # Use specific selectors for the Hub's poly-cards
-                cards = soup.select(".poly-card")
-                print(f"Found {len(cards)} items in Hub.")
-
-                # Hybrid Strategy: Fetch 30 deals, generate affiliate links only for high-score ones
-                deal_count = 0
-                max_deals = 30
-
-                for card in cards:
-                    if deal_count >= max_deals:
-                        print(f"⚠️ Limite de {max_deals} ofertas atingido")
-                        break
-                    try:
-                        # Title and Link
-                        title_el = card.select_one(".poly-component__title")
-                        if not title_el: continue
-                        title = title_el.get_text(strip=True)
-                        href = title_el.get('href')
-                        
-                        if href and not href.startswith("http"):
-                             url = "https://www.mercadolivre.com.br" + href
-                        else:
-                             url = href
-
-                        # Price
-                        price_el = card.select_one(".andes-money-amount__fraction")
-                        if not price_el: continue
-                        price_text = price_el.get_text(strip=True).replace('.', '')
-                        price = float(price_text)
-
-                        # Image
-                        img_el = card.select_one(".poly-component__picture")
-                        image_url = img_el['src'] if img_el else None
-
-                        # Check for "Ganhos extras" or commission badge
-                        is_extra_commission = False
-                        commission_percent = 0
-                        chip_el = card.select_one(".poly-component__chip")
-                        if chip_el:
-                            chip_text = chip_el.get_text(strip=True).lower()
-                            # Example text: "ganhos extra 22%"
-                            if "extra" in chip_text or "ganhos" in chip_text:
-                                is_extra_commission = True
-                                # Extract number
-                                match = re.search(r"(\d+)", chip_text)
-                                if match:
-                                    commission_percent = int(match.group(1))
-
-                        # User Request Filter: Only return deals with > 10% extra earnings
-                        # If it's just "Mais vendido" without extra earnings, we keep it? 
-                        # User said: "traga todos os produtos com ganhos extras acima de 10%"
-                        # This implies we should ONLY return those with > 10% IF they are "ganhos extras".
-                        # If it is NOT "ganhos extra" (e.g. just Mais Vendido), should we ignore?
-                        # Let's be strict: if it has commission, it must be > 10. If it has NO commission info, maybe skip?
-                        # The user found value in the "Ganhos extras".
-                        
-                        if is_extra_commission and commission_percent <= 10:
-                            continue # Skip low commission deals
-
-                        # Use the parsed data to create the Deal object
-                        deal = Deal(
-                            title=title,
-                            price=price,
-                            url=url,
-                            store="Mercado Livre",
-                            image_url=image_url
-                        )
-                        deal.discount_percentage = commission_percent if is_extra_commission else 0
-                        
-                        # NOTE: Affiliate link generation moved to main.py
-                        # Only high-score deals (>= 40) will get affiliate links generated
-                        # This saves ~4 seconds per low-score deal
+            except Exception as e:
+                print(f"Error scraping Hub: {e}")
+                import traceback
+                traceback.print_exc()
 
-                        deals.append(deal)
-                        deal_count += 1  # Increment counter
+            await page.close()
+        return deals
+
+    def parse_hub_cards(self, content: str, max_deals: int = 30) -> List[Deal]:
+        """Extrai os Deals dos poly-cards do Hub de Afiliados (sem I/O)."""
+        deals = []
+        soup = parse_html(content)
+
+        # Identify sections (e.g., "Ganhos extras", "Mais vendidos")
+        # The structure in the hub is usually a grid of cards
+        # We will look for generic card structures
+        
+        # Use specific selectors for the Hub's poly-cards
+        cards = soup.select(".poly-card")
+        print(f"Found {len(cards)} items in Hub.")
+
+        # Hybrid Strategy: Fetch 30 deals, generate affiliate links only for high-score ones
+        deal_count = 0
+
+        for card in cards:
+            if deal_count >= max_deals:
+                print(f"⚠️ Limite de {max_deals} ofertas atingido")
+                break
+            try:
+                # Title and Link
+                title_el = card.select_one(".poly-component__title")
+                if not title_el: continue
+                title = title_el.get_text(strip=True)
+                href = title_el.get('href')
+                
+                if href and not href.startswith("http"):
+                     url = "https://www.mercadolivre.com.br" + href
+                else:
+                     url = href
+
+                # Price
+                price_el = card.select_one(".andes-money-amount__fraction")
+                if not price_el: continue
+                price_text = price_el.get_text(strip=True).replace('.', '')
+                price = float(price_text)
+
+                # Image
+                img_el = card.select_one(".poly-component__picture")
+                image_url = img_el['src'] if img_el else None
+
+                # Check for "Ganhos extras" or commission badge
+                is_extra_commission = False
+                commission_percent = 0
+                chip_el = card.select_one(".poly-component__chip")
+                if chip_el:
+                    chip_text = chip_el.get_text(strip=True).lower()
+                    # Example text: "ganhos extra 22%"
+                    if "extra" in chip_text or "ganhos" in chip_text:
+                        is_extra_commission = True
+                        # Extract number
+                        match = re.search(r"(\d+)", chip_text)
+                        if match:
+                            commission_percent = int(match.group(1))
+
+                # User Request Filter: Only return deals with > 10% extra earnings
+                # If it's just "Mais vendido" without extra earnings, we keep it? 
+                # User said: "traga todos os produtos com ganhos extras acima de 10%"
+                # This implies we should ONLY return those with > 10% IF they are "ganhos extras".
+                # If it is NOT "ganhos extra" (e.g. just Mais Vendido), should we ignore?
+                # Let's be strict: if it has commission, it must be > 10. If it has NO commission info, maybe skip?
+                # The user found value in the "Ganhos extras".
+                
+                if is_extra_commission and commission_percent <= 10:
+                    continue # Skip low commission deals
+
+                # Use the parsed data to create the Deal object
+                deal = Deal(
+                    title=title,
+                    price=price,
+                    url=url,
+                    store="Mercado Livre",
+                    image_url=image_url
+                )
+                deal.discount_percentage = commission_percent if is_extra_commission else 0
+                
+                # NOTE: Affiliate link generation moved to main.py
+                # Only high-score deals (>= 40) will get affiliate links generated
+                # This saves ~4 seconds per low-score deal
 
+                deals.append(deal)
+                deal_count += 1  # Increment counter
 
-                    except Exception as e:
-                        print(f"Error parsing hub item: {e}")
-                        continue
 
             except Exception as e:
-                print(f"Error scraping Hub: {e}")
-                import traceback
-                traceback.print_exc()
+                print(f"Error parsing hub item: {e}")
+                continue
 
-            await browser.close()
         return deals
 
     async def generate_affiliate_link_for_deal(self, deal: Deal) -> Deal:
@@ -197,14 +198,8 @@ class MercadoLivreHubScraper:
             return deal
         
         try:
-            # Launch browser for this single operation
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context()
-                
-                # Apply stealth
-                stealth = Stealth()
-                await stealth.apply_stealth_async(context)
+            # Borrow a pooled context for this single operation
+            async with get_browser_pool().acquire() as context:
                 
                 # Load and clean cookies (same as fetch_my_deals)
                 if os.path.exists(self.cookies_path):
@@ -229,6 +224,10 @@ class MercadoLivreHubScraper:
                 
                 page = await context.new_page()
                 
+                # Apply stealth on the page (pooled contexts outlive this call)
+                stealth = Stealth()
+                await stealth.apply_stealth_async(page)
+                
                 print(f"   🔗 Generating affiliate link for: {deal.title[:40]}...")
                 affiliate_link, store_name, original_price = await self._get_affiliate_link(page, deal.url)
                 
@@ -245,13 +244,53 @@ class MercadoLivreHubScraper:
                 # Update original price if found
                 if original_price:
                     deal.original_price = original_price
-                
-                await browser.close()
         except Exception as e:
             print(f"   ❌ Error generating affiliate link: {e}")
         
         return deal
 
+    def parse_product_page(self, content: str):
+        """Extrai (store_name, original_price) do HTML da página do produto (sem I/O)."""
+        store_name = None
+        original_price = None
+        soup = parse_html(content)
+
+        # Extract store name - look for seller info
+        # Try multiple selectors
+        store_selectors = [
+            "a.ui-pdp-seller__link-trigger",  # Main seller link
+            ".ui-pdp-seller__header__title",   # Seller header
+            "p.ui-pdp-color--BLACK",           # Alternative
+        ]
+        for selector in store_selectors:
+            store_el = soup.select_one(selector)
+            if store_el:
+                # Use separator=' ' to avoid "Loja oficialBrand" concatenation
+                raw_store = store_el.get_text(separator=' ', strip=True)
+                
+                # Clean up "Loja oficial" prefix (case insensitive)
+                # We want just "CeraVe", not "Loja oficial CeraVe"
+                clean_name = re.sub(r'(?i)^loja\s*oficial\s*', '', raw_store).strip()
+                
+                if clean_name and len(clean_name) > 1:
+                    store_name = clean_name.title() # Force Title Case
+                    break
+        
+        # Extract original price (before discount)
+        original_price_el = soup.select_one(".andes-money-amount--previous s")
+        if original_price_el:
+            price_text = original_price_el.get_text(strip=True)
+            # Extract numbers only
+            price_match = re.search(r"([\d.]+)", price_text.replace('.', ''))
+            if price_match:
+                original_price = float(price_match.group(1))
+                print(f"   📊 Original price found: R$ {original_price:.2f}")
+        
+        if store_name:
+            print(f"   🏪 Store name found: {store_name}")
+
+        return store_name, original_price
+
     async def _get_affiliate_link(self, page, product_url):
         """Navigates to product page and extracts: affiliate link, store name, and original price.
         Returns: (affiliate_link, store_name, original_price)
@@ -271,41 +310,7 @@ class MercadoLivreHubScraper:
             try:
                 # Get page content for parsing
                 content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Extract store name - look for seller info
-                # Try multiple selectors
-                store_selectors = [
-                    "a.ui-pdp-seller__link-trigger",  # Main seller link
-                    ".ui-pdp-seller__header__title",   # Seller header
-                    "p.ui-pdp-color--BLACK",           # Alternative
-                ]
-                for selector in store_selectors:
-                    store_el = soup.select_one(selector)
-                    if store_el:
-                        # Use separator=' ' to avoid "Loja oficialBrand" concatenation
-                        raw_store = store_el.get_text(separator=' ', strip=True)
-                        
-                        # Clean up "Loja oficial" prefix (case insensitive)
-                        # We want just "CeraVe", not "Loja oficial CeraVe"
-                        clean_name = re.sub(r'(?i)^loja\s*oficial\s*', '', raw_store).strip()
-                        
-                        if clean_name and len(clean_name) > 1:
-                            store_name = clean_name.title() # Force Title Case
-                            break
-                
-                # Extract original price (before discount)
-                original_price_el = soup.select_one(".andes-money-amount--previous s")
-                if original_price_el:
-                    price_text = original_price_el.get_text(strip=True)
-                    # Extract numbers only
-                    price_match = re.search(r"([\d.]+)", price_text.replace('.', ''))
-                    if price_match:
-                        original_price = float(price_match.group(1))
-                        print(f"   📊 Original price found: R$ {original_price:.2f}")
-                
-                if store_name:
-                    print(f"   🏪 Store name found: {store_name}")
+                store_name, original_price = self.parse_product_page(content)
             except Exception as e:
                 print(f"   ⚠️ Error extracting product details: {e}")
 
@@ -388,6 +393,13 @@ class MercadoLivreHubScraper:
 
 if __name__ == "__main__":
     scraper = MercadoLivreHubScraper()
-    deals = asyncio.run(scraper.fetch_my_deals())
+
+    async def _main():
+        try:
+            return await scraper.fetch_my_deals()
+        finally:
+            await shutdown_browser_pool()
+
+    deals = asyncio.run(_main())
     for d in deals:
         print(f"HUB DEAL: {d.title} | {d.price}")
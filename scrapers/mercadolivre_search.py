@@ -1,15 +1,63 @@
 
 import asyncio
-from playwright.async_api import async_playwright
+import os
+import time
 from bs4 import BeautifulSoup
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from models.deal import Deal
 import traceback
+from contextlib import aclosing
+from typing import AsyncIterator
 from config.logger import logger
+from core.browser_pool import get_browser_pool
+from core.metrics import span, timed
+from scrapers.listing_cards import (
+    CARD_IMAGE_SELECTOR, CARD_TITLE_SELECTOR, CARD_LINK_SELECTORS, CARD_PRICE_SELECTORS,
+    CARD_ORIGINAL_PRICE_SELECTOR, CARD_DISCOUNT_SELECTOR, CATEGORY_CARD_SELECTORS,
+    SEARCH_CARD_SELECTORS, EXTRACT_CARDS_JS, build_deal,
+)
+from scrapers.mercadolivre_http import MercadoLivreHttpScraper, ListingBlocked
+from scrapers.embedded_state import extract_deals
+
+# Scroll incremental (infinite scroll)
+SCROLL_MAX_STEPS = 25        # Safety cap
+SCROLL_MAX_STALE = 3         # Rodadas seguidas sem novos cards antes de desistir
+SCROLL_BASE_WAIT_MS = 600
+SCROLL_MAX_WAIT_MS = 2400
+
+COUNT_CARDS_JS = """
+(selectors) => {
+    for (const sel of selectors) {
+        const n = document.querySelectorAll(sel).length;
+        if (n) return n;
+    }
+    return 0;
+}
+"""
 
 class MercadoLivreSearchScraper:
     def __init__(self):
         self.base_url = "https://lista.mercadolivre.com.br/"
 
+    async def _inject_env_cookies(self, context, label: str = ""):
+        """Injeta os cookies do ML_COOKIES (.env) no contexto emprestado."""
+        cookies_str = os.getenv("ML_COOKIES")
+        if not cookies_str:
+            return
+        cookies_list = []
+        for pair in cookies_str.split(";"):
+            if "=" in pair:
+                name, value = pair.strip().split("=", 1)
+                cookies_list.append({
+                    "name": name, 
+                    "value": value, 
+                    "domain": ".mercadolivre.com.br", 
+                    "path": "/"
+                })
+        if cookies_list:
+            await context.add_cookies(cookies_list)
+            logger.info(f"   🍪 Cookies injetados{label}: {len(cookies_list)}")
+
     async def search_keyword(self, keyword: str, max_results: int = 10) -> list[Deal]:
         """Busca produtos no ML usando uma palavra-chave."""
         deals = []
@@ -17,29 +65,12 @@ class MercadoLivreSearchScraper:
         
         logger.info(f"🔍 Searching ML for: {keyword}...")
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
+        async with get_browser_pool().acquire() as context:
             page = await context.new_page()
             
             try:
                 # Carregar Cookies e User-Agent
-                import os
-                cookies_str = os.getenv("ML_COOKIES")
-                if cookies_str:
-                    cookies_list = []
-                    for pair in cookies_str.split(";"):
-                        if "=" in pair:
-                            name, value = pair.strip().split("=", 1)
-                            cookies_list.append({
-                                "name": name, 
-                                "value": value, 
-                                "domain": ".mercadolivre.com.br", 
-                                "path": "/"
-                            })
-                    if cookies_list:
-                        await context.add_cookies(cookies_list)
-                        logger.info(f"   🍪 Cookies injetados (Search): {len(cookies_list)}")
+                await self._inject_env_cookies(context, " (Search)")
 
                 # OTIMIZAÇÃO: Bloquear imagens e fontes para tornar o scraping mais leve e rápido
                 await page.route("**/*.{png,jpg,jpeg,webp,gif,svg,woff,woff2,ttf,css}", lambda route: route.abort())
@@ -51,65 +82,75 @@ class MercadoLivreSearchScraper:
                 logger.info(f"   Navigating to {search_url}")
                 await page.goto(search_url, wait_until="domcontentloaded", timeout=45000)
                 
-                # Check different result container types
-                cards = []
-                cards = await page.query_selector_all("li.ui-search-layout__item")
-                if not cards:
-                    cards = await page.query_selector_all("div.ui-search-result__wrapper")
-                if not cards:
-                    cards = await page.query_selector_all(".poly-card")
-                
-                logger.info(f"   Found {len(cards)} items (Search)")
-                
-                count = 0
-                for card in cards:
-                    if count >= max_results: break
+                # Estado JSON embutido primeiro; DOM só se a página não tiver estado
+                deals = (await self._extract_state_deals(page))[:max_results]
+                if deals:
+                    logger.info(f"   Found {len(deals)} items (Search, estado JSON)")
+                else:
+                    # Check different result container types (1 round trip para todos os cards)
+                    cards = await self._extract_cards_data(page, SEARCH_CARD_SELECTORS)
                     
-                    try:
-                        deal = await self._extract_deal_from_card(card, keyword)
-                        if deal:
-                            deals.append(deal)
-                            count += 1
-                    except Exception as e:
-                        logger.error(f"   Error parsing card: {e}")
-                        continue
+                    logger.info(f"   Found {len(cards)} items (Search)")
+                    
+                    count = 0
+                    for card in cards:
+                        if count >= max_results: break
+                        
+                        try:
+                            deal = self._build_deal(card, keyword)
+                            if deal:
+                                deals.append(deal)
+                                count += 1
+                        except Exception as e:
+                            logger.error(f"   Error parsing card: {e}")
+                            continue
                         
             except Exception as e:
                 logger.error(f"❌ Error searching for '{keyword}': {e}")
             finally:
-                await browser.close()
+                await page.close()
                 
         return deals
 
-    async def scrape_category_url(self, category_url: str, max_results: int = 15) -> list[Deal]:
-        """Busca produtos diretamente de uma URL de categoria."""
-        deals = []
+    async def scrape_category_url(self, category_url: str, max_results: int = 15, engine: str = "browser") -> list[Deal]:
+        """
+        Busca produtos diretamente de uma URL de categoria.
+
+        engine="http" tenta primeiro o HTML server-rendered via aiohttp (sem
+        Chromium) e cai no browser em caso de bloqueio, erro ou zero cards.
+        """
+        return [deal async for deal in self.iter_category_url(category_url, max_results, engine)]
+
+    async def iter_category_url(self, category_url: str, max_results: int = 15, engine: str = "browser") -> AsyncIterator[Deal]:
+        """
+        Versão em streaming do `scrape_category_url`: entrega cada Deal assim
+        que a página (HTTP) ou o estado JSON/scroll (browser) é parseado.
+        Quem consome pode parar a qualquer momento (`aclose`) e o restante da
+        raspagem (páginas, scroll) nem acontece.
+        """
+        if engine == "http":
+            found = 0
+            async with aclosing(self._iter_category_http(category_url, max_results)) as deals:
+                async for deal in deals:
+                    found += 1
+                    yield deal
+            if found:
+                return
+            logger.info("   🌐 Fallback para o browser...")
+
+        async with aclosing(self._iter_category_browser(category_url, max_results)) as deals:
+            async for deal in deals:
+                yield deal
+
+    async def _iter_category_browser(self, category_url: str, max_results: int) -> AsyncIterator[Deal]:
         logger.info(f"📂 Scraping Category URL: {category_url}...")
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
+        async with get_browser_pool().acquire() as context:
             page = await context.new_page()
             
             try:
                 # Carregar Cookies do .env
-                import os
-                cookies_str = os.getenv("ML_COOKIES")
-                if cookies_str:
-                    cookies_list = []
-                    for pair in cookies_str.split(";"):
-                        if "=" in pair:
-                            name, value = pair.strip().split("=", 1)
-                            # Adicionar para o domínio
-                            cookies_list.append({
-                                "name": name, 
-                                "value": value, 
-                                "domain": ".mercadolivre.com.br", 
-                                "path": "/"
-                            })
-                    if cookies_list:
-                        await context.add_cookies(cookies_list)
-                        logger.info(f"   🍪 Cookies injetados: {len(cookies_list)}")
+                await self._inject_env_cookies(context)
 
                 # OTIMIZAÇÃO: Bloquear imagens e fontes para tornar o scraping mais leve e rápido
                 await page.route("**/*.{png,jpg,jpeg,webp,gif,svg,woff,woff2,ttf,css}", lambda route: route.abort())
@@ -120,156 +161,192 @@ class MercadoLivreSearchScraper:
                 })
                 
                 logger.info(f"   Navigating to {category_url}")
-                await page.goto(category_url, wait_until="domcontentloaded", timeout=60000)
-                
-                # IMPORTANT: Wait for items to appear (hydration delay)
-                try:
-                    await page.wait_for_selector(".poly-card, .ui-search-layout__item, .promotion-item", timeout=15000)
-                except:
-                    logger.warning("   ⚠️ Timeout waiting for items selector (might be empty or slow).")
-
-                # Scroll Logic to Load More Items (Infinite Scroll)
-                scroll_cycles = max(5, int(max_results / 10)) # E.g., 100 items -> 10 scrolls
-                if scroll_cycles > 25: scroll_cycles = 25 # Safety cap
-                
-                logger.info(f"   📜 Scrolling {scroll_cycles} times to find {max_results} items...")
-                for _ in range(scroll_cycles): 
-                    await page.keyboard.press("PageDown")
-                    await asyncio.sleep(1.2) # Wait for load
-                
-                # Check different result container types (same as search)
-                cards = []
-                # Type 1: Poly Card (Priority)
-                cards = await page.query_selector_all(".poly-card")
-                # Type 2: Promotion Item (Common in Ofertas)
-                if not cards:
-                    cards = await page.query_selector_all(".promotion-item")
-                # Type 3: Standard Search (Fallback)
-                if not cards:
-                    cards = await page.query_selector_all("li.ui-search-layout__item")
-                # Type 4: Grid View
-                if not cards:
-                    cards = await page.query_selector_all("div.ui-search-result__wrapper")
-                
-                logger.info(f"   Items found after scroll: {len(cards)}")
-                
-                count = 0
-                for card in cards:
-                    if count >= max_results: break
+                async with span("scrape.navigate"):
+                    await page.goto(category_url, wait_until="domcontentloaded", timeout=60000)
                     
+                    # IMPORTANT: Wait for items to appear (hydration delay)
                     try:
-                        # Extract logic is same
-                        deal = await self._extract_deal_from_card(card, "Category Volume")
-                        if deal:
-                            # Marcar estratégia para scoring
-                            deal.strategy = "volume" 
-                            deals.append(deal)
-                            count += 1
-                    except Exception as e:
-                        logger.warning(f"   ⚠️ Skipping card due to error: {e}")
-                        continue
+                        await page.wait_for_selector(".poly-card, .ui-search-layout__item, .promotion-item", timeout=15000)
+                    except:
+                        logger.warning("   ⚠️ Timeout waiting for items selector (might be empty or slow).")
+
+                # Estado JSON embutido (render do servidor): sai antes do scroll
+                deals = (await self._extract_state_deals(page))[:max_results]
+                for deal in deals:
+                    # Marcar estratégia para scoring
+                    deal.strategy = "volume"
+                    yield deal
+
+                if len(deals) < max_results:
+                    # Scroll Logic to Load More Items (Infinite Scroll) - para assim que houver cards suficientes
+                    await self._scroll_until_loaded(page, max_results)
+                    
+                    # Check different result container types:
+                    # Poly Card (Priority) -> Promotion Item (Ofertas) -> Standard Search -> Grid View
+                    cards = await self._extract_cards_data(page, CATEGORY_CARD_SELECTORS)
+                    
+                    logger.info(f"   Items found after scroll: {len(cards)}")
+                    
+                    dom_deals = []
+                    for card in cards:
+                        try:
+                            # Extract logic is same
+                            deal = self._build_deal(card, "Category Volume")
+                            if deal:
+                                dom_deals.append(deal)
+                        except Exception as e:
+                            logger.warning(f"   ⚠️ Skipping card due to error: {e}")
+                            continue
+                    # Cards carregados pelo scroll completam os do estado
+                    extra = self._merge_deals(deals, dom_deals)[len(deals):max_results]
+                    for deal in extra:
+                        deal.strategy = "volume"
+                        yield deal
                         
             except Exception as e:
                 logger.error(f"❌ Error scraping category: {e}")
             finally:
-                await browser.close()
-                
-        return deals
+                await page.close()
 
-    async def _extract_deal_from_card(self, card, keyword) -> Deal:
-        """Extrai dados de um card de produto usando Playwright."""
-        
-        # 4. Image (Get first to use Alt as Title fallback)
-        img_el = await card.query_selector("img.ui-search-result-image__element, img.poly-component__picture, img.promotion-item__img")
-        image_url = None
-        alt_title = None
-        if img_el:
-            image_url = await img_el.get_attribute('data-src') or await img_el.get_attribute('src')
-            alt_title = await img_el.get_attribute('alt')
-        
-        # 1. Title
-        title = None
-        title_el = await card.query_selector("h2.ui-search-item__title, .poly-component__title, .promotion-item__title")
-        
-        if title_el:
-            title = await title_el.inner_text()
-        
-        # Fallback: Try 'a' tag plain text if specialized class missing
-        if not title:
-             link_text_el = await card.query_selector("a")
-             if link_text_el:
-                 text = await link_text_el.inner_text()
-                 if len(text) > 10: title = text
-
-        # Fallback 2: Use Image Alt
-        if not title and alt_title:
-            title = alt_title
-
-        if not title: 
-            logger.warning("   ⚠️ Item skipped: No Title found (Text or Alt)")
-            return None
+    async def _iter_category_http(self, category_url: str, max_results: int) -> AsyncIterator[Deal]:
+        """Engine HTTP: estado JSON (ou cards do DOM) de cada página, sem abrir browser."""
+        logger.info(f"⚡ Scraping Category URL via HTTP: {category_url}...")
+        found = 0
+        try:
+            pages = MercadoLivreHttpScraper().iter_listing_deals(category_url, max_results, CATEGORY_CARD_SELECTORS)
+            async with aclosing(pages) as deals:
+                async for deal in deals:
+                    deal.strategy = "volume"
+                    found += 1
+                    yield deal
+                    if found >= max_results:
+                        break
+        except ListingBlocked as e:
+            logger.warning(f"   🚫 HTTP bloqueado: {e}")
+        except Exception as e:
+            logger.warning(f"   ⚠️ HTTP falhou: {e}")
+        logger.info(f"   Items found via HTTP: {found}")
 
-        # 2. URL
-        link_el = await card.query_selector("a.ui-search-link, a.poly-component__title, a.promotion-item__link-container")
-        
-        # Fallback: Se o próprio card for um link ou container
-        if not link_el:
-             link_el = await card.query_selector("h2.ui-search-item__title a") 
-        if not link_el:
-             link_el = await card.query_selector("div.poly-card__content a")
-        if not link_el:
-             # Last resort: first 'a' tag in card
-             link_el = await card.query_selector("a")
-
-        if not link_el: 
-            logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): No Link Element found")
-            return None
-            
-        url = await link_el.get_attribute('href')
-        
-        # EXTRACT PRODUCT ID (MLB-XXXXXXX)
-        import re
-        product_id = None
-        if url:
-            match = re.search(r'(MLB-?\d+)', url)
-            if match:
-                product_id = match.group(1)
-        
-        if not product_id:
-            logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): No ML Product ID found in URL")
-            return None
-        
-        # CLEAN URL (Critical for DB Dedup)
-        # Remove tracking params like ?tracking_id=...
-        if url and "?" in url:
-            url = url.split("?")[0]
-        
-        # 3. Price
-        price_el = await card.query_selector(".poly-price__current .andes-money-amount__fraction")
-        if not price_el:
-            price_el = await card.query_selector("span.andes-money-amount__fraction")
-            
-        if not price_el: 
-            logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): No Price Element found")
-            return None
-            
-        price_str = await price_el.inner_text()
+    @timed("scrape.scroll")
+    async def _scroll_until_loaded(self, page, max_results: int) -> int:
+        """
+        Rola a página (PageDown) observando a contagem de cards.
+
+        Para quando há `max_results` cards ou quando a contagem para de crescer
+        por SCROLL_MAX_STALE rodadas seguidas. A espera entre passos é
+        adaptativa: `wait_for_function` retorna assim que novos cards aparecem
+        e o timeout dobra a cada rodada sem crescimento.
+
+        Returns:
+            Quantidade de cards carregados.
+        """
+        # Orçamento do scroll fixo antigo (para logar o tempo economizado)
+        legacy_steps = min(SCROLL_MAX_STEPS, max(5, int(max_results / 10)))
+        legacy_budget = legacy_steps * 1.2
+
+        start = time.perf_counter()
+        count = await page.evaluate(COUNT_CARDS_JS, list(CATEGORY_CARD_SELECTORS))
+        steps = 0
+        stale = 0
+        wait_ms = SCROLL_BASE_WAIT_MS
+
+        while count < max_results and steps < SCROLL_MAX_STEPS and stale < SCROLL_MAX_STALE:
+            await page.keyboard.press("PageDown")
+            steps += 1
+            try:
+                await page.wait_for_function(
+                    f"([sels, prev]) => ({COUNT_CARDS_JS})(sels) > prev",
+                    arg=[list(CATEGORY_CARD_SELECTORS), count],
+                    timeout=wait_ms
+                )
+                stale = 0
+                wait_ms = SCROLL_BASE_WAIT_MS
+            except PlaywrightTimeoutError:
+                stale += 1
+                wait_ms = min(wait_ms * 2, SCROLL_MAX_WAIT_MS) # Back-off
+            count = await page.evaluate(COUNT_CARDS_JS, list(CATEGORY_CARD_SELECTORS))
+
+        elapsed = time.perf_counter() - start
+        reason = "meta atingida" if count >= max_results else ("sem novos cards" if stale >= SCROLL_MAX_STALE else "limite de passos")
+        logger.info(
+            f"   📜 Scroll: {steps} passos, {count} cards em {elapsed:.1f}s ({reason}) | "
+            f"economia vs scroll fixo: {max(0.0, legacy_budget - elapsed):.1f}s"
+        )
+        return count
+
+    @timed("scrape.extract")
+    async def _extract_state_deals(self, page) -> list[Deal]:
+        """Deals do estado JSON embutido no HTML da página ([] se não houver)."""
         try:
-             price = float(price_str.replace('.', '').replace(',', '.'))
-        except:
-            logger.warning(f"   ⚠️ Item skipped ({title[:15]}...): Price parse error '{price_str}'")
+            html = await page.content()
+            deals = await asyncio.to_thread(extract_deals, html)
+        except Exception as e:
+            logger.warning(f"   ⚠️ Estado JSON ilegível: {e}")
+            return []
+        if deals:
+            logger.info(f"   🧩 Estado JSON: {len(deals)} itens")
+        return deals or []
+
+    @staticmethod
+    def _merge_deals(primary: list[Deal], extra: list[Deal]) -> list[Deal]:
+        """`primary` + itens de `extra` ainda não vistos (por product_id/URL)."""
+        seen = {d.product_id or d.url for d in primary}
+        merged = list(primary)
+        for deal in extra:
+            key = deal.product_id or deal.url
+            if key not in seen:
+                seen.add(key)
+                merged.append(deal)
+        return merged
+
+    @timed("scrape.extract")
+    async def _extract_cards_data(self, page, selectors) -> list[dict]:
+        """
+        Extrai os dados brutos de TODOS os cards em um único `page.evaluate`.
+        Usa o primeiro seletor de `selectors` que encontrar cards.
+        """
+        return await page.evaluate(EXTRACT_CARDS_JS, list(selectors))
+
+    async def _extract_deal_from_card(self, card, keyword) -> Deal:
+        """
+        Extrai dados de um card via ElementHandles (1 round trip por campo).
+        Caminho lento mantido para comparação em benchmarks; o fluxo normal usa
+        `_extract_cards_data`. Ambos passam por `_build_deal`.
+        """
+        async def first(*selectors):
+            for selector in selectors:
+                el = await card.query_selector(selector)
+                if el:
+                    return el
             return None
-            
-        # Create Deal
-        deal = Deal(
-            title=title,
-            price=price,
-            url=url,
-            product_id=product_id,
-            store="Mercado Livre",
-            image_url=image_url
-        )
-        deal.discount_percentage = 0 
-        
-        return deal
 
+        async def text_of(el):
+            return await el.inner_text() if el else None
+
+        img_el = await first(CARD_IMAGE_SELECTOR)
+        first_link = await card.query_selector("a")
+        link_el = await first(*CARD_LINK_SELECTORS)
+        price_el = await first(*CARD_PRICE_SELECTORS)
+        cents_el = await price_el.evaluate_handle(
+            "el => el.parentElement && el.parentElement.querySelector('.andes-money-amount__cents')"
+        ) if price_el else None
+        original_el = await first(CARD_ORIGINAL_PRICE_SELECTOR)
+
+        data = {
+            "image_url": (await img_el.get_attribute('data-src') or await img_el.get_attribute('src')) if img_el else None,
+            "image_alt": await img_el.get_attribute('alt') if img_el else None,
+            "title": await text_of(await first(CARD_TITLE_SELECTOR)),
+            "link_text": await text_of(first_link),
+            "has_link": link_el is not None,
+            "href": await link_el.get_attribute('href') if link_el else None,
+            "price": await text_of(price_el),
+            "cents": await text_of(cents_el.as_element()) if cents_el else None,
+            "original_price": await text_of(await original_el.query_selector(".andes-money-amount__fraction") or original_el) if original_el else None,
+            "original_cents": await text_of(await original_el.query_selector(".andes-money-amount__cents")) if original_el else None,
+            "discount": await text_of(await first(CARD_DISCOUNT_SELECTOR)),
+        }
+        return self._build_deal(data, keyword)
+
+    def _build_deal(self, data: dict, keyword) -> Deal:
+        """Monta o Deal a partir dos dados brutos de um card (sem I/O)."""
+        return build_deal(data)
@@ -3,10 +3,10 @@ import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Optional
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+from scrapers.html_parser import parse_html
 from playwright_stealth import Stealth
 from models.trending_term import TrendingTerm
+from core.browser_pool import get_browser_pool, shutdown_browser_pool
 import logging
 
 # Configure logger
@@ -33,11 +33,8 @@ class MercadoLivreTrendsScraper:
     async def fetch_trending_terms(self) -> List[TrendingTerm]:
         """Scrapes trending terms from Mercado Livre."""
         trends = []
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
+        # Pooled contexts already carry the default user agent
+        async with get_browser_pool().acquire() as context:
             page = await context.new_page()
             
             # Apply Stealth
@@ -50,65 +47,7 @@ class MercadoLivreTrendsScraper:
                 await asyncio.sleep(3) # Wait for dynamic content
 
                 content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-
-                # 1. Scrape Main Page Carousels
-                # Carousels: "As buscas que mais cresceram", "As buscas mais desejadas", etc.
-                # Structure: h2 (title) -> div (carousel) -> a.ui-search-entry-container
-                
-                carousels = soup.select(".ui-recommendations-carousel-container")
-                if not carousels:
-                     # Fallback for different layout or specific selectors found in analysis
-                     # Found in analysis: "Ranking/Label", "Trending Term" inside .ui-search-entry-container
-                     pass
-
-                # Strategy based on identified selectors:
-                # Items are 'a.ui-search-entry-container' or similar.
-                # Let's look for specific sections manually if the container class varies.
-                
-                # "As buscas que mais cresceram" usually usually has a distinctive header/wrapper
-                # Let's try a generic approach grabbing all visible trends on main page
-                
-                trend_items = soup.select("a.ui-search-entry-container")
-                if not trend_items:
-                    # Retry with the other selector found in analysis or common variations
-                    trend_items = soup.select(".andes-carousel-snapped__slide a")
-                
-                logger.info(f"Found {len(trend_items)} potential trend items on main page.")
-
-                for i, item in enumerate(trend_items):
-                    try:
-                        # Extract Term
-                        term_el = item.select_one("h3") or item.select_one(".ui-search-entry__title")
-                        if not term_el: continue
-                        term = term_el.get_text(strip=True)
-                        
-                        # Extract URL
-                        url = item.get('href', '')
-                        if not url.startswith('http'):
-                            url = f"https://lista.mercadolivre.com.br{url}"
-
-                        # Extract Rank (if present)
-                        rank = i + 1
-                        rank_el = item.select_one(".ui-search-entry__position") # Hypothetical
-                        
-                        # Simple categorization for now based on page position is hard without strict container context
-                        # We will assume "General" for main page items unless we parse headers
-                        category = "Geral"
-                        trend_type = "Popular" 
-
-                        # Look for section header
-                        # This is tricky with flat list, but let's just grab high value terms
-                        
-                        trends.append(TrendingTerm(
-                            term=term,
-                            category=category,
-                            trend_type=trend_type,
-                            rank=rank,
-                            url=url
-                        ))
-                    except Exception as e:
-                        logger.warning(f"Error parsing trend item: {e}")
+                trends = self.parse_trending_terms(content)
 
                 # 2. Scrape Top Categories (Optional but recommended in plan)
                 # Let's stick to main page first to ensure speed, as per request for "low resource usage"
@@ -123,8 +62,73 @@ class MercadoLivreTrendsScraper:
             except Exception as e:
                 logger.error(f"Error scraping trends: {e}")
             finally:
-                await browser.close()
+                await page.close()
+        
+        return trends
+
+    def parse_trending_terms(self, content: str) -> List[TrendingTerm]:
+        """Extrai os termos em alta do HTML da página de tendências (sem I/O)."""
+        trends = []
+        soup = parse_html(content)
+
+        # 1. Scrape Main Page Carousels
+        # Carousels: "As buscas que mais cresceram", "As buscas mais desejadas", etc.
+        # Structure: h2 (title) -> div (carousel) -> a.ui-search-entry-container
+        
+        carousels = soup.select(".ui-recommendations-carousel-container")
+        if not carousels:
+             # Fallback for different layout or specific selectors found in analysis
+             # Found in analysis: "Ranking/Label", "Trending Term" inside .ui-search-entry-container
+             pass
+
+        # Strategy based on identified selectors:
+        # Items are 'a.ui-search-entry-container' or similar.
+        # Let's look for specific sections manually if the container class varies.
+        
+        # "As buscas que mais cresceram" usually usually has a distinctive header/wrapper
+        # Let's try a generic approach grabbing all visible trends on main page
         
+        trend_items = soup.select("a.ui-search-entry-container")
+        if not trend_items:
+            # Retry with the other selector found in analysis or common variations
+            trend_items = soup.select(".andes-carousel-snapped__slide a")
+        
+        logger.info(f"Found {len(trend_items)} potential trend items on main page.")
+
+        for i, item in enumerate(trend_items):
+            try:
+                # Extract Term
+                term_el = item.select_one("h3") or item.select_one(".ui-search-entry__title")
+                if not term_el: continue
+                term = term_el.get_text(strip=True)
+                
+                # Extract URL
+                url = item.get('href', '')
+                if not url.startswith('http'):
+                    url = f"https://lista.mercadolivre.com.br{url}"
+
+                # Extract Rank (if present)
+                rank = i + 1
+                rank_el = item.select_one(".ui-search-entry__position") # Hypothetical
+                
+                # Simple categorization for now based on page position is hard without strict container context
+                # We will assume "General" for main page items unless we parse headers
+                category = "Geral"
+                trend_type = "Popular" 
+
+                # Look for section header
+                # This is tricky with flat list, but let's just grab high value terms
+                
+                trends.append(TrendingTerm(
+                    term=term,
+                    category=category,
+                    trend_type=trend_type,
+                    rank=rank,
+                    url=url
+                ))
+            except Exception as e:
+                logger.warning(f"Error parsing trend item: {e}")
+
         return trends
 
     def _is_cache_valid(self) -> bool:
@@ -167,4 +171,11 @@ if __name__ == "__main__":
     # Test run
     logging.basicConfig(level=logging.INFO)
     scraper = MercadoLivreTrendsScraper()
-    asyncio.run(scraper.get_cached_trends())
+
+    async def _main():
+        try:
+            await scraper.get_cached_trends()
+        finally:
+            await shutdown_browser_pool()
+
+    asyncio.run(_main())
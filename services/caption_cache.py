@@ -0,0 +1,109 @@
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config.logger import logger
+
+CAPTION_CACHE_FILE = os.getenv("CAPTION_CACHE_FILE", "data/caption_cache.json")
+CAPTION_CACHE_TTL_HOURS = float(os.getenv("CAPTION_CACHE_TTL_HOURS", "72"))
+CAPTION_CACHE_MAX_ENTRIES = 2000
+PRICE_BUCKET_STEP = 1.10  # Faixas de ~10%: R$ 99,90 e R$ 97,50 caem na mesma
+
+
+def price_bucket(price: float) -> int:
+    """Faixa logarítmica do preço (pequenas variações não invalidam a legenda)."""
+    if not price or price <= 0:
+        return 0
+    return int(math.log(price) / math.log(PRICE_BUCKET_STEP))
+
+
+def caption_key(category: str, clean_title: str, price: float) -> str:
+    return f"{category}|{' '.join(clean_title.lower().split())}|{price_bucket(price)}"
+
+
+class CaptionCache:
+    """
+    Cache das legendas geradas pelo Gemini: (categoria, título limpo, faixa de preço) -> legenda.
+
+    LRU limitado com TTL, persistido em JSON (sobrevive a restarts). A escrita é
+    atômica (arquivo temporário + os.replace) e só acontece em `save()` se algo
+    mudou. Usa relógio de parede (time.time) porque os timestamps vão para o disco.
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: float = None, max_entries: int = CAPTION_CACHE_MAX_ENTRIES):
+        self.path = path if path is not None else CAPTION_CACHE_FILE
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else CAPTION_CACHE_TTL_HOURS * 3600
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._dirty = False
+
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            caption, stored_at = entry
+            if time.time() - stored_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return caption
+            del self._entries[key]
+            self._dirty = True
+        self.misses += 1
+        return None
+
+    def put(self, key: str, caption: str):
+        self._entries[key] = (caption, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # --- Persistência ---
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            for key, (caption, stored_at) in sorted(data.items(), key=lambda item: item[1][1]):
+                if now - stored_at < self.ttl_seconds:
+                    self._entries[key] = (caption, stored_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except Exception as e:
+            logger.error(f"Erro carregando cache de legendas: {e}")
+
+    def save(self):
+        if not self._dirty or not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({k: list(v) for k, v in self._entries.items()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Erro salvando cache de legendas: {e}")
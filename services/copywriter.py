@@ -1,11 +1,23 @@
+import asyncio
+import json
 import os
-import re
+import time
+from collections import deque
+from typing import List
+
 from google import genai
 from models.deal import Deal
 from dotenv import load_dotenv
+from core.metrics import span
+from services.caption_cache import CaptionCache, caption_key
+from utils.title_taxonomy import analyze_title
 
 load_dotenv()
 
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "2"))    # Chamadas simultâneas ao Gemini
+CAPTION_BATCH_SIZE = int(os.getenv("CAPTION_BATCH_SIZE", "8"))    # Deals por chamada em lote
+CAPTION_DEADLINE = float(os.getenv("CAPTION_DEADLINE", "8"))     # Segundos de espera pela legenda no envio
+
 class Copywriter:
     # PROMPTS ESPECIALIZADOS (1 agente = 1 função)
     PROMPTS = {
@@ -102,87 +114,113 @@ Exemplos:
 🖼 OPORTUNIDADE ÚNICA"""
     }
 
-    def __init__(self):
+    # Fallback por categoria (erro/timeout da IA)
+    FALLBACKS = {
+        'calcado': '🖼 PISANTE NOVO 👟',
+        'roupa_feminina': '🖼 PRA ELA 🙋‍♀️',
+        'roupa_masculina': '🖼 PRA ELE 🙋‍♂️',
+        'perfumaria': '🖼 CHEIROSO DEMAIS',
+        'eletronico': '🖼 TECH NA PROMO',
+        'casa': '🖼 PRA SUA CASA',
+        'geral': '🖼 OFERTA RELÂMPAGO ⚡'
+    }
+
+    BATCH_PROMPT = """Você é copywriter de promoções. Para CADA produto abaixo, crie APENAS um título curto (máx 5 palavras).
+Comece com 🖼. Siga o estilo dos exemplos da categoria. Não explique.
+
+Responda SOMENTE com JSON: [{{"id": 1, "caption": "🖼 ..."}}, ...]
+
+Exemplos por categoria:
+{examples}
+
+Produtos:
+{items}"""
+
+    def __init__(self, client=None, cache: CaptionCache = None, concurrency: int = None, batch_size: int = None, deadline: float = None):
+        self.cache = cache if cache is not None else CaptionCache()
+        self.deadline = deadline if deadline is not None else CAPTION_DEADLINE
+        self._prefetched = {}  # chave do cache -> (task do lote, índice, deadline)
+        self.semaphore = asyncio.Semaphore(concurrency or GEMINI_CONCURRENCY)
+        self.batch_size = batch_size or CAPTION_BATCH_SIZE
+        # Único modelo que conectou (mesmo com cota limitada)
+        self.model_name = 'gemini-2.0-flash-exp'
+
+        # Métricas das chamadas ao Gemini
+        self.calls = 0
+        self.batch_calls = 0
+        self.errors = 0
+        self.deadline_misses = 0
+        self.latencies = deque(maxlen=200)
+
         self.api_key = os.getenv("GEMINI_API_KEY")
+        if client is not None:
+            self.client = client
+            return
         if not self.api_key:
             print("⚠️ GEMINI_API_KEY não encontrada. Copywriting desativado.")
             self.client = None
             return
 
         self.client = genai.Client(api_key=self.api_key)
-        # Único modelo que conectou (mesmo com cota limitada)
-        self.model_name = 'gemini-2.0-flash-exp' 
-
 
     def _clean_title(self, title: str) -> str:
         """Limpa ruídos comuns de títulos de e-commerce."""
-        noise_words = [
-            "Frete Grátis", "Frete Gratis", "Promoção", "Oferta", 
-            "Original", "Envio Imediato", "Full", "Melhor Preço",
-            "Pronta Entrega", "Novo", "Lacrado", "Nota Fiscal", "NF"
-        ]
-        clean_title = title
-        for word in noise_words:
-            # Case insensitive remove
-            clean_title = re.sub(re.escape(word), "", clean_title, flags=re.IGNORECASE)
-        
-        # Remove caracteres estranhos no inicio
-        clean_title = clean_title.strip(" -|[]()")
-        # Remove excesso de espaços
-        return " ".join(clean_title.split())
+        return analyze_title(title).clean_title
 
     def _classify_product(self, title: str, price: float) -> str:
         """
         Classifica produto SEM criatividade. Só categorização.
         Retorna: 'calcado' | 'roupa_feminina' | 'roupa_masculina' | 'perfumaria' | 'eletronico' | 'casa' | 'geral'
         """
-        title_lower = title.lower()
-        
-        # Calçados (prioridade alta - inclui Crocs)
-        if any(word in title_lower for word in ['tênis', 'tenis', 'chinelo', 'sandália', 'sandalia', 'crocs', 'sapato', 'bota']):
-            return 'calcado'
-        
-        # Roupas (detecta gênero)
-        roupa_keywords = ['camiseta', 'camisa', 'blusa', 'vestido', 'saia', 'calça', 'calca', 'short', 'bermuda', 'cueca', 'calcinha', 'sutiã', 'sutia']
-        if any(word in title_lower for word in roupa_keywords):
-            if any(fem in title_lower for fem in ['feminina', 'feminino', 'mulher', 'ela']):
-                return 'roupa_feminina'
-            elif any(masc in title_lower for masc in ['masculina', 'masculino', 'homem', 'ele']):
-                return 'roupa_masculina'
-            else:
-                # Tenta inferir por palavras específicas
-                if any(word in title_lower for word in ['vestido', 'saia', 'calcinha', 'sutiã']):
-                    return 'roupa_feminina'
-                elif any(word in title_lower for word in ['cueca']):
-                    return 'roupa_masculina'
-                else:
-                    return 'roupa_masculina'  # Default (maioria das ofertas)
-        
-        # Perfumaria
-        if any(word in title_lower for word in ['perfume', 'colônia', 'colonia', 'desodorante', 'deo', 'fragrância', 'fragrancia', 'eau de']):
-            return 'perfumaria'
-        
-        # Eletrônicos
-        if any(word in title_lower for word in ['notebook', 'celular', 'smartphone', 'fone', 'headphone', 'tablet', 'tv', 'mouse', 'teclado', 'monitor']):
-            return 'eletronico'
-        
-        # Casa
-        if any(word in title_lower for word in ['mesa', 'cadeira', 'sofá', 'sofa', 'cama', 'colchão', 'colchao', 'travesseiro', 'panela', 'frigideira']):
-            return 'casa'
-        
-        # Geral (fallback)
-        return 'geral'
+        return analyze_title(title).category
+
+    def _prepare(self, deal: Deal):
+        """Limpeza + classificação: (título limpo, categoria, chave do cache)."""
+        info = analyze_title(deal.title)  # Uma passada: título limpo + categoria
+        return info.clean_title, info.category, caption_key(info.category, info.clean_title, deal.price)
+
+    @staticmethod
+    def _clean_caption(text: str) -> str:
+        text = (text or "").replace("**", "").strip()
+        if text.startswith('"') and text.endswith('"'):
+            text = text[1:-1]
+        return text.strip()
+
+    async def _call(self, prompt: str, max_output_tokens: int, batch: bool = False, **config) -> str:
+        """Chamada ao Gemini com limite de concorrência e latência medida."""
+        async with self.semaphore, span("caption"):
+            start = time.perf_counter()
+            self.calls += 1
+            if batch:
+                self.batch_calls += 1
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt,
+                    config={
+                        'temperature': 0.8,  # Menos criativo = mais consistente
+                        'top_p': 0.9,
+                        'max_output_tokens': max_output_tokens,
+                        **config,
+                    }
+                )
+                return response.text
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.latencies.append(time.perf_counter() - start)
 
     async def generate_caption(self, deal: Deal) -> str:
         """Gera headline estilo 'Promo Out of Context' usando CLASSIFIER PATTERN."""
         if not self.client:
             return f"🖼 OPORTUNIDADE ⚡"
 
-        # ETAPA 1: LIMPEZA (pré-processamento)
-        clean_title = self._clean_title(deal.title)
-
-        # ETAPA 2: CLASSIFICAÇÃO (decisão no código, não na IA)
-        category = self._classify_product(clean_title, deal.price)
+        # ETAPA 1 e 2: LIMPEZA + CLASSIFICAÇÃO (decisão no código, não na IA)
+        clean_title, category, key = self._prepare(deal)
+        cached = self.cache.get(key)
+        if cached:
+            return cached
 
         # ETAPA 3: ESCOLHE PROMPT ESPECIALIZADO
         prompt_template = self.PROMPTS.get(category, self.PROMPTS['geral'])
@@ -190,30 +228,173 @@ Exemplos:
 
         # ETAPA 4: IA SÓ EXECUTA (sem decidir papel)
         try:
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config={
-                    'temperature': 0.8,  # Menos criativo = mais consistente
-                    'top_p': 0.9,
-                    'max_output_tokens': 50,  # Título curto
-                }
-            )
-            text = response.text.replace("**", "").strip()
-            if text.startswith('"') and text.endswith('"'):
-                text = text[1:-1]
-            return text
+            text = self._clean_caption(await self._call(prompt, max_output_tokens=50))  # Título curto
+        except Exception as e:
+            print(f"❌ Erro na IA Copywriter: {e}")
+            text = ""
+        if not text:
+            return self.FALLBACKS.get(category, self.FALLBACKS['geral'])
+        self.cache.put(key, text)
+        self.cache.save()
+        return text
+
+    async def generate_captions(self, deals: List[Deal]) -> List[str]:
+        """
+        Legendas de vários deals (mesma ordem), com uma chamada ao Gemini por
+        lote de `batch_size` itens ainda fora do cache. Itens que faltarem na
+        resposta (ou lote com erro) recebem o fallback da categoria.
+        """
+        if not self.client:
+            return ["🖼 OPORTUNIDADE ⚡" for _ in deals]
+
+        prepared = [self._prepare(deal) for deal in deals]
+        captions = {}
+        pending = {}  # chave -> (deal, título limpo, categoria); repetidos no lote viram 1 item
+        for deal, (clean_title, category, key) in zip(deals, prepared):
+            if key in captions or key in pending:
+                continue
+            cached = self.cache.get(key)
+            if cached:
+                captions[key] = cached
+            else:
+                pending[key] = (deal, clean_title, category)
+
+        items = list(pending.items())
+        chunks = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        for generated in await asyncio.gather(*(self._generate_batch(chunk) for chunk in chunks)):
+            captions.update(generated)
+        if pending:
+            self.cache.save()
+
+        return [captions.get(key) or self.FALLBACKS.get(category, self.FALLBACKS['geral']) for _, category, key in prepared]
+
+    def prefetch(self, deals: List[Deal]):
+        """
+        Começa a gerar as legendas em background (lotes concorrentes sob o
+        semáforo) assim que os deals do canal são conhecidos; `caption_for`
+        só espera o resultado no envio.
+        """
+        if not self.client:
+            return
+        now = time.monotonic()
+        for key, (task, _, deadline) in list(self._prefetched.items()):
+            if task.done() and now - deadline > 300:
+                del self._prefetched[key]  # Pré-gerado e nunca enviado
+
+        fresh, keys = [], set()
+        for deal in deals:
+            key = self._prepare(deal)[2]
+            if key not in self._prefetched and key not in keys:
+                fresh.append(deal)
+                keys.add(key)
+        if not fresh:
+            return
+        deadline = now + self.deadline
+        task = asyncio.ensure_future(self.generate_captions(fresh))
+        for i, deal in enumerate(fresh):
+            self._prefetched[self._prepare(deal)[2]] = (task, i, deadline)
+
+    async def caption_for(self, deal: Deal) -> str:
+        """
+        Legenda para o envio: usa a pré-geração (`prefetch`) ou gera agora.
+        Passado o deadline do deal, usa o fallback da categoria (a geração
+        continua e alimenta o cache).
+        """
+        if not self.client:
+            return await self.generate_caption(deal)
+        _, category, key = self._prepare(deal)
+        entry = self._prefetched.pop(key, None)
+        if entry:
+            task, index, deadline = entry
+            timeout = max(0.0, deadline - time.monotonic())
+        else:
+            task, index, timeout = asyncio.ensure_future(self.generate_caption(deal)), None, self.deadline
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), timeout)
+            return result[index] if index is not None else result
+        except asyncio.TimeoutError:
+            self.deadline_misses += 1
+            print(f"⏱️ Legenda não ficou pronta a tempo: {deal.title[:40]}")
         except Exception as e:
             print(f"❌ Erro na IA Copywriter: {e}")
-            # Fallback baseado na categoria
-            fallbacks = {
-                'calcado': '🖼 PISANTE NOVO 👟',
-                'roupa_feminina': '🖼 PRA ELA 🙋‍♀️',
-                'roupa_masculina': '🖼 PRA ELE 🙋‍♂️',
-                'perfumaria': '🖼 CHEIROSO DEMAIS',
-                'eletronico': '� TECH NA PROMO',
-                'casa': '🖼 PRA SUA CASA',
-                'geral': '🖼 OFERTA RELÂMPAGO ⚡'
-            }
-            return fallbacks.get(category, '🖼 OFERTA RELÂMPAGO ⚡')
+        return self.FALLBACKS.get(category, self.FALLBACKS['geral'])
+
+    async def _generate_batch(self, chunk: list) -> dict:
+        categories = []
+        lines = []
+        for i, (_, (deal, clean_title, category)) in enumerate(chunk, 1):
+            if category not in categories:
+                categories.append(category)
+            lines.append(f"{i}. [{category}] {clean_title} - R$ {deal.price:.2f}")
+        examples = "\n".join(f"{c}: {' | '.join(self._examples(c))}" for c in categories)
+        prompt = self.BATCH_PROMPT.format(examples=examples, items="\n".join(lines))
 
+        try:
+            reply = await self._call(
+                prompt, max_output_tokens=40 * len(chunk) + 20, batch=True,
+                response_mime_type='application/json',
+            )
+            parsed = self._parse_batch_reply(reply)
+        except Exception as e:
+            print(f"❌ Erro na IA Copywriter (lote de {len(chunk)}): {e}")
+            return {}
+
+        generated = {}
+        for i, (key, _) in enumerate(chunk, 1):
+            text = self._clean_caption(parsed.get(i))
+            if text:
+                generated[key] = text
+                self.cache.put(key, text)
+        return generated
+
+    def _examples(self, category: str) -> List[str]:
+        prompt = self.PROMPTS.get(category, self.PROMPTS['geral'])
+        return [line.strip() for line in prompt.split("Exemplos:")[-1].strip().splitlines() if line.strip()]
+
+    @staticmethod
+    def _parse_batch_reply(text: str) -> dict:
+        """Resposta do lote -> {id: legenda}. Aceita lista de objetos ou objeto {id: legenda}."""
+        text = (text or "").strip()
+        if text.startswith("```"):
+            text = text.strip("`").split("\n", 1)[-1]  # Bloco ```json ... ```
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = [{"id": k, "caption": v} for k, v in data.items()]
+        parsed = {}
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            try:
+                parsed[int(item.get("id"))] = str(item.get("caption") or "")
+            except (TypeError, ValueError):
+                continue
+        return parsed
+
+    def stats(self) -> dict:
+        """Métricas das chamadas (latência em segundos) e do cache."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {
+            "calls": self.calls,
+            "batch_calls": self.batch_calls,
+            "errors": self.errors,
+            "deadline_misses": self.deadline_misses,
+            "p50_s": percentile(0.50),
+            "p95_s": percentile(0.95),
+            "cache": self.cache.stats(),
+        }
+
+
+_copywriter = None
+
+
+def get_copywriter() -> Copywriter:
+    """Copywriter global do processo (cache e métricas compartilhados entre canal e aprovações)."""
+    global _copywriter
+    if _copywriter is None:
+        _copywriter = Copywriter()
+    return _copywriter
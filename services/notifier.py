@@ -1,23 +1,275 @@
 import os
 import asyncio
+import bisect
 import html
+import itertools
+import time
+from datetime import timedelta
+from typing import Optional
 from telegram import Bot, Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.constants import ParseMode
+from telegram.error import RetryAfter, NetworkError, BadRequest
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
 from dotenv import load_dotenv
 from models.deal import Deal
 from telegram.request import HTTPXRequest
-from services.copywriter import Copywriter
+from services.copywriter import get_copywriter
 from scrapers.mercadolivre_api import MercadoLivreAPI
+from core.metrics import span
+from core.outbox import decode_approval_id
 
 load_dotenv()
 
+# Limites do Telegram (https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this)
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))                  # msgs/s no total
+TELEGRAM_CHANNEL_RATE_PER_MIN = float(os.getenv("TELEGRAM_CHANNEL_RATE_PER_MIN", "20"))  # msgs/min por canal/grupo
+TELEGRAM_PRIVATE_RATE = float(os.getenv("TELEGRAM_PRIVATE_RATE", "1"))                  # msgs/s por chat privado
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))                        # Envios seguidos por chat
+PUBLISH_MAX_RETRIES = int(os.getenv("PUBLISH_MAX_RETRIES", "5"))
+
+PRIORITY_APPROVAL = 0  # Aprovações do admin furam a fila do canal
+PRIORITY_CHANNEL = 1
+
+
+def _seconds(value) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class TokenBucket:
+    """
+    Token bucket com relógio injetável (os testes usam relógio simulado).
+
+    `rate` tokens/s, acumulando até `capacity`. `throttle(retry_after)`
+    bloqueia o bucket pelo tempo pedido pelo Telegram e corta a taxa pela
+    metade; cada envio bem-sucedido devolve 10% da taxa base (AIMD).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, clock=time.monotonic, min_rate: float = None):
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 8
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.blocked_until = float("-inf")
+
+    def _refill(self, now: float):
+        # Bloqueado (RetryAfter) não acumula tokens
+        start = max(self.updated, self.blocked_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = max(self.updated, now)
+
+    def delay(self, now: float = None) -> float:
+        """Segundos até haver 1 token (0 = pode enviar já)."""
+        now = self.clock() if now is None else now
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 - 1e-9 else (1 - self.tokens) / self.rate  # Tolerância de float
+        return max(wait, self.blocked_until - now, 0.0)
+
+    def consume(self, now: float = None):
+        self._refill(self.clock() if now is None else now)
+        self.tokens -= 1
+
+    def throttle(self, retry_after: float, now: float = None):
+        now = self.clock() if now is None else now
+        self._refill(now)
+        self.tokens = 1.0  # Exatamente 1 envio liberado quando o bloqueio acabar
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self):
+        self._refill(self.clock())
+        self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+
+class _PublishJob:
+    __slots__ = ("priority", "seq", "deal", "to_admin", "approval_id", "chat_id", "future", "attempts", "not_before")
+
+    def __init__(self, priority, seq, deal, to_admin, approval_id, chat_id, future):
+        self.priority = priority
+        self.seq = seq
+        self.deal = deal
+        self.to_admin = to_admin
+        self.approval_id = approval_id
+        self.chat_id = chat_id
+        self.future = future
+        self.attempts = 0
+        self.not_before = float("-inf")
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class TelegramPublisher:
+    """
+    Fila de publicação em background com pacing por token bucket.
+
+    - 1 bucket por chat (canal: TELEGRAM_CHANNEL_RATE_PER_MIN; admin/privado:
+      TELEGRAM_PRIVATE_RATE) + 1 bucket global (TELEGRAM_GLOBAL_RATE).
+    - Prioridade: aprovações do admin saem antes dos posts do canal; dentro
+      da mesma faixa, ordem de chegada. Um chat esperando token não segura
+      os outros.
+    - RetryAfter: bloqueia o chat pelo tempo pedido, reduz a taxa dele e
+      reenfileira o item na mesma posição. Erros de rede: backoff
+      exponencial. BadRequest/outros: falha definitiva.
+
+    `enqueue` não bloqueia: devolve um Future que resolve após o envio.
+    """
+
+    def __init__(
+        self,
+        notifier,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+        global_rate: float = None,
+        channel_rate_per_min: float = None,
+        private_rate: float = None,
+        burst: int = None,
+        max_retries: int = None,
+    ):
+        self.notifier = notifier
+        self.clock = clock
+        self.sleep = sleep
+        self.channel_rate = (channel_rate_per_min or TELEGRAM_CHANNEL_RATE_PER_MIN) / 60
+        self.private_rate = private_rate or TELEGRAM_PRIVATE_RATE
+        self.burst = burst or TELEGRAM_CHAT_BURST
+        self.max_retries = PUBLISH_MAX_RETRIES if max_retries is None else max_retries
+        global_rate = global_rate or TELEGRAM_GLOBAL_RATE
+        self._global = TokenBucket(global_rate, capacity=global_rate, clock=clock)
+        self._buckets = {}
+        self._jobs = []  # Ordenada por (prioridade, chegada)
+        self._seq = itertools.count()
+        self._outstanding = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            is_channel = str(chat_id) == str(self.notifier.chat_id)
+            rate = self.channel_rate if is_channel else self.private_rate
+            bucket = self._buckets[chat_id] = TokenBucket(rate, capacity=self.burst, clock=self.clock)
+        return bucket
+
+    def enqueue(self, deal: Deal, to_admin: bool = False, approval_id: str = None) -> asyncio.Future:
+        """
+        Agenda o envio e retorna na hora; o Future resolve após o envio (ou com o erro final).
+        `approval_id` vai no callback_data dos botões de aprovação.
+        """
+        future = asyncio.get_running_loop().create_future()
+        priority = PRIORITY_APPROVAL if to_admin else PRIORITY_CHANNEL
+        job = _PublishJob(priority, next(self._seq), deal, to_admin, approval_id, self.notifier.target_chat(to_admin), future)
+        bisect.insort(self._jobs, job)
+        self._outstanding.add(future)
+        future.add_done_callback(self._outstanding.discard)
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return future
+
+    def pending(self) -> int:
+        return len(self._outstanding)
+
+    async def join(self):
+        """Espera tudo que já foi enfileirado ser enviado (ou falhar)."""
+        while self._outstanding:
+            await asyncio.gather(*list(self._outstanding), return_exceptions=True)
+
+    async def close(self):
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        for job in self._jobs:
+            job.future.cancel()
+        self._jobs.clear()
+
+    def _next_ready(self):
+        """(job pronto, 0) ou (None, segundos até o próximo ficar pronto | None se vazia)."""
+        now = self.clock()
+        global_wait = self._global.delay(now)
+        best_wait = None
+        for i, job in enumerate(self._jobs):
+            wait = max(global_wait, self._bucket(job.chat_id).delay(now), job.not_before - now)
+            if wait <= 0:
+                del self._jobs[i]
+                return job, 0.0
+            best_wait = wait if best_wait is None else min(best_wait, wait)
+        return None, best_wait
+
+    async def _run(self):
+        while True:
+            job, wait = self._next_ready()
+            if job is None:
+                self._wakeup.clear()
+                if wait is None:
+                    await self._wakeup.wait()
+                else:
+                    await self._sleep_or_wakeup(wait)
+                continue
+            if job.future.done():
+                continue  # Cancelado por quem enfileirou
+            await self._deliver(job)
+
+    async def _sleep_or_wakeup(self, wait: float):
+        # Item novo (ex.: aprovação) pode estar pronto antes do fim da espera
+        sleeper = asyncio.ensure_future(self.sleep(wait))
+        waker = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            await asyncio.wait({sleeper, waker}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sleeper.cancel()
+            waker.cancel()
+
+    async def _deliver(self, job: _PublishJob):
+        now = self.clock()
+        bucket = self._bucket(job.chat_id)
+        bucket.consume(now)
+        self._global.consume(now)
+        try:
+            await self.notifier.deliver_deal(job.deal, job.to_admin, approval_id=job.approval_id)
+        except RetryAfter as e:
+            retry_after = _seconds(e.retry_after)
+            print(f"⏳ Flood control do Telegram ({job.chat_id}): aguardando {retry_after:.0f}s")
+            bucket.throttle(retry_after)
+            self._retry(job, e)
+        except BadRequest as e:
+            self._fail(job, e)
+        except NetworkError as e:
+            job.not_before = self.clock() + 2 ** job.attempts
+            self._retry(job, e)
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            bucket.recover()
+            if not job.future.done():
+                job.future.set_result(True)
+
+    def _retry(self, job: _PublishJob, error: Exception):
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            self._fail(job, error)
+        else:
+            bisect.insort(self._jobs, job)  # Mesma prioridade/seq: volta para a mesma posição
+
+    def _fail(self, job: _PublishJob, error: Exception):
+        print(f"Erro envio {'admin' if job.to_admin else 'canal'}: {error}")
+        if not job.future.done():
+            job.future.set_exception(error)
+
+
 class TelegramNotifier:
     def __init__(self):
         self.token = os.getenv("TELEGRAM_BOT_TOKEN")
         self.chat_id = os.getenv("TELEGRAM_CHAT_ID")
         self.app = None
-        self.copywriter = Copywriter()
+        self.copywriter = get_copywriter()
+        self.publisher = TelegramPublisher(self)
+        self.outbox = None  # core.outbox.Outbox, ligada pelo run_bot (fecha aprovações)
 
         if self.token:
             # Configurando timeouts via HTTPXRequest
@@ -30,15 +282,18 @@ class TelegramNotifier:
                 .build()
             )
 
-    async def send_deal(self, deal: Deal, to_admin: bool = False):
-        target_id = self.chat_id
+    def target_chat(self, to_admin: bool = False) -> Optional[str]:
+        """Chat de destino: admin (aprovação) ou canal."""
         if to_admin:
             admin_id = os.getenv("ADMIN_USER_ID")
-            if not admin_id:
-                print("ADMIN_USER_ID não configurado. Enviando para o canal padrão.")
-                target_id = self.chat_id # Fallback
-            else:
-                target_id = admin_id
+            if admin_id:
+                return admin_id
+            print("ADMIN_USER_ID não configurado. Enviando para o canal padrão.")
+        return self.chat_id # Fallback
+
+    async def deliver_deal(self, deal: Deal, to_admin: bool = False, approval_id: str = None):
+        """Monta e envia a mensagem; erros do Telegram (RetryAfter etc.) sobem para quem chamou."""
+        target_id = self.target_chat(to_admin)
 
         if not self.app or not target_id:
             print(f"Telegram not configured. Deal: {deal.title}")
@@ -64,14 +319,15 @@ class TelegramNotifier:
             message += f"🔗 <a href='{link_url}'>Clique aqui para ver</a>"
             
             # Botões
+            suffix = f":{approval_id}" if approval_id else ""
             keyboard = [[
-                InlineKeyboardButton("✅ Aprovar", callback_data="approve"),
-                InlineKeyboardButton("❌ Rejeitar", callback_data="reject")
+                InlineKeyboardButton("✅ Aprovar", callback_data=f"approve{suffix}"),
+                InlineKeyboardButton("❌ Rejeitar", callback_data=f"reject{suffix}")
             ]]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             # Envio simples para Admin
-            try:
+            async with span("telegram.send"):
                 if deal.image_url and deal.image_url.startswith("http"):
                     await self.app.bot.send_photo(
                         chat_id=target_id, photo=deal.image_url, caption=message, 
@@ -82,14 +338,13 @@ class TelegramNotifier:
                         chat_id=target_id, text=message, 
                         parse_mode=ParseMode.HTML, reply_markup=reply_markup
                     )
-            except Exception as e:
-                print(f"Erro envio admin: {e}")
 
         else:
             # --- FORMATO "PROMO OUT OF CONTEXT" (Final) ---
             
-            # 1. Gera Hook com IA (Já configurada para estilo curto)
-            ai_hook = await self.copywriter.generate_caption(deal)
+            # 1. Hook com IA (normalmente já pré-gerado pelo pipeline; deadline -> fallback)
+            async with span("caption.wait"):
+                ai_hook = await self.copywriter.caption_for(deal)
             
             # 2. Formatação de Preço
             def format_currency(value):
@@ -128,7 +383,7 @@ class TelegramNotifier:
             message += f"{link_url}"
             
             # Envio para Canal
-            try:
+            async with span("telegram.send"):
                 if deal.image_url and deal.image_url.startswith("http"):
                     await self.app.bot.send_photo(
                         chat_id=target_id, photo=deal.image_url, caption=message, parse_mode=ParseMode.HTML
@@ -137,110 +392,50 @@ class TelegramNotifier:
                     await self.app.bot.send_message(
                         chat_id=target_id, text=message, parse_mode=ParseMode.HTML
                     )
-            except Exception as e:
-                print(f"Erro envio canal: {e}")
 
     async def _handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Processa os cliques nos botões de Aprovar/Rejeitar"""
+        """Processa os cliques nos botões de Aprovar/Rejeitar ("approve:<id>" / "reject:<id>")."""
         query = update.callback_query
         await query.answer()
 
-        data = query.data
+        action, _, token = query.data.partition(":")
+        entry_id = decode_approval_id(token)
         message = query.message
-        
-        if data == "reject":
+
+        if action not in ("approve", "reject"):
+            return
+        if entry_id is None or self.outbox is None:
+            # Botões de antes dos registros de aprovação (só "approve"/"reject")
+            await message.reply_text("⚠️ Aprovação sem registro (mensagem antiga). Reenvie a oferta.")
+            return
+
+        # O(1) no LRU (ou 1 SELECT no spill); None = já processada ou duplo clique
+        entry = await self.outbox.claim(entry_id)
+        if entry is None:
+            await message.reply_text("ℹ️ Oferta já processada.")
+            return
+
+        if action == "reject":
+            await self.outbox.resolve(entry_id, approved=False, entry=entry)
             await message.delete()
-        
-        elif data == "approve":
-            text = message.caption or message.text
-            lines = [l.strip() for l in text.split('\n') if l.strip()]
-            
-            try:
-                # Extração
-                title = lines[1]
-                
-                # Extrair Preço e Original
-                import re
-                prices_line = ""
-                for l in lines:
-                    if "💰" in l:
-                        prices_line = l
-                        break
-                
-                price = 0.0
-                original_price = 0.0
-                
-                # Regex Price:  R$ 1.234,56
-                price_match = re.search(r'R\$ ([\d.,]+)', prices_line)
-                if price_match:
-                    price = float(price_match.group(1).replace(".", "").replace(",", "."))
-                
-                # Regex Original: (Era R$ 1.234,56)
-                orig_match = re.search(r'\(Era R\$ ([\d.,]+)\)', prices_line)
-                if orig_match:
-                    original_price = float(orig_match.group(1).replace(".", "").replace(",", "."))
-                
-                # Extrair Link
-                url = None
-                if message.caption_entities:
-                     for entity in message.caption_entities:
-                        if entity.type == 'text_link':
-                            url = entity.url
-                            break
-                if not url:
-                     link_match = re.search(r"href='([^']+)'", message.caption_html or message.text_html)
-                     if link_match: url = link_match.group(1)
-                
-                # Criar Deal Temporário
-                temp_deal = Deal(title=title, price=price, url=url, store="Mercado Livre")
-                temp_deal.original_price = original_price
-                
-                print(f"🔄 Processando Aprovação: {temp_deal.title}")
-                print(f"🔗 URL Original: {temp_deal.url}")
+            return
 
-                # --- SIMPLIFICAÇÃO MVP: Confiar no link já encurtado ---
-                # O main.py já encurtou antes de mandar para aprovação.
-                # Não precisamos chamar a API de novo (que estava causando erro).
-                
-                if temp_deal.url:
-                    print(f"✅ Aprovação processada: {temp_deal.url}")
-                else:
-                    print("⚠️ URL não encontrada na mensagem original.")
-                # ---------------------------------------------
-                
-                # Gerar Copy IA
-                await message.edit_caption(caption="⏳ Gerando Copy com IA...")
-                ai_copy = await self.copywriter.generate_caption(temp_deal)
-                
-                # Formatar Mensagem Final
-                final_message = f"🔥 <b>{ai_copy.upper()}</b>\n\n"
-                final_message += f"{temp_deal.title}\n\n"
-                final_message += f"💰 <b>R$ {price:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") + "</b>\n\n"
-                final_message += f"📦 <b>Mercado Livre</b>\n"
-                final_message += f"🔗 <a href='{temp_deal.url}'>VER OFERTA</a>"
-                
-                # Postar no Canal Oficial
-                if message.photo:
-                    photo_id = message.photo[-1].file_id
-                    await self.app.bot.send_photo(
-                        chat_id=self.chat_id,
-                        photo=photo_id,
-                        caption=final_message,
-                        parse_mode=ParseMode.HTML
-                    )
-                else:
-                    await self.app.bot.send_message(
-                        chat_id=self.chat_id,
-                        text=final_message,
-                        parse_mode=ParseMode.HTML
-                    )
-                
-                # Limpar mensagem de admin
-                await message.delete()
+        deal = entry['deal']
+        try:
+            print(f"🔄 Processando Aprovação: {deal.title}")
+            # Mesmo formato (e mesmo pacing) dos posts automáticos
+            await self.publisher.enqueue(deal, to_admin=False)
+            # Registra no DB (queda de preço) e fecha o item da outbox
+            await self.outbox.resolve(entry_id, approved=True, entry=entry)
+            print(f"✅ Aprovação processada: {deal.affiliate_url or deal.url}")
 
-            except Exception as e:
-                print(f"Erro ao aprovar oferta: {e}")
-                await message.reply_text(f"Erro ao processar aprovação: {e}")
+            # Limpar mensagem de admin
+            await message.delete()
+
+        except Exception as e:
+            self.outbox.release(entry)
+            print(f"Erro ao aprovar oferta: {e}")
+            await message.reply_text(f"Erro ao processar aprovação: {e}")
 
     async def start_listening(self, command_handlers: dict):
         if not self.app: return
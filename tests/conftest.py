@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from models.deal import Deal
+
+
+def make_deal(pid="MLB-1", price=100.0, title=None, **fields):
+    """Deal de teste: `pid` vira product_id e URL; demais campos do Deal por keyword."""
+    fields.setdefault("url", f"https://produto.mercadolivre.com.br/{pid}")
+    fields.setdefault("store", "Mercado Livre")
+    fields.setdefault("image_url", f"https://img/{pid}.webp")
+    return Deal(title=title or f"Produto {pid}", price=price, product_id=pid, **fields)
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.append(os.getcwd())
+
+from scrapers.mercadolivre_api import MercadoLivreAPI
+
+
+def product_url(n):
+    return f"https://produto.mercadolivre.com.br/MLB-{n}-produto-_JM"
+
+
+class FakeLinkServer:
+    """createLink local: 1ª chamada de cada lote com MLB-2 dá 503, lote com MLB-5 sempre 500, MLB-4 recusado."""
+
+    def __init__(self):
+        self.batches = []
+        self.peers = set()
+        self.failed_once = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_link(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            payload = await request.json()
+            self.batches.append(payload["urls"])
+            self.peers.add(request.transport.get_extra_info("peername"))
+            await asyncio.sleep(0.02)
+            ids = ["".join(c for c in url.split("MLB-")[1].split("-")[0]) for url in payload["urls"]]
+            if "5" in ids:
+                return web.Response(status=500, text="boom")
+            if "2" in ids and not self.failed_once:
+                self.failed_once = True
+                return web.Response(status=503, text="busy", headers={"Retry-After": "0"})
+            urls = []
+            for pid in ids:
+                if pid == "4":
+                    urls.append({"error_code": 111, "message": "URL not allowed"})
+                else:
+                    urls.append({"short_url": f"https://meli.la/{pid}"})
+            return web.json_response({"urls": urls})
+        finally:
+            self.in_flight -= 1
+
+
+async def serve(server):
+    app = web.Application()
+    app.add_routes([web.post("/createLink", server.create_link)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/createLink"
+
+
+def test_chunks_retries_and_per_url_fallback():
+    server = FakeLinkServer()
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    async def run():
+        runner, url = await serve(server)
+        api = MercadoLivreAPI(api_url=url, batch_size=2, concurrency=2, max_retries=2, retry_base=0.5, sleep=fake_sleep)
+        api.tag, api.cookies = "tag1", "c=1"
+        try:
+            first = await api.create_links([product_url(n) for n in range(1, 7)])
+            session = api._session
+            second = await api.create_links([product_url(7)])
+            reused = api._session is session and not session.closed
+        finally:
+            await api.close()
+            await runner.cleanup()
+        return api, first, second, reused
+
+    api, first, second, reused = asyncio.run(run())
+    assert first == [
+        "https://meli.la/1", "https://meli.la/2",          # Lote 1: 503 -> retry -> ok
+        "https://meli.la/3", f"{product_url(4)}?tag=tag1",  # Lote 2: MLB-4 recusado (fallback só dele)
+        f"{product_url(5)}?tag=tag1", f"{product_url(6)}?tag=tag1",  # Lote 3: 500 em todas as tentativas
+    ]
+    assert second == ["https://meli.la/7"]
+    assert all(len(batch) <= 2 for batch in server.batches)
+    # 3 lotes + 1 retry do lote 1 + 2 retries do lote 3 + 1 chamada do 2º create_links
+    assert api.api_calls == 7 and len(server.batches) == 7
+    assert server.max_in_flight == 2
+    # Backoff exponencial com jitter (base 0.5s: 0.25-0.75, depois 0.5-1.5)
+    assert len(sleeps) == 3 and all(0.25 <= d <= 1.5 for d in sleeps)
+    # Keep-alive: a mesma sessão (e poucas conexões) atende todas as chamadas
+    assert reused and len(server.peers) <= 2
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from core.async_database import AsyncDatabase
+from core.database import Database
+from scrapers.listing_cards import build_deal
+from scrapers.mercadolivre_api import MercadoLivreAPI, LINK_OK, LINK_REFUSED, LINK_ERROR
+
+
+def product_url(pid):
+    return f"https://produto.mercadolivre.com.br/MLB-{pid}-produto-_JM"
+
+
+class FakeAPI(MercadoLivreAPI):
+    """createLink simulado: MLB9xx = recusado, MLB8xx = erro de rede, resto = short_url."""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.tag, self.cookies = "tag1", "cookie=1"
+        self.requests = []
+
+    async def _request_links(self, urls):
+        self.api_calls += 1
+        self.requests.append(list(urls))
+        outcomes = []
+        for url in urls:
+            pid = self._product_id(url)
+            if pid.startswith("MLB9"):
+                outcomes.append((self._inject_tag_fallback(url), LINK_REFUSED))
+            elif pid.startswith("MLB8"):
+                outcomes.append((url, LINK_ERROR))
+            else:
+                outcomes.append((f"https://meli.la/{pid}", LINK_OK))
+        return outcomes
+
+
+def test_only_misses_go_to_the_api_and_results_keep_order(tmp_path):
+    path = str(tmp_path / "deals.db")
+
+    async def run():
+        db = AsyncDatabase(path)
+        api = FakeAPI(db)
+        first = await api.create_links([product_url("1"), "https://www.mercadolivre.com.br/p/MLB901", product_url("2")])
+        # Queda de preço / reaprovação: mesmos produtos + um novo (URL com tracking diferente)
+        second = await api.create_links([product_url("3"), product_url("2") + "?tracking_id=x", product_url("1"), "https://www.mercadolivre.com.br/p/MLB901"])
+        await db.close()
+        return api, first, second
+
+    api, first, second = asyncio.run(run())
+    assert first == ["https://meli.la/MLB-1", "https://www.mercadolivre.com.br/p/MLB901?tag=tag1", "https://meli.la/MLB-2"]
+    assert second == ["https://meli.la/MLB-3", "https://meli.la/MLB-2", "https://meli.la/MLB-1", "https://www.mercadolivre.com.br/p/MLB901?tag=tag1"]
+    assert api.requests[1] == [product_url("3")]
+    stats = api.stats()
+    assert (stats["hits"], stats["negative_hits"], stats["misses"], stats["api_calls"]) == (2, 1, 4, 2)
+    assert stats["hit_rate"] == 3 / 7
+
+
+def test_ttl_errors_and_duplicates(tmp_path):
+    path = str(tmp_path / "deals.db")
+
+    async def run():
+        db = AsyncDatabase(path)
+        api = FakeAPI(db, negative_ttl=0)
+        await api.create_links([product_url("1"), product_url("1"), "https://www.mercadolivre.com.br/p/MLB807", "https://www.mercadolivre.com.br/p/MLB908"])
+        # Erro de rede não é cacheado; recusa com TTL negativo 0 expira na hora
+        await api.create_links(["https://www.mercadolivre.com.br/p/MLB807", "https://www.mercadolivre.com.br/p/MLB908", product_url("1")])
+        await api.prune_cache()
+        await db.close()
+        return api
+
+    api = asyncio.run(run())
+    assert api.requests[0] == [product_url("1"), "https://www.mercadolivre.com.br/p/MLB807", "https://www.mercadolivre.com.br/p/MLB908"]
+    assert api.requests[1] == ["https://www.mercadolivre.com.br/p/MLB807", "https://www.mercadolivre.com.br/p/MLB908"]
+    with Database(path) as db:
+        # Recusa gravada (None); erro de rede nunca entra
+        assert db.get_affiliate_links(["MLB-1", "MLB908", "MLB807"], "tag1", 3600, 3600) == {"MLB-1": "https://meli.la/MLB-1", "MLB908": None}
+        assert db.get_affiliate_links(["MLB-1"], "other-tag", 3600, 3600) == {}
+
+
+def test_cache_key_matches_deal_product_id(tmp_path):
+    url = product_url("4455")
+    deal = build_deal({"title": "Panela", "price": "99", "has_link": True, "href": url})
+    assert deal.product_id == MercadoLivreAPI._product_id(url) == "MLB-4455"
+
+    async def run():
+        db = AsyncDatabase(str(tmp_path / "deals.db"))
+        await FakeAPI(db).create_links([deal.url])
+        # Mesmo id do sent_deals: o link sai do cache pelo Deal.product_id
+        cached = await db.get_affiliate_links([deal.product_id], "tag1", 3600, 3600)
+        await db.close()
+        return cached
+
+    assert asyncio.run(run()) == {"MLB-4455": "https://meli.la/MLB-4455"}
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from core.async_database import AsyncDatabase
+from core.database import Database
+from conftest import make_deal
+
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Mede o maior atraso do event loop enquanto `stop` não é setado."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+def test_async_api_matches_sync_database(tmp_path):
+    path = str(tmp_path / "deals.db")
+
+    async def run():
+        adb = AsyncDatabase(path)
+        await adb.add_sent_deal(make_deal("MLB-1", 100.0))
+        status = await adb.is_deal_sent("MLB-1", 80.0)
+        bulk = await adb.check_deals_bulk([make_deal("MLB-1", 80.0), make_deal("MLB-9", 5.0)])
+        total = await adb.get_total_count()
+        await adb.close()
+        return status, bulk, total
+
+    status, bulk, total = asyncio.run(run())
+    with Database(path) as db:
+        assert status == db.is_deal_sent("MLB-1", 80.0)
+        assert bulk["MLB-9"] == db.is_deal_sent("MLB-9", 5.0)
+    assert total == 1
+
+
+def test_concurrent_writes_are_batched_into_few_transactions(tmp_path, monkeypatch):
+    batches = []
+    original = Database.add_sent_deals
+
+    def spy(self, deals):
+        batches.append(len(deals))
+        return original(self, deals)
+
+    monkeypatch.setattr(Database, "add_sent_deals", spy)
+
+    async def run():
+        adb = AsyncDatabase(str(tmp_path / "deals.db"))
+        await asyncio.gather(*(adb.add_sent_deal(make_deal(f"MLB-{i}")) for i in range(200)))
+        total = await adb.get_total_count()
+        await adb.close()
+        return total
+
+    assert asyncio.run(run()) == 200
+    assert sum(batches) == 200
+    assert len(batches) < 200
+
+
+def test_event_loop_stays_responsive_under_write_load(tmp_path, monkeypatch):
+    original = Database.add_sent_deals
+
+    def slow_disk(self, deals):
+        time.sleep(0.05)  # simula fsync lento
+        return original(self, deals)
+
+    monkeypatch.setattr(Database, "add_sent_deals", slow_disk)
+
+    async def run():
+        adb = AsyncDatabase(str(tmp_path / "deals.db"))
+        stop = asyncio.Event()
+        beat = asyncio.create_task(heartbeat(stop))
+        for i in range(20):
+            await adb.add_sent_deal(make_deal(f"MLB-{i}"))
+            await adb.is_deal_sent(f"MLB-{i}")
+        stop.set()
+        worst_lag = await beat
+        await adb.close()
+        return worst_lag
+
+    worst_lag = asyncio.run(run())
+    # 20 escritas x 50ms = 1s de "disco"; o loop não pode ter travado nesse tempo
+    assert worst_lag < 0.04
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from utils.blacklist import Blacklist, BlacklistFile
+
+
+def test_substring_and_accent_insensitive_by_default():
+    blacklist = Blacklist(["Capinha", "película", "recondicionad", "  "], word_boundary=False, ignore_accents=True)
+    assert len(blacklist) == 3
+    assert blacklist.match("Kit 3 PELICULAS de vidro") == "pelicula"
+    assert blacklist.blocks("iPhone 12 Recondicionado")
+    assert blacklist.blocks("Capinhas Anti Impacto")
+    assert not blacklist.blocks("Smartphone Galaxy A15")
+    assert not Blacklist([]).blocks("qualquer coisa")
+
+
+def test_word_boundary_and_accent_options():
+    whole = Blacklist(["kit", "cabo usb"], word_boundary=True)
+    assert whole.blocks("Kit Ferramentas") and whole.blocks("Cabo  USB-C 2m")
+    assert not whole.blocks("Kitchenaid Batedeira")
+
+    strict = Blacklist(["película"], ignore_accents=False)
+    assert strict.blocks("Película de vidro") and not strict.blocks("Pelicula de vidro")
+
+
+def test_file_is_recompiled_only_when_it_changes(tmp_path):
+    path = tmp_path / "blacklist.txt"
+    source = BlacklistFile(str(path))
+    assert not source.current() and source.reloads == 0  # Sem arquivo: vazia
+
+    path.write_text("# comentário\ncapinha\n", encoding="utf-8")
+    first = source.current()
+    assert first.blocks("Capinha iPhone") and source.current() is first
+    assert source.reloads == 1
+
+    path.write_text("capinha\npelicula\n", encoding="utf-8")
+    os.utime(path, ns=(1, os.stat(path).st_mtime_ns + 1_000_000))
+    assert source.current().blocks("Película") and source.reloads == 2
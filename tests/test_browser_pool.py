@@ -0,0 +1,204 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+import core.browser_pool as browser_pool
+from core.browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+
+    async def close(self):
+        if self in self.context.pages:
+            self.context.pages.remove(self)
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.closed = False
+        self._listeners = []
+
+    def on(self, event, fn):
+        self._listeners.append(fn)
+
+    def remove_listener(self, event, fn):
+        self._listeners.remove(fn)
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        for fn in self._listeners:
+            fn(page)
+        return page
+
+    async def clear_cookies(self):
+        pass
+
+    async def unroute_all(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        ctx = FakeContext()
+        self.contexts.append(ctx)
+        return ctx
+
+    async def new_browser_cdp_session(self):
+        raise RuntimeError("no CDP in tests")
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self):
+        self.launches = []
+
+    async def launch(self, headless=True):
+        browser = FakeBrowser()
+        self.launches.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+        self.stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+
+class FakeStarter:
+    def __init__(self, pw):
+        self.pw = pw
+
+    async def start(self):
+        return self.pw
+
+
+def _make_pool(monkeypatch, **kwargs):
+    pw = FakePlaywright()
+    monkeypatch.setattr(browser_pool, "async_playwright", lambda: FakeStarter(pw))
+    return BrowserPool(**kwargs), pw
+
+
+def test_single_browser_and_context_reuse(monkeypatch):
+    pool, pw = _make_pool(monkeypatch, max_contexts=2)
+
+    async def run():
+        seen = []
+        for _ in range(3):
+            async with pool.acquire() as ctx:
+                await ctx.new_page()
+                seen.append(ctx)
+        await pool.close()
+        return seen
+
+    seen = asyncio.run(run())
+    assert len(pw.chromium.launches) == 1
+    assert seen[0] is seen[1] is seen[2]
+    assert seen[0].pages == []
+    assert pw.stopped
+
+
+def test_context_recycled_after_max_pages(monkeypatch):
+    pool, pw = _make_pool(monkeypatch, max_pages_per_context=2)
+
+    async def run():
+        async with pool.acquire() as first:
+            await first.new_page()
+            await first.new_page()
+        async with pool.acquire() as second:
+            pass
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.closed
+    assert first is not second
+
+
+def test_browser_recycled_and_relaunched_when_unhealthy(monkeypatch):
+    pool, pw = _make_pool(monkeypatch, max_pages_per_browser=1)
+
+    async def run():
+        async with pool.acquire() as ctx:
+            await ctx.new_page()
+        async with pool.acquire():
+            pass
+        # Simula crash do Chromium
+        pw.chromium.launches[-1].connected = False
+        async with pool.acquire():
+            pass
+        await pool.close()
+
+    asyncio.run(run())
+    assert len(pw.chromium.launches) == 3
+
+
+def test_concurrent_borrowers_limited_by_max_contexts(monkeypatch):
+    pool, pw = _make_pool(monkeypatch, max_contexts=2)
+    active = 0
+    peak = 0
+
+    async def borrow():
+        nonlocal active, peak
+        async with pool.acquire():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def run():
+        await asyncio.gather(*(borrow() for _ in range(5)))
+        await pool.close()
+
+    asyncio.run(run())
+    assert peak == 2
+    assert len(pw.chromium.launches[0].contexts) == 2
+
+
+def test_rss_sampled_outside_lock_and_rate_limited(monkeypatch):
+    now = [0.0]
+    pool, pw = _make_pool(monkeypatch, max_rss_mb=1000, rss_check_interval=10, clock=lambda: now[0])
+    samples = []
+
+    async def fake_rss():
+        samples.append(pool._lock.locked())
+        return 500.0 if len(samples) == 1 else 2000.0
+
+    pool._browser_rss_mb = fake_rss
+
+    async def run():
+        for _ in range(5):  # Devoluções dentro do intervalo: 1 amostra só
+            async with pool.acquire() as ctx:
+                await ctx.new_page()
+        now[0] = 11.0
+        async with pool.acquire() as ctx:
+            await ctx.new_page()
+        pending = pool._recycle_pending
+        async with pool.acquire():
+            pass  # RSS alto: recicla na próxima aquisição
+        await pool.close()
+        return pending
+
+    assert asyncio.run(run()) is True
+    assert samples == [False, False] and pool.rss_checks == 2
+    assert len(pw.chromium.launches) == 2
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from conftest import make_deal
+from services.caption_cache import CaptionCache, caption_key, price_bucket
+from services.copywriter import Copywriter
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    """Imita client.aio.models: devolve `replies` em ordem e mede a concorrência."""
+
+    def __init__(self, replies=None, delay=0.0):
+        self.replies = list(replies or [])
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content(self, model, contents, config):
+        self.prompts.append(contents)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            reply = self.replies.pop(0) if self.replies else "🖼 LEGENDA"
+            if isinstance(reply, Exception):
+                raise reply
+            return FakeResponse(reply)
+        finally:
+            self.in_flight -= 1
+
+
+class FakeClient:
+    def __init__(self, models):
+        self.aio = type("Aio", (), {"models": models})()
+
+
+def test_cache_key_buckets_price_and_persists(tmp_path):
+    path = str(tmp_path / "captions.json")
+    assert price_bucket(99.90) == price_bucket(97.50)
+    assert price_bucket(99.90) != price_bucket(150.0)
+    assert caption_key("casa", "Panela  Tramontina", 99.9) == caption_key("casa", "panela tramontina", 98.0)
+
+    cache = CaptionCache(path, ttl_seconds=3600)
+    cache.put("a", "🖼 A")
+    cache.save()
+    assert CaptionCache(path, ttl_seconds=3600).get("a") == "🖼 A"
+    # Expirado no disco: não volta
+    assert CaptionCache(path, ttl_seconds=0).get("a") is None
+
+
+def test_generate_caption_hits_cache_on_second_call(tmp_path):
+    models = FakeModels(["**🖼 PANELA BOA**"])
+    cw = Copywriter(client=FakeClient(models), cache=CaptionCache(str(tmp_path / "c.json")))
+
+    async def run():
+        first = await cw.generate_caption(make_deal(title="Panela Tramontina Frete Grátis", price=99.9))
+        # Mesmo produto, preço na mesma faixa (ex.: aprovação de queda de preço)
+        second = await cw.generate_caption(make_deal(title="Panela Tramontina", price=105.0))
+        return first, second
+
+    assert asyncio.run(run()) == ("🖼 PANELA BOA", "🖼 PANELA BOA")
+    assert len(models.prompts) == 1
+    stats = cw.stats()
+    assert stats["calls"] == 1 and stats["cache"]["hits"] == 1
+
+
+def test_batch_generation_parses_reply_and_falls_back(tmp_path):
+    reply = '```json\n[{"id": 1, "caption": "🖼 TÊNIS TOP"}, {"id": 3, "caption": "🖼 FONE BARATO"}]\n```'
+    models = FakeModels([reply])
+    cw = Copywriter(client=FakeClient(models), cache=CaptionCache(str(tmp_path / "c.json")), batch_size=8)
+    deals = [
+        make_deal(title="Tênis Nike Revolution", price=200.0),
+        make_deal(title="Sofá Retrátil 3 Lugares", price=1500.0),
+        make_deal(title="Fone Bluetooth JBL", price=150.0),
+        make_deal(title="Tênis Nike Revolution", price=199.0),  # Repetido: mesmo item no lote
+    ]
+
+    captions = asyncio.run(cw.generate_captions(deals))
+    assert captions == ["🖼 TÊNIS TOP", Copywriter.FALLBACKS["casa"], "🖼 FONE BARATO", "🖼 TÊNIS TOP"]
+    assert len(models.prompts) == 1 and cw.batch_calls == 1
+    assert "3. [eletronico] Fone Bluetooth JBL - R$ 150.00" in models.prompts[0]
+    assert "4." not in models.prompts[0]
+    # Só o que veio da IA entra no cache (fallback não)
+    with open(tmp_path / "c.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)) == sorted(
+            caption_key(c, t, p) for c, t, p in (("calcado", "Tênis Nike Revolution", 200.0), ("eletronico", "Fone Bluetooth JBL", 150.0))
+        )
+
+
+def test_concurrency_limit_and_error_metrics(tmp_path):
+    models = FakeModels(["🖼 A", RuntimeError("quota"), "🖼 C", "🖼 D", "🖼 E"], delay=0.01)
+    cw = Copywriter(client=FakeClient(models), cache=CaptionCache(str(tmp_path / "c.json")), concurrency=2)
+    deals = [make_deal(title=f"Produto {i}", price=10.0 * (i + 1) ** 3) for i in range(5)]
+
+    async def run():
+        return await asyncio.gather(*(cw.generate_caption(d) for d in deals))
+
+    captions = asyncio.run(run())
+    assert models.max_in_flight == 2
+    assert captions[1] == Copywriter.FALLBACKS["geral"]
+    stats = cw.stats()
+    assert stats["calls"] == 5 and stats["errors"] == 1
+    assert 0 < stats["p50_s"] <= stats["p95_s"]
+
+
+def test_prefetch_runs_ahead_and_deadline_falls_back(tmp_path):
+    reply = '[{"id": 1, "caption": "🖼 TÊNIS TOP"}, {"id": 2, "caption": "🖼 FONE BARATO"}]'
+    models = FakeModels([reply, "🖼 SOFÁ LENTO"], delay=0.05)
+    cw = Copywriter(client=FakeClient(models), cache=CaptionCache(str(tmp_path / "c.json")), deadline=1.0)
+    tenis, fone = make_deal(title="Tênis Nike Revolution", price=200.0), make_deal(title="Fone Bluetooth JBL", price=150.0)
+    sofa = make_deal(title="Sofá Retrátil 3 Lugares", price=1500.0)
+
+    async def run():
+        cw.prefetch([tenis, fone])
+        cw.prefetch([tenis])  # Já em andamento: não dispara de novo
+        await asyncio.sleep(0.1)  # "Envios anteriores" enquanto a IA gera
+        ready = [await cw.caption_for(tenis), await cw.caption_for(fone)]
+
+        # Sem pré-geração e IA lenta: fallback no deadline, geração segue para o cache
+        cw.deadline = 0.02
+        late = await cw.caption_for(sofa)
+        await asyncio.sleep(0.1)
+        return ready, late
+
+    ready, late = asyncio.run(run())
+    assert ready == ["🖼 TÊNIS TOP", "🖼 FONE BARATO"]
+    assert late == Copywriter.FALLBACKS["casa"]
+    assert cw.batch_calls == 1 and cw.calls == 2 and cw.deadline_misses == 1
+    assert cw.cache.get(caption_key("casa", "Sofá Retrátil 3 Lugares", 1500.0)) == "🖼 SOFÁ LENTO"
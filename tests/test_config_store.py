@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from core.autonomous_mode import AutonomousMode
+from core.config_store import JsonFile, LinesFile, json_file
+
+
+def touch(path, content):
+    path.write_text(content, encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # mtime garantido diferente
+
+
+def test_lines_are_parsed_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "links.txt"
+    touch(path, "# comentário\nhttps://a\n\nhttps://b - Crocs\n")
+    parsed = []
+    links = LinesFile(str(path), lambda lines: parsed.append(lines) or tuple(lines))
+
+    assert links.get() == ("https://a", "https://b - Crocs")
+    links.get()
+    assert len(parsed) == 2  # Vazio no construtor + 1 leitura
+
+    touch(path, "https://c\n")
+    assert links.get() == ("https://c",) and links.loads == 2
+
+
+def test_updates_are_debounced_into_one_atomic_write(tmp_path):
+    path = tmp_path / "bot_state.json"
+    state = JsonFile(str(path), debounce=0.05)
+
+    async def run():
+        state.update(last_general_url="https://a")
+        state.update(daily_link="https://d")
+        state.update(last_general_url="https://b")
+        pending_on_disk = path.exists()
+        await asyncio.sleep(0.1)
+        return pending_on_disk
+
+    assert asyncio.run(run()) is False
+    assert state.writes == 1
+    assert json.loads(path.read_text(encoding="utf-8")) == {"last_general_url": "https://b", "daily_link": "https://d"}
+    assert os.listdir(tmp_path) == ["bot_state.json"]  # Sem .tmp sobrando
+
+    # A própria escrita não força releitura; edição externa sim
+    loads = state.loads
+    assert state.get()["daily_link"] == "https://d" and state.loads == loads
+    touch(path, json.dumps({"daily_link": "https://manual"}))
+    assert state.get() == {"daily_link": "https://manual"} and state.loads == loads + 1
+
+
+def test_autonomous_mode_instances_share_state(tmp_path):
+    config = str(tmp_path / "bot_config.json")
+    loop_mode = AutonomousMode(config)  # Instância do run_bot
+    assert loop_mode.is_autonomous is False
+
+    assert AutonomousMode(config).toggle() is True  # /auto cria outra instância
+    assert loop_mode.is_autonomous is True
+    assert json_file(config).get()["autonomous_mode"] is True
+    with open(config, encoding="utf-8") as f:
+        assert json.load(f)["autonomous_mode"] is True  # Fora do event loop: grava na hora
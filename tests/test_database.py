@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.getcwd())
+
+from core.database import Database
+from conftest import make_deal
+
+
+def test_persistent_mode_uses_wal_and_single_connection(tmp_path):
+    with Database(str(tmp_path / "deals.db")) as db:
+        db.add_sent_deal(make_deal())
+        conn = db._conn
+        assert db.is_deal_sent("MLB-1", 90.0) == {'sent': True, 'last_price': 100.0, 'price_dropped': True}
+        assert db._conn is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db._conn is None
+
+
+def test_per_call_mode_matches_persistent(tmp_path):
+    path = str(tmp_path / "deals.db")
+    with Database(path) as db:
+        db.add_sent_deal(make_deal("MLB-2", 50.0))
+
+    legacy = Database(path, persistent=False)
+    assert legacy._conn is None
+    assert legacy.is_deal_sent("MLB-2", 60.0) == {'sent': True, 'last_price': 50.0, 'price_dropped': False}
+    assert legacy.is_deal_sent("MLB-3") == {'sent': False, 'last_price': None, 'price_dropped': False}
+    assert legacy.get_total_count() == 1
+
+
+def test_reopens_after_close(tmp_path):
+    db = Database(str(tmp_path / "deals.db"))
+    db.add_sent_deal(make_deal())
+    db.close()
+    assert db.get_total_count() == 1
+    db.close()
+
+
+def test_check_deals_bulk_matches_single_lookups(tmp_path):
+    with Database(str(tmp_path / "deals.db")) as db:
+        db.add_sent_deal(make_deal("MLB-1", 100.0))
+        db.add_sent_deal(make_deal("MLB-2", 50.0))
+        db.MAX_IN_PARAMS = 2  # força mais de um chunk
+
+        scraped = [make_deal("MLB-1", 80.0), make_deal("MLB-2", 55.0), make_deal("MLB-3", 10.0), make_deal(None, 1.0)]
+        bulk = db.check_deals_bulk(scraped)
+
+        assert set(bulk) == {"MLB-1", "MLB-2", "MLB-3"}
+        for d in scraped[:3]:
+            assert bulk[d.product_id] == db.is_deal_sent(d.product_id, d.price)
+
+
+def test_price_history_stats_and_drop_against_window_min(tmp_path):
+    with Database(str(tmp_path / "deals.db")) as db:
+        conn = db._conn
+        now = int(time.time())
+        for ago_days, price in [(40, 50.0), (10, 120.0), (5, 90.0), (1, 110.0)]:
+            conn.execute(db.SQL_INSERT_PRICE, ("MLB-1", now - ago_days * 86400, db._to_cents(price)))
+        conn.execute(db.SQL_UPSERT_DEAL, ("MLB-1", "u", "t", 110.0, "Mercado Livre", "2026-01-01 00:00:00"))
+        conn.commit()
+
+        stats = db.get_price_stats("MLB-1", days=30)
+        assert stats == {'min': 90.0, 'last': 110.0, 'median': 110.0, 'count': 3}
+
+        # 100 < último enviado (110), mas não é o menor preço da janela (90)
+        assert db.is_deal_sent("MLB-1", 100.0)['price_dropped'] is False
+        assert db.is_deal_sent("MLB-1", 89.9)['price_dropped'] is True
+        assert db.check_deals_bulk([make_deal("MLB-1", 100.0)])["MLB-1"]['price_dropped'] is False
+
+        db.prune_price_history(days=30)
+        assert db.get_price_stats("MLB-1", days=365)['count'] == 3
+
+
+def test_history_queries_use_indexes(tmp_path):
+    with Database(str(tmp_path / "deals.db")) as db:
+        conn = db._conn
+        plans = [
+            conn.execute("EXPLAIN QUERY PLAN " + db.SQL_PRUNE_HISTORY, (0,)).fetchall(),
+            conn.execute("EXPLAIN QUERY PLAN " + db.SQL_SELECT_HISTORY, ("MLB-1", 0)).fetchall(),
+            conn.execute("EXPLAIN QUERY PLAN " + db.SQL_DELETE_OLD, ("-7 days",)).fetchall(),
+        ]
+        for plan in plans:
+            detail = " ".join(row[-1] for row in plan)
+            assert detail.startswith("SEARCH") and "INDEX" in detail or "PRIMARY KEY" in detail, detail
+
+
+def test_existing_sent_deals_seed_price_history(tmp_path):
+    path = str(tmp_path / "deals.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sent_deals (product_id TEXT PRIMARY KEY, url TEXT, title TEXT, price REAL, store TEXT, timestamp DATETIME)")
+    conn.execute("INSERT INTO sent_deals VALUES ('MLB-7', 'u', 't', 49.9, 'Mercado Livre', ?)", (datetime.now(),))
+    conn.commit()
+    conn.close()
+
+    with Database(path) as db:
+        assert db.get_price_stats("MLB-7") == {'min': 49.9, 'last': 49.9, 'median': 49.9, 'count': 1}
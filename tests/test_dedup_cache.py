@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from core.async_database import AsyncDatabase
+from core.database import Database
+from core.dedup_cache import BloomFilter, DedupCache, MISS
+from conftest import make_deal
+
+
+def test_bloom_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"MLB-{i}")
+    assert all(f"MLB-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"MLB-X{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_lru_is_bounded_and_invalidated_by_mark_sent():
+    cache = DedupCache(max_entries=2)
+    cache.warm([], {})
+    for pid in ("A", "B", "C"):
+        cache.bloom.add(pid)
+        cache.store(pid, (10.0, 1000))
+    assert cache.lookup("A") is MISS
+    assert cache.lookup("C") == (10.0, 1000)
+    cache.mark_sent("C")
+    assert cache.lookup("C") is MISS
+    assert cache.lookup("never-sent") is None
+
+
+def test_cached_facade_matches_database_and_counts_hits(tmp_path):
+    path = str(tmp_path / "deals.db")
+    with Database(path) as db:
+        db.add_sent_deal(make_deal("MLB-1", 100.0))
+        db.add_sent_deal(make_deal("MLB-2", 50.0))
+
+    scraped = [make_deal("MLB-1", 80.0), make_deal("MLB-2", 55.0), make_deal("MLB-3", 10.0)]
+
+    async def run():
+        adb = AsyncDatabase(path)
+        await adb.warm_cache()
+        first = await adb.check_deals_bulk(scraped)
+        second = await adb.check_deals_bulk(scraped)
+        await adb.add_sent_deal(make_deal("MLB-3", 10.0))
+        after_send = await adb.is_deal_sent("MLB-3", 9.0)
+        stats = adb.cache.stats()
+        await adb.close()
+        return first, second, after_send, stats
+
+    first, second, after_send, stats = asyncio.run(run())
+    with Database(path, persistent=False) as db:
+        expected = {d.product_id: db.is_deal_sent(d.product_id, d.price) for d in scraped[:2]}
+    assert first == second
+    assert first["MLB-1"] == expected["MLB-1"]
+    assert first["MLB-2"] == expected["MLB-2"]
+    assert first["MLB-3"] == {'sent': False, 'last_price': None, 'price_dropped': False}
+    assert after_send == {'sent': True, 'last_price': 10.0, 'price_dropped': True}
+    assert stats['misses'] == 1  # só o MLB-3 recém-enviado foi ao banco
+
+
+def test_unwarmed_cache_never_reports_sent_deal_as_new(tmp_path):
+    cache = DedupCache()
+    assert cache.lookup("MLB-1") is MISS  # Bloom vazio antes do warm: vai ao banco
+
+    path = str(tmp_path / "deals.db")
+    with Database(path) as db:
+        db.add_sent_deal(make_deal("MLB-1", 100.0))
+
+    async def run():
+        adb = AsyncDatabase(path)  # Sem warm_cache() (scripts, handlers antes do startup)
+        status = await adb.is_deal_sent("MLB-1", 100.0)
+        bulk = await adb.check_deals_bulk([make_deal("MLB-1", 100.0), make_deal("MLB-2", 10.0)])
+        warmed = adb.cache.warmed
+        await adb.close()
+        return status, bulk, warmed
+
+    status, bulk, warmed = asyncio.run(run())
+    assert status["sent"] and bulk["MLB-1"]["sent"]
+    assert not bulk["MLB-2"]["sent"]
+    assert warmed
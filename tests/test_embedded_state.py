@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.append(os.getcwd())
+
+from benchmarks.fixture_corpus import load_fixture, inflate
+from models.deal import Deal
+from scrapers.embedded_state import extract_deals, find_state
+from scrapers.mercadolivre import MercadoLivreScraper
+from scrapers.mercadolivre_http import MercadoLivreHttpScraper, close_http_session, parse_listing_deals
+from scrapers.mercadolivre_search import MercadoLivreSearchScraper
+
+
+async def serve(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_listing_state_matches_dom_deals():
+    deals = extract_deals(load_fixture("listing_state"))
+    # Mesmos 4 itens válidos que os seletores do DOM extraem de listing_lista.html
+    assert [d.product_id for d in deals] == ["MLB-3456789012", "MLB19876543", "MLB-2233445566", "MLB-5566778899"]
+
+    first = deals[0]
+    assert (first.price, first.original_price, first.discount_percentage) == (899.9, 1299.9, 30)
+    assert (first.seller, first.installments) == ("Tramontina", "10x R$ 89,99 sem juros")
+    assert first.url == "https://produto.mercadolivre.com.br/MLB-3456789012-jogo-de-panelas-antiaderente-5-pecas-_JM"
+    assert first.image_url == "https://http2.mlstatic.com/D_NQ_NP_111111-MLA0000000001_012024-O.webp"
+
+    # Sem preço anterior nem vendedor
+    assert (deals[1].original_price, deals[1].discount_percentage, deals[1].seller) == (None, 0, None)
+
+
+def test_pages_without_state_fall_back_to_dom():
+    assert find_state(load_fixture("listing")) is None
+    assert extract_deals(load_fixture("listing")) is None
+    # /ofertas sem estado continua no caminho antigo
+    assert len(MercadoLivreScraper().parse_deals(load_fixture("offers"))) == 4
+
+
+def test_state_with_unmappable_polycards_falls_back_to_dom():
+    # Schema mudou: há polycards no estado, mas nenhum vira Deal
+    state = '{"results": [{"polycard": {"metadata": {"id": "MLB1"}, "components": [{"type": "novo"}]}}, {"polycard": {"metadata": null}}]}'
+    html = load_fixture("listing").replace(
+        "</body>", f'<script id="__PRELOADED_STATE__" type="application/json">{state}</script></body>'
+    )
+    assert find_state(html) is not None
+    assert extract_deals(html) is None
+    deals, cards = parse_listing_deals(html)
+    assert len(deals) == 4 and cards >= 4  # Mesmos itens do DOM sem estado
+
+
+def test_offers_and_search_use_state():
+    ml = MercadoLivreScraper()
+    deals = ml.parse_deals(load_fixture("offers_state"))
+    assert [(d.title, d.price, d.discount_percentage) for d in deals] == [
+        ("Smartphone Motorola Moto G54 5g 256gb", 1049.0, 30),
+        ("Fone De Ouvido Bluetooth Jbl Tune 520bt", 249.9, 37),
+        ("Air Fryer Mondial 4l", 299.0, 15),
+        ("Tênis Olympikus Corre 3", 379.99, 24),
+    ]
+    # Preço original vem do JSON (sem o bug de concatenação de centavos do DOM)
+    assert deals[3].original_price == 499.99
+    assert deals[2].installments == "6x R$ 49,83 sem juros"
+
+    # Busca: só itens com desconto
+    assert all(d.discount_percentage > 0 for d in ml.parse_search_results(load_fixture("listing_state")))
+    assert len(ml.parse_search_results(load_fixture("listing_state"))) == 3
+
+
+def test_inflated_state_keeps_ids_unique():
+    deals = extract_deals(inflate(load_fixture("listing_state"), 3))
+    assert len(deals) == 12
+    assert len({d.product_id for d in deals}) == 12
+
+
+def test_http_engine_reads_state_and_paginates():
+    pages = {"1": inflate(load_fixture("listing_state"), 1), "2": inflate(load_fixture("listing_state"), 2)}
+    requested = []
+
+    async def listing(request):
+        page = request.query.get("page", "1")
+        requested.append(page)
+        return web.Response(text=pages.get(page, pages["2"]), content_type="text/html")
+
+    async def run():
+        runner, base = await serve([web.get("/ofertas", listing)])
+        try:
+            return await MercadoLivreHttpScraper(max_pages=5).fetch_listing_deals(f"{base}/ofertas", max_results=8)
+        finally:
+            await close_http_session()
+            await runner.cleanup()
+
+    deals = asyncio.run(run())
+    # Página 2 traz 4 itens repetidos + 4 novos (cópia com ids deslocados)
+    assert requested == ["1", "2"]
+    assert len(deals) == 8
+    assert deals[0].seller == "Tramontina"
+
+
+def test_merge_deals_dedups_by_product_id():
+    a = Deal(title="A", price=1, url="https://x/MLB1", product_id="MLB1", store="Mercado Livre")
+    b = Deal(title="B", price=2, url="https://x/MLB2", product_id="MLB2", store="Mercado Livre")
+    a_dom = Deal(title="A (DOM)", price=1, url="https://x/MLB1?x", product_id="MLB1", store="Mercado Livre")
+    merged = MercadoLivreSearchScraper._merge_deals([a], [a_dom, b])
+    assert [d.title for d in merged] == ["A", "B"]
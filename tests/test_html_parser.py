@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+import scrapers.html_parser as html_parser
+from benchmarks.bench_parsers import build_cases
+from benchmarks.fixture_corpus import load_fixture, inflate
+from scrapers.html_parser import parse_html, css_to_xpath
+
+
+def snapshot(items):
+    """Itens comparáveis entre backends (Deal sem timestamp)."""
+    out = []
+    for item in items:
+        if hasattr(item, "model_dump"):
+            out.append(item.model_dump(exclude={"timestamp"}))
+        elif hasattr(item, "__dict__"):
+            out.append(vars(item))
+        else:
+            out.append(item)
+    return out
+
+
+@pytest.mark.parametrize("case", list(build_cases()))
+def test_backends_produce_identical_results(case, monkeypatch):
+    fixture, parse = build_cases()[case]
+    html = inflate(load_fixture(fixture), 3)
+
+    monkeypatch.setattr(html_parser, "HTML_PARSER", "bs4")
+    reference = snapshot(parse(html))
+    monkeypatch.setattr(html_parser, "HTML_PARSER", "lxml")
+    fast = snapshot(parse(html))
+
+    assert reference and fast == reference
+
+
+def test_node_api_matches_beautifulsoup():
+    html = "<div class='x y'><p id='p'>a <b>b</b><!-- c --> <script>s()</script>c<a href='/u'>link</a></p></div>"
+    for selector in ("div.x a", "#p > a", "p b, a", "[href$='/u']", "a[href^='/']", "div[class~='y'] p"):
+        bs = [n.get_text() for n in parse_html(html, "bs4").select(selector)]
+        lx = [n.get_text() for n in parse_html(html, "lxml").select(selector)]
+        assert bs == lx, selector
+
+    bs_p, lx_p = parse_html(html, "bs4").select_one("#p"), parse_html(html, "lxml").select_one("#p")
+    assert lx_p.get_text() == bs_p.get_text()
+    assert lx_p.get_text(" ", strip=True) == bs_p.get_text(" ", strip=True)
+    # Ancestral fora do nó de contexto também casa (semântica do soupsieve)
+    assert [n.get("href") for n in lx_p.select("div.x a")] == ["/u"]
+    assert lx_p.select_one("a")["href"] == "/u" and "href" in lx_p.select_one("a").attrs
+    assert lx_p.parent.name == "div" and lx_p.select_one("i") is None
+    with pytest.raises(KeyError):
+        lx_p["nope"]
+
+
+def test_unsupported_selector_fails_loudly():
+    with pytest.raises(ValueError):
+        css_to_xpath("h2 + p")
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from aiohttp import web
+
+sys.path.append(os.getcwd())
+
+import scrapers.mercadolivre_search as search_module
+from scrapers.listing_cards import parse_listing_cards, build_deal
+from scrapers.mercadolivre_http import MercadoLivreHttpScraper, ListingBlocked, page_url, close_http_session
+from scrapers.mercadolivre_search import MercadoLivreSearchScraper
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "listing_lista.html")
+
+
+def load_fixture():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+
+async def serve(routes):
+    """Sobe um servidor aiohttp local; retorna (runner, base_url)."""
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_page_url_pagination():
+    lista = "https://lista.mercadolivre.com.br/casa-moveis-decoracao/_NoIndex_True?original_category_landing=true"
+    assert page_url(lista, 0, 1) == lista
+    assert page_url(lista, 48, 2) == "https://lista.mercadolivre.com.br/casa-moveis-decoracao/_Desde_49_NoIndex_True?original_category_landing=true"
+    assert page_url("https://lista.mercadolivre.com.br/informatica/_Desde_49", 96, 3) == "https://lista.mercadolivre.com.br/informatica/_Desde_97"
+    assert page_url("https://www.mercadolivre.com.br/ofertas?category=MLB1246#origin=qcat", 48, 2) == "https://www.mercadolivre.com.br/ofertas?category=MLB1246&page=2"
+
+
+def test_fixture_cards_build_same_deals_as_browser_path():
+    deals = [build_deal(card) for card in parse_listing_cards(load_fixture())]
+    valid = [d for d in deals if d]
+
+    assert len(deals) == 6
+    assert [d.product_id for d in valid] == ["MLB-3456789012", "MLB19876543", "MLB-2233445566", "MLB-5566778899"]
+    first = valid[0]
+    assert (first.price, first.original_price, first.discount_percentage) == (899.9, 1299.9, 30)
+    assert first.url == "https://produto.mercadolivre.com.br/MLB-3456789012-jogo-de-panelas-antiaderente-5-pecas-_JM"
+    assert first.image_url.startswith("https://http2.mlstatic.com/")
+
+
+def test_fetch_listing_cards_paginates_and_dedups():
+    html = load_fixture()
+    requested = []
+
+    async def listing(request):
+        requested.append(request.query.get("page", "1"))
+        # Página 2 repete a 1 (ML costuma repetir quando acaba): deve parar
+        return web.Response(text=html, content_type="text/html")
+
+    async def run():
+        runner, base = await serve([web.get("/ofertas", listing)])
+        try:
+            return await MercadoLivreHttpScraper(max_pages=5).fetch_listing_cards(f"{base}/ofertas", max_results=50)
+        finally:
+            await close_http_session()
+            await runner.cleanup()
+
+    cards = asyncio.run(run())
+    assert len(cards) == 6
+    assert requested == ["1", "2"]
+
+
+@pytest.mark.parametrize("handler_kind", ["status", "captcha"])
+def test_block_is_detected(handler_kind):
+    async def blocked(request):
+        if handler_kind == "status":
+            return web.Response(status=403, text="forbidden")
+        return web.Response(text="<div class='g-recaptcha'></div>", content_type="text/html")
+
+    async def run():
+        runner, base = await serve([web.get("/ofertas", blocked)])
+        try:
+            await MercadoLivreHttpScraper().fetch_listing_cards(f"{base}/ofertas")
+        finally:
+            await close_http_session()
+            await runner.cleanup()
+
+    with pytest.raises(ListingBlocked):
+        asyncio.run(run())
+
+
+class BrowserUsed(Exception):
+    pass
+
+
+class RaisingPool:
+    def acquire(self):
+        raise BrowserUsed()
+
+
+def test_http_engine_skips_browser_and_falls_back_on_block(monkeypatch):
+    html = load_fixture()
+    monkeypatch.setattr(search_module, "get_browser_pool", lambda: RaisingPool())
+
+    async def ok(request):
+        return web.Response(text=html, content_type="text/html")
+
+    async def blocked(request):
+        return web.Response(status=429, text="slow down")
+
+    async def run():
+        runner, base = await serve([web.get("/ok", ok), web.get("/blocked", blocked)])
+        scraper = MercadoLivreSearchScraper()
+        try:
+            deals = await scraper.scrape_category_url(f"{base}/ok", max_results=3, engine="http")
+            with pytest.raises(BrowserUsed):
+                await scraper.scrape_category_url(f"{base}/blocked", max_results=3, engine="http")
+            return deals
+        finally:
+            await close_http_session()
+            await runner.cleanup()
+
+    deals = asyncio.run(run())
+    assert len(deals) == 3
+    assert all(d.strategy == "volume" for d in deals)
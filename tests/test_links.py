@@ -0,0 +1,12 @@
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from main import parse_link_line
+
+
+def test_parse_link_line_engine_token():
+    assert parse_link_line("https://x/ofertas @http - Beleza") == ("https://x/ofertas", "http")
+    assert parse_link_line("https://x/ofertas - Crocs", default_engine="browser") == ("https://x/ofertas", "browser")
+    assert parse_link_line("- sem url") == (None, None)
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from core.metrics import CYCLE, CycleMetrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_spans_and_decorators_sum_into_cycle_and_jsonl(tmp_path):
+    clock = FakeClock()
+    metrics = CycleMetrics(str(tmp_path / "metrics.jsonl"), window=5, clock=clock)
+
+    @metrics.timed("scrape.scroll")
+    async def scroll():
+        clock.now += 2.0
+        return "ok"
+
+    @metrics.timed("dedup")
+    def dedup():
+        clock.now += 0.5
+        raise RuntimeError("db")
+
+    with metrics.span("ignored"):
+        clock.now += 9.0  # Fora de ciclo: não conta
+
+    async def run():
+        metrics.start_cycle()
+        assert await scroll() == "ok"
+        assert await scroll() == "ok"
+        async with metrics.span("telegram.send") as sent:
+            clock.now += 0.25
+        try:
+            dedup()
+        except RuntimeError:
+            pass  # Exceção também fecha o span
+        return sent.seconds
+
+    assert asyncio.run(run()) == 0.25
+    record = metrics.end_cycle(posted=3, seen=40)
+    assert record["duration_s"] == 4.75 and record["counts"] == {"posted": 3, "seen": 40}
+    assert record["stages"]["scrape.scroll"] == {"calls": 2, "total_s": 4.0, "max_s": 2.0}
+    assert record["stages"]["dedup"]["calls"] == 1
+    assert "ignored" not in record["stages"]
+    assert metrics.end_cycle() is None  # Sem ciclo aberto
+
+    with open(tmp_path / "metrics.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [record]
+
+
+def test_summary_percentiles_over_last_cycles_survive_restart(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    clock = FakeClock()
+    metrics = CycleMetrics(path, window=4, clock=clock)
+    for seconds in (1.0, 2.0, 3.0, 4.0, 100.0):
+        metrics.start_cycle()
+        metrics.record("scrape.navigate", seconds)
+        metrics.record("scrape.navigate", seconds)
+        metrics.record("caption", 0.5)
+        clock.now += 10.0
+        metrics.end_cycle()
+
+    # Processo novo: histórico relido do JSONL (só os últimos `window`)
+    summary = CycleMetrics(path, window=4).summary()
+    assert summary["cycles"] == 4
+    assert list(summary["stages"]) == [CYCLE, "scrape.navigate", "caption"]
+    assert summary["stages"]["scrape.navigate"] == {"p50_s": 8.0, "p95_s": 200.0, "calls": 8}
+    assert summary["stages"][CYCLE]["p50_s"] == 10.0
+    assert CycleMetrics(path, window=4).summary(last_n=1)["stages"]["scrape.navigate"]["p50_s"] == 200.0
+    assert CycleMetrics(str(tmp_path / "vazio.jsonl")).summary() == {"cycles": 0, "stages": {}}
@@ -0,0 +1,288 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from core.async_database import AsyncDatabase
+from core.database import Database
+from core.outbox import Outbox, QUEUED, SENT, FAILED, AWAITING_APPROVAL, encode_approval_id, decode_approval_id
+from conftest import make_deal
+
+
+class FakePublisher:
+    """Resolve os envios na hora (ou só no `release()`, com hold=True); `fail` = ids que dão erro."""
+
+    def __init__(self, fail=(), hold=False):
+        self.fail = set(fail)
+        self.hold = hold
+        self.enqueued = []
+        self.pending = []
+
+    def enqueue(self, deal, to_admin=False, approval_id=None):
+        self.enqueued.append((deal.product_id, to_admin, approval_id))
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((deal, future))
+        if not self.hold:
+            self.release()
+        return future
+
+    def release(self):
+        for deal, future in self.pending:
+            if deal.product_id in self.fail:
+                future.set_exception(RuntimeError("chat not found"))
+            else:
+                future.set_result(True)
+        self.pending = []
+
+
+def statuses(path):
+    with Database(path) as db:
+        rows = db.outbox_entries([QUEUED, SENT, FAILED, AWAITING_APPROVAL])
+    return {(e['deal'].product_id, e['kind']): e['status'] for e in rows}
+
+
+def test_publish_states_and_db_record(tmp_path):
+    path = str(tmp_path / "deals.db")
+    publisher = FakePublisher(fail={"X"})
+
+    async def run():
+        db = AsyncDatabase(path)
+        outbox = Outbox(db, publisher)
+        tasks = [
+            await outbox.submit(make_deal("P"), "post"),
+            await outbox.submit(make_deal("M"), "post", to_admin=True),
+            await outbox.submit(make_deal("D"), "approval", to_admin=True),
+            await outbox.submit(make_deal("X"), "post"),
+        ]
+        results = await asyncio.gather(*tasks)
+        sent = await db.check_deals_bulk([make_deal(p) for p in "PMDX"])
+        await db.close()
+        return results, sent
+
+    results, sent = asyncio.run(run())
+    assert results == [SENT, AWAITING_APPROVAL, AWAITING_APPROVAL, FAILED]
+    assert statuses(path) == {("P", "post"): SENT, ("M", "post"): AWAITING_APPROVAL,
+                              ("D", "approval"): AWAITING_APPROVAL, ("X", "post"): FAILED}
+    # Queda de preço só entra no DB após aprovação; modo manual entra na hora
+    assert {pid for pid, s in sent.items() if s['sent']} == {"P", "M"}
+    # Botões do admin levam o id do item da outbox
+    assert [a for _, to_admin, a in publisher.enqueued if to_admin] == ["2", "3"]
+
+
+def test_replay_after_crash_is_idempotent(tmp_path):
+    path = str(tmp_path / "deals.db")
+    # "Crash": itens gravados como queued e nunca enviados
+    with Database(path) as db:
+        first = db.outbox_add(make_deal("A"), "post", False)
+        db.outbox_add(make_deal("B"), "approval", True)
+        # Mesmo deal aberto de novo: mesmo id
+        assert db.outbox_add(make_deal("A"), "post", False) == first
+
+    publisher = FakePublisher(hold=True)
+
+    async def run():
+        db = AsyncDatabase(path)
+        outbox = Outbox(db, publisher)
+        # Replay duplo + o mesmo deal raspado de novo no ciclo: 1 envio por item
+        tasks = await outbox.replay() + await outbox.replay()
+        tasks.append(await outbox.submit(make_deal("A"), "post"))
+        publisher.release()
+        results = await asyncio.gather(*tasks)
+        again = await outbox.replay()
+        await db.close()
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert sorted(pid for pid, *_ in publisher.enqueued) == ["A", "B"]
+    assert set(results) == {SENT, AWAITING_APPROVAL} and again == []
+    assert statuses(path) == {("A", "post"): SENT, ("B", "approval"): AWAITING_APPROVAL}
+
+
+def test_open_approval_is_not_resent_on_next_cycle(tmp_path):
+    path = str(tmp_path / "deals.db")
+    publisher = FakePublisher()
+
+    async def run():
+        db = AsyncDatabase(path)
+        outbox = Outbox(db, publisher)
+        first = await (await outbox.submit(make_deal("D", 80.0), "approval", to_admin=True))
+        # Próximo ciclo: a mesma queda é detectada de novo, admin ainda não clicou
+        again = await (await outbox.submit(make_deal("D", 79.0), "approval", to_admin=True))
+        await db.close()
+        return first, again
+
+    assert asyncio.run(run()) == (AWAITING_APPROVAL, AWAITING_APPROVAL)
+    assert publisher.enqueued == [("D", True, "1")]
+    assert statuses(path) == {("D", "approval"): AWAITING_APPROVAL}
+
+
+def test_resubmitted_approval_publishes_latest_deal_with_or_without_cache(tmp_path):
+    path = str(tmp_path / "deals.db")
+
+    async def run():
+        db = AsyncDatabase(path)
+        outbox = Outbox(db, FakePublisher())
+        await (await outbox.submit(make_deal("D", 80.0), "approval", to_admin=True))
+        await (await outbox.submit(make_deal("D", 75.0), "approval", to_admin=True))
+        cached = await outbox.claim(1)
+        outbox.release(cached)
+        # "Restart": Outbox nova, item só no SQLite
+        spilled = await Outbox(db, FakePublisher()).claim(1)
+        await db.close()
+        return cached, spilled
+
+    cached, spilled = asyncio.run(run())
+    assert cached['deal'].price == spilled['deal'].price == 75.0
+
+
+def test_replay_confirmation_errors_are_logged(tmp_path, monkeypatch):
+    path = str(tmp_path / "deals.db")
+    with Database(path) as db:
+        db.outbox_add(make_deal("A"), "post", False)
+
+    errors = []
+    monkeypatch.setattr("core.outbox.logger.error", errors.append)
+
+    async def run():
+        db = AsyncDatabase(path)
+
+        async def broken(*args, **kwargs):
+            raise RuntimeError("database is locked")
+
+        db.add_sent_deal = broken
+        await Outbox(db, FakePublisher()).replay()  # Tasks não aguardadas (como no startup)
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await db.close()
+
+    asyncio.run(run())
+    assert len(errors) == 1 and "#1" in errors[0] and "database is locked" in errors[0]
+    assert statuses(path) == {("A", "post"): QUEUED}
+
+
+def test_resolve_approval(tmp_path):
+    path = str(tmp_path / "deals.db")
+
+    async def run():
+        db = AsyncDatabase(path)
+        outbox = Outbox(db, FakePublisher())
+        await (await outbox.submit(make_deal("D", 80.0), "approval", to_admin=True))
+        await (await outbox.submit(make_deal("R"), "approval", to_admin=True))
+        approved = await outbox.resolve(1, approved=True)
+        rejected = await outbox.resolve(2, approved=False)
+        twice = await outbox.resolve(1, approved=True)
+        status = await db.is_deal_sent("D", 80.0)
+        await db.close()
+        return approved, rejected, twice, status
+
+    approved, rejected, twice, status = asyncio.run(run())
+    # Deal original volta inteiro (imagem, preço), sem parsear a mensagem
+    assert approved['deal'].image_url == "https://img/D.webp" and approved['deal'].price == 80.0
+    assert rejected is not None and twice is None
+    assert status['sent'] and status['last_price'] == 80.0
+    assert statuses(path) == {("D", "approval"): SENT, ("R", "approval"): FAILED}
+
+
+def test_claim_is_exclusive_and_spills_to_sqlite(tmp_path):
+    path = str(tmp_path / "deals.db")
+
+    async def run():
+        db = AsyncDatabase(path)
+        # LRU de 1 item: o primeiro sai da memória e continua no SQLite
+        outbox = Outbox(db, FakePublisher(), cache_size=1)
+        for pid in ("A", "B"):
+            await (await outbox.submit(make_deal(pid), "approval", to_admin=True))
+        assert list(outbox._awaiting) == [2]
+
+        spilled = await outbox.claim(1)
+        double_click = await outbox.claim(1)
+        outbox.release(spilled)  # Falhou ao publicar: pode clicar de novo
+        retry = await outbox.claim(1)
+        await outbox.resolve(1, approved=True, entry=retry)
+
+        # Restart: memória vazia, registro vem do SQLite
+        fresh = Outbox(db, FakePublisher())
+        after_restart = await fresh.claim(2)
+        await db.close()
+        return spilled, double_click, retry, after_restart
+
+    spilled, double_click, retry, after_restart = asyncio.run(run())
+    assert spilled['deal'].product_id == "A" and double_click is None and retry['id'] == 1
+    assert after_restart['deal'].image_url == "https://img/B.webp"
+
+
+def test_approval_ids_are_compact():
+    assert encode_approval_id(0) == "0"
+    assert encode_approval_id(123456789) == "21i3v9"
+    assert all(decode_approval_id(encode_approval_id(i)) == i for i in (1, 35, 36, 10**12))
+    assert decode_approval_id("") is None and decode_approval_id("x!") is None
+    assert len(f"approve:{encode_approval_id(2**63)}".encode()) <= 64
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+        self.deleted = False
+
+    async def reply_text(self, text):
+        self.replies.append(text)
+
+    async def delete(self):
+        self.deleted = True
+
+
+class FakeQuery:
+    def __init__(self, data):
+        self.data = data
+        self.message = FakeMessage()
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+
+class FakeUpdate:
+    def __init__(self, data):
+        self.callback_query = FakeQuery(data)
+
+
+def test_callback_approves_from_record_without_parsing(tmp_path, monkeypatch):
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    from services.notifier import TelegramNotifier
+
+    path = str(tmp_path / "deals.db")
+    notifier = TelegramNotifier()
+    channel_posts = []
+
+    async def deliver(deal, to_admin=False, approval_id=None):
+        channel_posts.append((deal.product_id, deal.affiliate_url, to_admin))
+
+    notifier.deliver_deal = deliver
+
+    async def run():
+        db = AsyncDatabase(path)
+        notifier.outbox = Outbox(db, FakePublisher())
+        deal = make_deal("MLB-1", 80.0)
+        deal.affiliate_url = "https://mercadolivre.com/sec/abc"
+        await (await notifier.outbox.submit(deal, "approval", to_admin=True))
+
+        approve = FakeUpdate(f"approve:{encode_approval_id(1)}")
+        await notifier._handle_callback(approve, None)
+        again = FakeUpdate(f"approve:{encode_approval_id(1)}")
+        await notifier._handle_callback(again, None)
+        legacy = FakeUpdate("approve")
+        await notifier._handle_callback(legacy, None)
+
+        status = await db.is_deal_sent("MLB-1", 80.0)
+        await notifier.publisher.close()
+        await db.close()
+        return approve, again, legacy, status
+
+    approve, again, legacy, status = asyncio.run(run())
+    assert channel_posts == [("MLB-1", "https://mercadolivre.com/sec/abc", False)]
+    assert approve.callback_query.message.deleted
+    assert again.callback_query.message.replies == ["ℹ️ Oferta já processada."]
+    assert legacy.callback_query.message.replies and not legacy.callback_query.message.deleted
+    # Aprovação de queda de preço agora grava no DB
+    assert status['sent'] and status['last_price'] == 80.0
+    assert statuses(path) == {("MLB-1", "approval"): SENT}
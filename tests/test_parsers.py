@@ -0,0 +1,81 @@
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from benchmarks.bench_parsers import run
+from benchmarks.fixture_corpus import load_fixture, inflate
+from scrapers.listing_cards import parse_listing_cards, build_deal
+from scrapers.mercadolivre import MercadoLivreScraper
+from scrapers.mercadolivre_hub import MercadoLivreHubScraper
+from scrapers.mercadolivre_trends import MercadoLivreTrendsScraper
+
+
+def summary(deals):
+    return [(d.title, d.price, d.original_price, d.discount_percentage, d.url) for d in deals]
+
+
+def test_offers_page_parser():
+    deals = MercadoLivreScraper().parse_deals(load_fixture("offers"))
+    assert [d.title for d in deals] == [
+        "Smartphone Motorola Moto G54 5g 256gb",
+        "Fone De Ouvido Bluetooth Jbl Tune 520bt",
+        "Air Fryer Mondial 4l",
+        "Tênis Olympikus Corre 3",
+    ]
+    assert summary(deals[:2]) == [
+        ("Smartphone Motorola Moto G54 5g 256gb", 1049.0, 1499.0, 30,
+         "https://www.mercadolivre.com.br/smartphone-motorola-moto-g54-5g-256gb/p/MLB27172677#polycard_client=offers&deal_print_id=abc&position=1"),
+        ("Fone De Ouvido Bluetooth Jbl Tune 520bt", 249.9, 399.0, 37,
+         "https://produto.mercadolivre.com.br/MLB-3900112233-fone-de-ouvido-bluetooth-jbl-tune-520bt-_JM#polycard_client=offers&position=2"),
+    ]
+    assert deals[3].url == "https://www.mercadolivre.com.br/tenis-olympikus-corre-3/p/MLB35123456"
+
+
+def test_search_and_product_parsers():
+    ml = MercadoLivreScraper()
+    # Só itens com selo de desconto
+    assert [(d.title, d.price, d.discount_percentage) for d in ml.parse_search_results(load_fixture("search"))] == [
+        ("Fritadeira Air Fryer Philco 4l", 319.9, 30),
+        ("Fritadeira Elétrica Mondial 5l", 1029.05, 6),
+    ]
+
+    deal = ml.parse_product_details(load_fixture("product"), "https://produto.mercadolivre.com.br/MLB-1")
+    assert (deal.title, deal.price, deal.discount_percentage) == ("Protetor Solar Cerave Fps 50 52ml", 83.3, 30)
+    assert deal.image_url.endswith("900001-MLA0000000901_092024-O.webp")
+
+
+def test_hub_parsers():
+    hub = MercadoLivreHubScraper()
+    deals = hub.parse_hub_cards(load_fixture("hub"))
+    # "Ganhos extras 8%" cai no filtro (<= 10%) e o card sem preço é ignorado
+    assert [(d.title, d.price, d.discount_percentage) for d in deals] == [
+        ("Kit Skincare La Roche", 1189.0, 22),
+        ("Mochila Notebook Samsonite", 489.0, 0),
+    ]
+    assert deals[0].url == "https://www.mercadolivre.com.br/kit-skincare-la-roche/p/MLB23456789"
+    assert len(hub.parse_hub_cards(inflate(load_fixture("hub"), 20), max_deals=30)) == 30
+
+    assert hub.parse_product_page(load_fixture("product")) == ("Cerave", 119.0)
+
+
+def test_trends_parser(tmp_path):
+    trends = MercadoLivreTrendsScraper(cache_file=str(tmp_path / "trends.json")).parse_trending_terms(load_fixture("trends"))
+    assert [(t.term, t.rank, t.url) for t in trends] == [
+        ("air fryer", 1, "https://lista.mercadolivre.com.br/air-fryer#trend"),
+        ("tênis masculino", 2, "https://lista.mercadolivre.com.br/tenis-masculino"),
+        ("protetor solar", 3, "https://lista.mercadolivre.com.br/protetor-solar"),
+    ]
+
+
+def test_inflate_keeps_ids_unique():
+    deals = [d for d in map(build_deal, parse_listing_cards(inflate(load_fixture("listing"), 3))) if d]
+    assert len(deals) == 12
+    assert len({d.product_id for d in deals}) == 12
+
+
+def test_benchmark_suite_runs_offline():
+    results = run(factor=2, rounds=1)
+    assert set(results) == {"listing", "offers", "search", "product", "hub", "pdp_hub", "trends", "state", "state_offers"}
+    assert results["listing"]["items"] == 8
+    assert all(r["items_per_s"] > 0 and r["peak_kb"] > 0 for r in results.values())
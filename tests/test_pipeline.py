@@ -0,0 +1,214 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from core.outbox import Outbox
+from core.pipeline import DealPipeline, PipelineSource
+from conftest import make_deal
+from services.notifier import TelegramPublisher
+
+
+class StreamingScraper:
+    """Entrega 1 deal a cada `delay` segundos e registra até onde raspou."""
+
+    def __init__(self, listings, delay=0.01):
+        self.listings = listings
+        self.delay = delay
+        self.yielded = {url: 0 for url in listings}
+        self.closed = set()
+        self.engines = {}
+
+    async def iter_category_url(self, url, max_results=15, engine="browser"):
+        self.engines[url] = engine
+        try:
+            for deal in self.listings[url][:max_results]:
+                await asyncio.sleep(self.delay)
+                self.yielded[url] += 1
+                yield deal
+        finally:
+            self.closed.add(url)
+
+
+class FakeDB:
+    def __init__(self, sent=(), dropped=()):
+        self.sent = set(sent)
+        self.dropped = set(dropped)
+        self.added = []
+        self.observed = []
+        self.outbox = []
+
+    async def check_deals_bulk(self, deals):
+        return {
+            d.product_id: {
+                "sent": d.product_id in self.sent or d.product_id in self.dropped,
+                "price_dropped": d.product_id in self.dropped,
+                "last_price": d.price * 2,
+            }
+            for d in deals
+        }
+
+    async def record_observations(self, deals):
+        self.observed.extend(deals)
+
+    async def add_sent_deal(self, deal, outbox_id=None, outbox_status="sent"):
+        self.added.append(deal.product_id)
+
+    async def outbox_add(self, deal, kind, to_admin):
+        self.outbox.append((deal.product_id, kind))
+        return len(self.outbox), "queued"
+
+    async def set_outbox_status(self, outbox_id, status, error=None):
+        pass
+
+
+class FakeAPI:
+    def __init__(self):
+        self.calls = []
+
+    async def create_links(self, urls):
+        self.calls.append(list(urls))
+        return [f"{u}?tag=t" for u in urls]
+
+
+class FakeNotifier:
+    chat_id = "channel"
+
+    def __init__(self, send_delay=0):
+        self.sent = []
+        self.send_delay = send_delay
+
+    def target_chat(self, to_admin=False):
+        return "admin" if to_admin else self.chat_id
+
+    async def deliver_deal(self, deal, to_admin=False, approval_id=None):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append((deal.product_id, to_admin, deal.affiliate_url, time.perf_counter()))
+
+
+def build(scraper, db, send_delay=0, **kwargs):
+    api, notifier = FakeAPI(), FakeNotifier(send_delay)
+    publisher = TelegramPublisher(notifier, channel_rate_per_min=60_000, burst=100)
+    pipeline = DealPipeline(scraper, db, api, Outbox(db, publisher), shuffle_window=1, **kwargs)
+    return pipeline, api, notifier
+
+
+def test_quota_stops_scraping_and_posts_new_deals():
+    general = [make_deal(f"G{i}") for i in range(100)]
+    brand = [make_deal(f"B{i}") for i in range(50)]
+    scraper = StreamingScraper({"geral": general, "marca": brand})
+    db = FakeDB(sent={"G0", "G1", "B0"})
+    pipeline, api, notifier = build(scraper, db, blacklist=["Produto G2"])
+
+    stats = asyncio.run(pipeline.run([
+        PipelineSource("geral", "geral", 100, quota=7),
+        PipelineSource("marca", "marca", 50, quota=1, price_drop_fills_quota=True),
+    ]))
+
+    posted = [pid for pid, *_ in notifier.sent]
+    assert sorted(db.added) == sorted(posted)
+    assert [p for p in posted if p.startswith("G")] == [f"G{i}" for i in range(3, 10)]
+    assert [p for p in posted if p.startswith("B")] == ["B1"]
+    assert stats["posted"] == 8 and stats["filled"] == {"geral": True, "marca": True}
+    # Raspagem interrompida bem antes do fim das listagens (só o buffer das filas)
+    assert scraper.yielded["geral"] < 40 and scraper.yielded["marca"] < 30
+    assert scraper.closed == {"geral", "marca"}
+    assert all(url.endswith("?tag=t") for _, _, url, _ in notifier.sent)
+
+
+def test_first_post_happens_while_still_scraping():
+    listing = [make_deal(f"G{i}") for i in range(30)]
+    scraper = StreamingScraper({"geral": listing}, delay=0.02)
+    pipeline, api, notifier = build(scraper, FakeDB(), send_delay=0.05)
+
+    start = time.perf_counter()
+    stats = asyncio.run(pipeline.run([PipelineSource("geral", "geral", 30, quota=30)]))
+    staged_scrape = 30 * 0.02
+
+    # Fluxo antigo: 1º post só depois de raspar a lista inteira
+    assert stats["first_post_s"] < staged_scrape / 3
+    assert notifier.sent[0][3] - start < staged_scrape / 3
+    assert stats["posted"] == 30
+    assert sum(len(c) for c in api.calls) == 30
+
+
+def test_price_drops_go_to_admin_without_db_and_fill_brand_quota():
+    scraper = StreamingScraper({
+        "geral": [make_deal("G0"), make_deal("G1")],
+        "marca": [make_deal("B0"), make_deal("B1")],
+    })
+    db = FakeDB(dropped={"G0", "B0"})
+    pipeline, _, notifier = build(scraper, db)
+
+    stats = asyncio.run(pipeline.run([
+        PipelineSource("geral", "geral", 10, quota=7),
+        PipelineSource("marca", "marca", 10, quota=1, price_drop_fills_quota=True),
+    ]))
+
+    sent = {pid: to_admin for pid, to_admin, *_ in notifier.sent}
+    assert sent == {"G0": True, "G1": False, "B0": True}
+    assert db.added == ["G1"]
+    assert stats["price_drops"] == 2 and stats["filled"] == {"geral": False, "marca": True}
+    assert {d.product_id for d in db.observed} >= {"G0", "G1", "B0"}
+
+
+def test_failing_or_slow_source_does_not_block_the_other():
+    class MixedScraper(StreamingScraper):
+        async def iter_category_url(self, url, max_results=15, engine="browser"):
+            if url == "broken":
+                raise RuntimeError("boom")
+                yield
+            if url == "slow":
+                await asyncio.sleep(5)
+                yield make_deal("S0")
+            async for deal in super().iter_category_url(url, max_results, engine):
+                yield deal
+
+    scraper = MixedScraper({"ok": [make_deal("A"), make_deal("B")]})
+    pipeline, _, notifier = build(scraper, FakeDB(), source_timeout=0.2)
+    stats = asyncio.run(pipeline.run([
+        PipelineSource("ok", "ok", 10, quota=7),
+        PipelineSource("broken", "broken", 10, quota=1),
+        PipelineSource("slow", "slow", 10, quota=1),
+    ]))
+    assert [pid for pid, *_ in notifier.sent] == ["A", "B"]
+    assert stats["filled"] == {"ok": False, "broken": False, "slow": False}
+
+
+def test_engine_is_forwarded_per_source():
+    scraper = StreamingScraper({"a": [make_deal("A")], "b": [make_deal("B")]})
+    pipeline, _, _ = build(scraper, FakeDB())
+    asyncio.run(pipeline.run([
+        PipelineSource("a", "a", 10, quota=1, engine="http"),
+        PipelineSource("b", "b", 10, quota=1),
+    ]))
+    assert scraper.engines == {"a": "http", "b": "browser"}
+
+
+def test_channel_captions_are_prefetched_before_posting():
+    class FakeCopywriter:
+        def __init__(self):
+            self.prefetched = []
+
+        def prefetch(self, deals):
+            self.prefetched.extend(d.product_id for d in deals)
+
+    copywriter = FakeCopywriter()
+    scraper = StreamingScraper({"geral": [make_deal(f"G{i}") for i in range(5)]})
+    pipeline, _, notifier = build(scraper, FakeDB(dropped={"G0"}), copywriter=copywriter)
+
+    delivered_after_prefetch = []
+    deliver = notifier.deliver_deal
+
+    async def checked_deliver(deal, to_admin=False, approval_id=None):
+        delivered_after_prefetch.append(to_admin or deal.product_id in copywriter.prefetched)
+        await deliver(deal, to_admin, approval_id)
+
+    notifier.deliver_deal = checked_deliver
+    asyncio.run(pipeline.run([PipelineSource("geral", "geral", 10, quota=7)]))
+
+    # Queda de preço vai para o admin (sem legenda de IA): não pré-gera
+    assert sorted(copywriter.prefetched) == ["G1", "G2", "G3", "G4"]
+    assert len(delivered_after_prefetch) == 5 and all(delivered_after_prefetch)
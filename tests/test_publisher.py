@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from telegram.error import RetryAfter, TimedOut, BadRequest
+
+sys.path.append(os.getcwd())
+
+from conftest import make_deal
+from services.notifier import TokenBucket, TelegramPublisher
+
+
+class SimClock:
+    """Relógio simulado: `sleep` avança o tempo na hora (sem esperar de verdade)."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class FakeNotifier:
+    chat_id = "channel"
+
+    def __init__(self, clock, failures=None):
+        self.clock = clock
+        self.failures = failures or {}  # product_id -> [exceções a levantar, em ordem]
+        self.sent = []
+
+    def target_chat(self, to_admin=False):
+        return "admin" if to_admin else self.chat_id
+
+    async def deliver_deal(self, deal, to_admin=False, approval_id=None):
+        errors = self.failures.get(deal.product_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((round(self.clock(), 3), deal.product_id, to_admin))
+
+
+def publish(jobs, failures=None, **kwargs):
+    """Enfileira `jobs` [(product_id, to_admin)] e roda até esvaziar; devolve (envios, resultados)."""
+    clock = SimClock()
+    notifier = FakeNotifier(clock, failures)
+    publisher = TelegramPublisher(notifier, clock=clock, sleep=clock.sleep, **kwargs)
+
+    async def run():
+        futures = [publisher.enqueue(make_deal(pid), to_admin=to_admin) for pid, to_admin in jobs]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        await publisher.close()
+        return results
+
+    results = asyncio.run(run())
+    return notifier.sent, results
+
+
+def test_token_bucket_refill_and_throttle():
+    clock = SimClock()
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+    bucket.consume()
+    bucket.consume()
+    assert bucket.delay() == pytest.approx(1.0)
+    clock.now = 1.0
+    assert bucket.delay() == 0
+
+    bucket.throttle(5)
+    assert bucket.rate == 0.5
+    assert bucket.delay() == pytest.approx(5.0)
+    clock.now = 6.0  # Nada acumulado durante o bloqueio
+    assert bucket.delay() == 0 and bucket.tokens == 1
+    bucket.recover()
+    assert bucket.rate == pytest.approx(0.6)
+
+
+def test_channel_posts_follow_token_bucket_instead_of_fixed_sleep():
+    sent, results = publish([(f"D{i}", False) for i in range(8)], channel_rate_per_min=20, burst=3)
+    # 3 de rajada, depois 1 a cada 3s (20/min): 8 deals em 15s (antes: 80s)
+    assert [t for t, *_ in sent] == [0, 0, 0, 3, 6, 9, 12, 15]
+    assert [pid for _, pid, _ in sent] == [f"D{i}" for i in range(8)]
+    assert results == [True] * 8
+
+
+def test_approvals_jump_the_channel_queue():
+    jobs = [(f"C{i}", False) for i in range(5)] + [("A0", True), ("A1", True)]
+    sent, _ = publish(jobs, channel_rate_per_min=20, burst=1, private_rate=1)
+    order = [pid for _, pid, _ in sent]
+    assert order[:2] == ["A0", "A1"] or order[:3] == ["A0", "C0", "A1"]
+    # Canal esperando token não segura o chat do admin
+    times = {pid: t for t, pid, _ in sent}
+    assert times["A1"] <= 1 and times["C1"] == 3
+
+
+def test_retry_after_blocks_chat_and_slows_it_down():
+    failures = {"D1": [RetryAfter(7)]}
+    sent, results = publish([("D0", False), ("D1", False), ("D2", False)], failures,
+                            channel_rate_per_min=60, burst=1)
+    times = {pid: t for t, pid, _ in sent}
+    assert times["D0"] == 0
+    # D1 tentou em t=1, levou RetryAfter(7): volta em t=8 mantendo a posição
+    assert times["D1"] == 8
+    # Taxa do canal caiu pela metade (1/s -> 0.5/s) e recupera 10% da base por envio (0.6/s)
+    assert times["D2"] == pytest.approx(8 + 1 / 0.6, abs=0.01)
+    assert results == [True, True, True]
+
+
+def test_network_errors_back_off_and_bad_requests_fail():
+    failures = {"N": [TimedOut(), TimedOut()], "B": [BadRequest("chat not found")]}
+    sent, results = publish([("N", False), ("B", False), ("OK", False)], failures,
+                            channel_rate_per_min=6000, burst=10)
+    times = {pid: t for t, pid, _ in sent}
+    assert "B" not in times and isinstance(results[1], BadRequest)
+    # Backoff exponencial (1s, 2s) sem travar o resto da fila
+    assert times["OK"] == 0 and times["N"] == pytest.approx(3, abs=0.05)
+
+
+def test_gives_up_after_max_retries():
+    sent, results = publish([("X", False)], {"X": [TimedOut()] * 5}, max_retries=2, channel_rate_per_min=6000)
+    assert sent == [] and isinstance(results[0], TimedOut)
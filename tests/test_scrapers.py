@@ -7,6 +7,7 @@ sys.path.append(os.getcwd())
 
 from scrapers.mercadolivre_search import MercadoLivreSearchScraper
 from scrapers.mercadolivre_trends import MercadoLivreTrendsScraper
+from core.browser_pool import shutdown_browser_pool
 
 async def test_scrapers():
     keyword = "iphone"
@@ -37,6 +38,8 @@ async def test_scrapers():
     except Exception as e:
         print(f"❌ Falha nos Trends: {e}")
 
+    await shutdown_browser_pool()
+
     # Teste Hub (Opcional)
     # try:
     #     print("\n------- MERCADO LIVRE HUB (Authenticated) -------")
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from scrapers.mercadolivre_search import MercadoLivreSearchScraper, SCROLL_MAX_STALE
+
+
+class FakeKeyboard:
+    def __init__(self, page):
+        self.page = page
+
+    async def press(self, key):
+        self.page.presses += 1
+        self.page.cards = min(self.page.cards + self.page.per_scroll, self.page.total)
+
+
+class FakePage:
+    """Listagem com infinite scroll: cada PageDown carrega `per_scroll` cards até `total`."""
+
+    def __init__(self, initial, per_scroll, total):
+        self.cards = initial
+        self.per_scroll = per_scroll
+        self.total = total
+        self.presses = 0
+        self.keyboard = FakeKeyboard(self)
+
+    async def evaluate(self, js, arg=None):
+        return self.cards
+
+    async def wait_for_function(self, js, arg=None, timeout=None):
+        if self.cards <= arg[1]:
+            raise PlaywrightTimeoutError("no growth")
+
+
+def test_stops_as_soon_as_enough_cards_are_loaded():
+    page = FakePage(initial=48, per_scroll=12, total=500)
+    count = asyncio.run(MercadoLivreSearchScraper()._scroll_until_loaded(page, 100))
+    assert count >= 100
+    assert page.presses == 5
+
+
+def test_no_scroll_when_page_already_has_enough_cards():
+    page = FakePage(initial=120, per_scroll=12, total=500)
+    asyncio.run(MercadoLivreSearchScraper()._scroll_until_loaded(page, 100))
+    assert page.presses == 0
+
+
+def test_gives_up_when_count_stops_growing(monkeypatch):
+    page = FakePage(initial=30, per_scroll=10, total=50)
+    count = asyncio.run(MercadoLivreSearchScraper()._scroll_until_loaded(page, 100))
+    assert count == 50
+    assert page.presses == 2 + SCROLL_MAX_STALE
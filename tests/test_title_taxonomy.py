@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from services.copywriter import Copywriter
+from utils.category_dedup import detect_category
+from utils.title_taxonomy import analyze_title
+
+
+def test_clean_and_classify_in_one_pass():
+    info = analyze_title("[Oferta] Tênis Nike Revolution 6 Masculino - Frete Grátis NF")
+    assert info.clean_title == "Tênis Nike Revolution 6 Masculino"
+    assert info.category == "calcado" and info.dedup_category == "tenis"
+
+    # Sem quebrar palavras: "NF"/"Novo"/"Original" só como palavra inteira
+    assert analyze_title("Infinity Renovo Originalidade").clean_title == "Infinity Renovo Originalidade"
+    assert analyze_title("Perfume Eau  de Parfum Promoção").clean_title == "Perfume Eau de Parfum"
+
+
+def test_callers_agree():
+    cases = {
+        "TENIS Adidas Sneaker": ("calcado", "tenis"),
+        "Smartphone Galaxy A15": ("eletronico", "celular"),
+        "iPhone 13 128GB": ("eletronico", "celular"),  # Antes: 'geral' no copywriter
+        "Fones de Ouvido Bluetooth": ("eletronico", "fone"),
+        "Kit 3 Cuecas Boxer": ("roupa_masculina", "outros"),
+        "Vestido Midi Floral": ("roupa_feminina", "outros"),
+        "Blusa Feminina Manga Longa": ("roupa_feminina", "outros"),
+        "Colchões Casal Ortobom": ("casa", "outros"),
+        "Relógio Casio Vintage": ("geral", "relogio"),
+    }
+    cw = Copywriter(client=object(), cache=None)
+    for title, (category, dedup) in cases.items():
+        assert cw._classify_product(cw._clean_title(title), 100.0) == category, title
+        assert detect_category(title) == dedup, title
+
+
+def test_substrings_inside_words_do_not_match():
+    # Antes: 'deo' em 'vídeo' (perfumaria), 'ela' em 'panela' (roupa feminina), 'bota' em 'botão'
+    assert analyze_title("Placa de Vídeo RTX 4060").category == "geral"
+    assert analyze_title("Camisa Estampa Panela").category == "roupa_masculina"
+    assert analyze_title("Botão de Pressão").category == "geral"
+    assert analyze_title("Monitoramento Câmera Wifi").dedup_category == "outros"
@@ -0,0 +1,101 @@
+"""
+Blacklist de títulos compilada.
+
+Os termos viram UM regex (alternação, termos mais longos primeiro) compilado
+uma vez; cada deal custa um `search` em vez de um `in` por termo.
+O arquivo (data/blacklist.txt) só é relido quando o mtime/tamanho muda.
+
+Opções:
+- ignore_accents: "celular" bloqueia "Célular" e vice-versa (padrão: sim).
+- word_boundary: só palavras inteiras ("kit" não bloqueia "kitchen").
+  Padrão: não, para manter o comportamento de substring (radicais como
+  "recondicionad" continuam funcionando).
+"""
+import os
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+from core.config_store import LinesFile
+
+BLACKLIST_FILE = os.getenv("BLACKLIST_FILE", "data/blacklist.txt")
+BLACKLIST_WORD_BOUNDARY = os.getenv("BLACKLIST_WORD_BOUNDARY", "false").lower() == "true"
+BLACKLIST_IGNORE_ACCENTS = os.getenv("BLACKLIST_IGNORE_ACCENTS", "true").lower() == "true"
+
+
+def _build_accent_table() -> dict:
+    # Latin-1 + Latin Extended-A: 'ã' -> 'a', 'ç' -> 'c' (1 para 1, posições não mudam)
+    table = {}
+    for code in range(0xC0, 0x180):
+        base = unicodedata.normalize("NFKD", chr(code))[0]
+        if base != chr(code) and base.isascii():
+            table[code] = base
+    return table
+
+
+_ACCENTS = _build_accent_table()
+
+
+def normalize(text: str, ignore_accents: bool = True) -> str:
+    text = text.lower()
+    return text.translate(_ACCENTS) if ignore_accents else text
+
+
+class Blacklist:
+    """Matcher compilado de termos proibidos em títulos."""
+
+    def __init__(self, terms: Iterable[str] = (), word_boundary: bool = None, ignore_accents: bool = None):
+        self.word_boundary = BLACKLIST_WORD_BOUNDARY if word_boundary is None else word_boundary
+        self.ignore_accents = BLACKLIST_IGNORE_ACCENTS if ignore_accents is None else ignore_accents
+
+        normalized = {" ".join(normalize(t, self.ignore_accents).split()) for t in terms}
+        self.terms: List[str] = sorted((t for t in normalized if t), key=len, reverse=True)
+        self._regex = None
+        if self.terms:
+            alternation = "|".join(re.escape(t).replace(r"\ ", r"\s+") for t in self.terms)
+            if self.word_boundary:
+                alternation = rf"\b(?:{alternation})\b"
+            self._regex = re.compile(alternation)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def match(self, title: str) -> Optional[str]:
+        """Termo que bloqueia o título (normalizado) ou None."""
+        if self._regex is None or not title:
+            return None
+        found = self._regex.search(normalize(title, self.ignore_accents))
+        return found.group(0) if found else None
+
+    def blocks(self, title: str) -> bool:
+        return self.match(title) is not None
+
+
+class BlacklistFile:
+    """Blacklist carregada de um arquivo, recompilada só quando o arquivo muda."""
+
+    def __init__(self, path: str = None, word_boundary: bool = None, ignore_accents: bool = None):
+        self.path = path or BLACKLIST_FILE
+        self._file = LinesFile(self.path, lambda terms: Blacklist(terms, word_boundary, ignore_accents))
+
+    @property
+    def reloads(self) -> int:
+        return self._file.loads
+
+    def current(self) -> Blacklist:
+        """Blacklist atual (1 stat por chamada; relê e recompila se mtime/tamanho mudou)."""
+        return self._file.get()
+
+
+_blacklist_file = None
+
+
+def get_blacklist() -> Blacklist:
+    """Blacklist global do processo (data/blacklist.txt), compartilhada por todos os filtros."""
+    global _blacklist_file
+    if _blacklist_file is None:
+        _blacklist_file = BlacklistFile()
+    return _blacklist_file.current()
@@ -5,7 +5,7 @@ Ensures diversity by limiting how many products from each category appear per cy
 
 from typing import List, Dict
 from models.deal import Deal
-import re
+from utils.title_taxonomy import dedup_category
 
 def detect_category(title: str) -> str:
     """
@@ -17,25 +17,8 @@ def detect_category(title: str) -> str:
     Returns:
         Category name or "outros" if no match
     """
-    title_lower = title.lower()
-    
-    # Category keywords (order matters - more specific first)
-    category_keywords = {
-        "notebook": ["notebook", "laptop"],
-        "celular": ["celular", "smartphone", "iphone", "galaxy", "xiaomi", "redmi", "poco"],
-        "tablet": ["tablet", "ipad"],
-        "monitor": ["monitor"],
-        "relogio": ["relogio", "relógio", "smartwatch", "watch"],
-        "fone": ["fone", "headset", "earbuds", "airpods", "buds"],
-        "tenis": ["tenis", "tênis", "sneaker"],
-    }
-    
-    for category, keywords in category_keywords.items():
-        for keyword in keywords:
-            if keyword in title_lower:
-                return category
-    
-    return "outros"
+    # Same precompiled taxonomy as the copywriter (utils.title_taxonomy)
+    return dedup_category(title)
 
 def deduplicate_by_category(deals: List[Deal], category_limits: Dict[str, int]) -> List[Deal]:
     """
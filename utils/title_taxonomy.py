@@ -0,0 +1,128 @@
+"""
+Taxonomia única de títulos: limpeza + classificação em uma passada.
+
+Todas as listas de palavras (ruído de e-commerce, categorias do copywriter e
+categorias da deduplicação) viram UM regex compilado no import. Um único
+`finditer` sobre o título encontra ruídos (removidos do título limpo) e
+palavras-chave (tags); as categorias saem das tags.
+
+Palavras casam no início da palavra com plural opcional ("bota" casa
+"botas", mas não "botão"; "deo" não casa "vídeo"; "ela" não casa "panela").
+"""
+import re
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple
+
+# Ruídos comuns de títulos de e-commerce (saem do título limpo)
+NOISE_WORDS = (
+    "frete grátis", "frete gratis", "promoção", "promocao", "oferta",
+    "original", "envio imediato", "full", "melhor preço",
+    "pronta entrega", "novo", "lacrado", "nota fiscal", "nf",
+)
+
+# (tags, termos). Tags de categoria da dedup: notebook, celular, tablet,
+# monitor, relogio, fone, tenis. Do copywriter: calcado, roupa, perfumaria,
+# eletronico, casa (+ marcadores de gênero fem/masc e peças fem_item/masc_item).
+KEYWORDS = (
+    (("tenis", "calcado"), ("tênis", "tenis", "sneaker")),
+    (("calcado",), ("chinelo", "sandália", "sandalia", "crocs", "sapato", "bota")),
+    (("roupa",), ("camiseta", "camisa", "blusa", "calça", "calca", "short", "bermuda")),
+    (("roupa", "fem_item"), ("vestido", "saia", "calcinha", "sutiã", "sutia")),
+    (("roupa", "masc_item"), ("cueca",)),
+    (("fem",), ("feminina", "feminino", "mulher", "ela")),
+    (("masc",), ("masculina", "masculino", "homem", "homens", "ele")),
+    (("perfumaria",), ("perfume", "colônia", "colonia", "desodorante", "deo", "fragrância", "fragrancia", "eau de")),
+    (("notebook", "eletronico"), ("notebook", "laptop")),
+    (("celular", "eletronico"), ("celular", "smartphone", "iphone", "galaxy", "xiaomi", "redmi", "poco")),
+    (("tablet", "eletronico"), ("tablet", "ipad")),
+    (("monitor", "eletronico"), ("monitor",)),
+    (("relogio",), ("relogio", "relógio", "smartwatch", "watch")),
+    (("fone", "eletronico"), ("fone", "headset", "headphone", "earbuds", "airpods", "buds")),
+    (("eletronico",), ("tv", "mouse", "teclado")),
+    (("casa",), (
+        "mesa", "cadeira", "sofá", "sofa", "cama", "colchão", "colchao", "colchões", "colchoes",
+        "travesseiro", "panela", "frigideira",
+    )),
+)
+
+# Prioridade das categorias da dedup (mais específica primeiro)
+DEDUP_CATEGORIES = ("notebook", "celular", "tablet", "monitor", "relogio", "fone", "tenis")
+COPY_CATEGORIES = ('calcado', 'roupa_feminina', 'roupa_masculina', 'perfumaria', 'eletronico', 'casa', 'geral')
+
+_NOISE = "noise"
+_TAGS = {word: frozenset((_NOISE,)) for word in NOISE_WORDS}
+for _tags, _terms in KEYWORDS:
+    for _term in _terms:
+        _TAGS[_term] = _TAGS.get(_term, frozenset()) | frozenset(_tags)
+
+# Termos mais longos primeiro: "camiseta" antes de "camisa", "smartwatch" antes de "watch"
+_PATTERN = r"\b(" + "|".join(re.escape(t).replace(r"\ ", r"\s+") for t in sorted(_TAGS, key=len, reverse=True)) + r")(?:s|es)?\b"
+TITLE_RE = re.compile(_PATTERN)  # Sobre o título em minúsculas (~4x mais rápido que IGNORECASE)
+_TITLE_RE_IGNORECASE = re.compile(_PATTERN, re.IGNORECASE)
+_CLEAN_STRIP = " -|[]()"
+
+
+class TitleInfo(NamedTuple):
+    clean_title: str
+    tags: FrozenSet[str]
+    category: str        # Categoria do copywriter (prompt/fallback)
+    dedup_category: str  # Categoria da deduplicação ("outros" sem match)
+
+
+def _copy_category(tags: FrozenSet[str]) -> str:
+    if "calcado" in tags:
+        return 'calcado'  # Prioridade alta - inclui Crocs
+    if "roupa" in tags:
+        # Gênero explícito > peça típica > default (maioria das ofertas)
+        if "fem" in tags:
+            return 'roupa_feminina'
+        if "masc" in tags:
+            return 'roupa_masculina'
+        if "fem_item" in tags:
+            return 'roupa_feminina'
+        return 'roupa_masculina'
+    for category in ('perfumaria', 'eletronico', 'casa'):
+        if category in tags:
+            return category
+    return 'geral'
+
+
+@lru_cache(maxsize=4096)
+def analyze_title(title: str) -> TitleInfo:
+    """Limpa e classifica o título em uma passada do regex compilado."""
+    title = title or ""
+    tags = set()
+    parts = []
+    last = 0
+    lowered = title.lower()
+    if len(lowered) == len(title):
+        matches = TITLE_RE.finditer(lowered)  # Mesmas posições no título original
+    else:
+        matches = _TITLE_RE_IGNORECASE.finditer(title)  # lower() mudou o tamanho (ex.: 'İ')
+    for match in matches:
+        term_tags = _TAGS[" ".join(match.group(1).lower().split())]
+        if _NOISE in term_tags:
+            parts.append(title[last:match.start()])
+            last = match.end()
+        else:
+            tags |= term_tags
+    parts.append(title[last:])
+
+    clean_title = " ".join("".join(parts).strip(_CLEAN_STRIP).split())
+    tags = frozenset(tags)
+    dedup_category = next((c for c in DEDUP_CATEGORIES if c in tags), "outros")
+    return TitleInfo(clean_title, tags, _copy_category(tags), dedup_category)
+
+
+def clean_title(title: str) -> str:
+    return analyze_title(title).clean_title
+
+
+def classify(title: str) -> str:
+    """Categoria do copywriter: 'calcado' | 'roupa_feminina' | ... | 'geral'."""
+    return analyze_title(title).category
+
+
+def dedup_category(title: str) -> str:
+    """Categoria da deduplicação: 'notebook' | 'celular' | ... | 'outros'."""
+    return analyze_title(title).dedup_category